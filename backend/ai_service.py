@@ -1,25 +1,56 @@
 import os
 import json
-from typing import List, Dict
-from groq import Groq, GroqError
+import hashlib
+from collections import OrderedDict
+from typing import List, Dict, Optional
 from pydantic import BaseModel, Field
 import time 
 import random 
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from threading import Lock
+
+from metrics import AI_CACHE_REQUESTS, AI_UPSTREAM_SECONDS, AI_UPSTREAM_SKIPPED
+from config import (
+    AI_BREAKER_FAILURE_THRESHOLD,
+    AI_BREAKER_RESET_SECONDS,
+    AI_CACHE_MAX_ENTRIES,
+    AI_CACHE_TTL_SECONDS,
+    AI_LOCAL_SUGGESTIONS,
+    AI_MAX_CONCURRENCY,
+    AI_SUGGESTION_POOL_SIZE,
+    AI_TIMEOUT_SECONDS,
+)
 
 # FIX: Explicitly get the API key from the environment
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
 
-# 1. Initialize the Groq Client
-# FIX: Pass the key explicitly to ensure the client is initialized correctly 
-# in Uvicorn's subprocess environment.
-try:
-    client = Groq(api_key=GROQ_API_KEY)
-except GroqError:
-    # Provide a graceful fallback if the key is still missing
-    client = None
-    print("WARNING: Groq client failed to initialize at startup. Check GROQ_API_KEY in .env")
+# 1. The Groq client is built on first use by get_client(), so importing this
+# module (and starting a worker) does not pay for the Groq SDK.
+client = None
+_client_ready = False
+
+
+def get_client():
+    """The Groq client, built on first use; None when GROQ_API_KEY is missing or invalid."""
+    global client, _client_ready
+    if not _client_ready:
+        _client_ready = True
+        if GROQ_API_KEY:
+            from groq import Groq, GroqError
+
+            # FIX: Pass the key explicitly to ensure the client is initialized correctly
+            # in Uvicorn's subprocess environment.
+            try:
+                # Retries are left to the circuit breaker; the timeout matches the call deadline.
+                client = Groq(api_key=GROQ_API_KEY, timeout=AI_TIMEOUT_SECONDS, max_retries=0)
+            except GroqError:
+                client = None
+        if client is None:
+            # Provide a graceful fallback if the key is still missing
+            print("WARNING: Groq client failed to initialize. Check GROQ_API_KEY in .env")
+    return client
 
 MODEL = "mixtral-8x7b-32768" 
 
@@ -33,12 +64,323 @@ class SuggestedHabit(BaseModel):
 class HabitSuggestions(BaseModel):
     suggestions: List[SuggestedHabit]
 
+
+def set_client(new_client) -> None:
+    """
+    Replaces the Groq client, e.g. with a local fake for offline benchmarks. Any
+    object exposing `chat.completions.create(...)` like Groq's client works.
+    """
+    global client, _client_ready
+    client, _client_ready = new_client, True
+    suggestion_cache.clear()
+    breaker.reset()
+
+
+def summary_key(current_habits_summary: List[Dict]) -> str:
+    """Hash of the habit set, ignoring order, duplicates, case and whitespace."""
+    normalized = sorted({
+        tuple(" ".join(str(h[field]).split()).lower() for field in ("name", "category", "frequency"))
+        for h in current_habits_summary
+    })
+    return hashlib.sha256(json.dumps(normalized).encode()).hexdigest()
+
+
+class SuggestionCache:
+    """
+    LRU of suggestion pools per habit set, each kept for `ttl` seconds. Memory is
+    bounded by `maxsize` pools of at most AI_SUGGESTION_POOL_SIZE suggestions.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[float, List[SuggestedHabit]]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "upstream_calls": 0, "upstream_errors": 0}
+
+    def get(self, key: str) -> Optional[List[SuggestedHabit]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(key, None)
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[1]
+
+    def put(self, key: str, pool: List[SuggestedHabit]) -> None:
+        if self.maxsize <= 0 or not pool:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, pool)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+suggestion_cache = SuggestionCache(AI_CACHE_MAX_ENTRIES, AI_CACHE_TTL_SECONDS)
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+class UpstreamUnavailable(Exception):
+    """The Groq call was skipped: breaker open or all upstream workers busy."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures so calls fail fast.
+    After `reset_timeout` seconds one probe call is let through (half-open);
+    its success closes the breaker and its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.reset()
+
+    def reset(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker(AI_BREAKER_FAILURE_THRESHOLD, AI_BREAKER_RESET_SECONDS)
+
+# Groq calls get their own threads so a slow upstream cannot starve the default
+# executor. A slot is only freed when its thread returns, even after a timeout.
+_executor: Optional[ThreadPoolExecutor] = None
+_busy = 0
+_busy_lock = Lock()
+_upstream_stats = {
+    "calls": 0, "failures": 0, "timeouts": 0, "rejected": 0, "short_circuited": 0,
+    "latency_seconds_sum": 0.0, "latency_seconds_max": 0.0,
+}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=AI_MAX_CONCURRENCY, thread_name_prefix="groq")
+    return _executor
+
+
+def _release_slot(_future) -> None:
+    global _busy
+    with _busy_lock:
+        _busy -= 1
+
+
+async def _call_upstream(fn):
+    """Runs `fn` on the Groq threads under the deadline, breaker and concurrency cap."""
+    global _busy
+    with _busy_lock:
+        saturated = _busy >= AI_MAX_CONCURRENCY
+    if saturated:
+        _upstream_stats["rejected"] += 1
+        AI_UPSTREAM_SKIPPED.inc(1, "busy")
+        raise UpstreamUnavailable("All Groq workers are busy")
+    if not breaker.allow():
+        _upstream_stats["short_circuited"] += 1
+        AI_UPSTREAM_SKIPPED.inc(1, "breaker_open")
+        raise UpstreamUnavailable(f"Groq circuit breaker is {breaker.state}")
+
+    with _busy_lock:
+        _busy += 1
+    future = _get_executor().submit(fn)
+    future.add_done_callback(_release_slot)
+    _upstream_stats["calls"] += 1
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        result = await asyncio.wait_for(asyncio.wrap_future(future), AI_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        _upstream_stats["timeouts"] += 1
+        breaker.record_failure()
+        raise
+    except Exception:
+        outcome = "error"
+        _upstream_stats["failures"] += 1
+        breaker.record_failure()
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        _upstream_stats["latency_seconds_sum"] += elapsed
+        _upstream_stats["latency_seconds_max"] = max(_upstream_stats["latency_seconds_max"], elapsed)
+        AI_UPSTREAM_SECONDS.observe(elapsed, outcome)
+    breaker.record_success()
+    return result
+
+
+def build_prompts(current_habits_summary: List[Dict]) -> tuple[str, str]:
+    if current_habits_summary:
+        habits_list = "\n".join(
+            [f"- {h['name']} ({h['category']}, {h['frequency']})" for h in current_habits_summary]
+        )
+        user_context = f"The user currently tracks the following {len(current_habits_summary)} habits:\n{habits_list}"
+    else:
+        user_context = "The user has not added any habits yet. Provide diverse suggestions across categories to help them start their routine."
+
+    # Ask for a whole pool at once; variety comes from sampling the cached pool
+    # rather than from a random seed that defeats caching.
+    system_prompt = (
+        f"You are an expert Habit Suggestion AI. Your task is to recommend {AI_SUGGESTION_POOL_SIZE} new, simple, and unique habits. "
+        "The response MUST be a JSON object that strictly adheres to the provided schema. "
+        "The categories must only be 'health', 'work', 'learning', or 'other'. "
+        "The frequency must only be 'daily' or 'weekly'. "
+        "Make the suggestions varied and distinct from each other."
+    )
+
+    user_prompt = (
+        f"{user_context}\n\n"
+        f"Based on this context, suggest {AI_SUGGESTION_POOL_SIZE} new habits that complement their routine. "
+        f"Ensure the suggestions are not duplicates of the user's current habits."
+    )
+    return system_prompt, user_prompt
+
+
+async def _request_suggestions(current_habits_summary: List[Dict]) -> List[SuggestedHabit]:
+    """One upstream call returning a pool of suggestions."""
+    system_prompt, user_prompt = build_prompts(current_habits_summary)
+
+    def request():
+        response = get_client().chat.completions.create(
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            model=MODEL,
+            temperature=0.9, 
+            response_format={"type": "json_object", "schema": HabitSuggestions.model_json_schema()} 
+        )
+        # Parse on the worker thread so a malformed reply counts as a failed call.
+        return HabitSuggestions.model_validate_json(response.choices[0].message.content).suggestions
+
+    return await _call_upstream(request)
+
+
+async def _fetch_pool(key: str, current_habits_summary: List[Dict]) -> List[SuggestedHabit]:
+    suggestion_cache.stats["upstream_calls"] += 1
+    try:
+        pool = await _request_suggestions(current_habits_summary)
+    except Exception:
+        suggestion_cache.stats["upstream_errors"] += 1
+        raise
+    existing = {" ".join(h["name"].split()).lower() for h in current_habits_summary}
+    pool = [s for s in pool if " ".join(s.name.split()).lower() not in existing][:AI_SUGGESTION_POOL_SIZE]
+    suggestion_cache.put(key, pool)
+    return pool
+
+
+async def get_suggestion_pool(current_habits_summary: List[Dict]) -> List[SuggestedHabit]:
+    """
+    Cached pool of suggestions for a habit set. Concurrent misses for the same
+    set share one upstream call.
+    """
+    key = summary_key(current_habits_summary)
+    pool = suggestion_cache.get(key)
+    if pool is not None:
+        AI_CACHE_REQUESTS.inc(1, "hit")
+        return pool
+    task = _inflight.get(key)
+    if task is None:
+        AI_CACHE_REQUESTS.inc(1, "miss")
+        task = asyncio.ensure_future(_fetch_pool(key, current_habits_summary))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    else:
+        suggestion_cache.stats["coalesced"] += 1
+        AI_CACHE_REQUESTS.inc(1, "shared")
+    return await asyncio.shield(task)
+
+
+def local_suggestions(current_habits_summary: List[Dict], count: int = 3) -> List[SuggestedHabit]:
+    """Suggestions from the local co-occurrence model; empty when no model has been built."""
+    import recommender  # NumPy is only needed once a local model is consulted.
+
+    model = recommender.get_model()
+    if model is None:
+        return []
+    return [
+        SuggestedHabit(
+            name=item["name"],
+            description=(
+                "Often tracked by people with habits like yours." if item["score"] > 0
+                else f"One of the most popular {item['category']} habits."
+            ),
+            category=item["category"],
+            frequency=item["frequency"],
+        )
+        for item in model.recommend((h["name"] for h in current_habits_summary), count)
+    ]
+
+
+def metrics() -> dict:
+    """Cache counters plus upstream latency (seconds), timeouts and breaker state."""
+    return {
+        "entries": len(suggestion_cache._entries),
+        "inflight": len(_inflight),
+        **suggestion_cache.stats,
+        "upstream": {
+            "breaker_state": breaker.state,
+            "breaker_opened": breaker.times_opened,
+            "consecutive_failures": breaker.failures,
+            "busy_workers": _busy,
+            "max_concurrency": AI_MAX_CONCURRENCY,
+            "timeout_seconds": AI_TIMEOUT_SECONDS,
+            **_upstream_stats,
+        },
+    }
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
 # 3. Core AI Generation Function (Async for FastAPI compatibility)
 async def get_habit_suggestions(current_habits_summary: List[Dict]) -> List[SuggestedHabit]:
     """
     Generates new habit suggestions based on the user's existing habits using Groq.
     """
     
+    # The local recommender answers when configured to, or when Groq is unavailable
+    client = get_client()
+    if AI_LOCAL_SUGGESTIONS or not client:
+        local = local_suggestions(current_habits_summary)
+        if local:
+            return local
+
     # Check if client initialized successfully
     if not client:
         # Provide helpful fallback suggestions when API key is missing
@@ -88,51 +430,19 @@ async def get_habit_suggestions(current_habits_summary: List[Dict]) -> List[Sugg
         
         return fallback_suggestions[:3]  # Return up to 3 suggestions
     
-    # 1. Context generation
-    if current_habits_summary:
-        habits_list = "\n".join(
-            [f"- {h['name']} ({h['category']}, {h['frequency']})" for h in current_habits_summary]
-        )
-        user_context = f"The user currently tracks the following {len(current_habits_summary)} habits:\n{habits_list}"
-    else:
-        user_context = "The user has not added any habits yet. Provide diverse suggestions across categories to help them start their routine."
-
-    # 2. Cache Buster
-    cache_buster_seed = random.randint(100000, 999999) 
-
-    system_prompt = (
-        f"You are an expert Habit Suggestion AI. Your task is to recommend 3 new, simple, and unique habits. "
-        "The response MUST be a JSON object that strictly adheres to the provided schema. "
-        "The categories must only be 'health', 'work', 'learning', or 'other'. "
-        "The frequency must only be 'daily' or 'weekly'. "
-        f"CRITICAL: Always provide different suggestions for each unique request. (Seed: {cache_buster_seed})"
-    )
-    
-    user_prompt = (
-        f"{user_context}\n\n"
-        f"Based on this context, suggest 3 new habits that complement their routine. "
-        f"Ensure the suggestions are not duplicates of the user's current habits. "
-        f"Request Seed: {cache_buster_seed}" 
-    )
-
     try:
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, lambda: client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            model=MODEL,
-            temperature=0.9, 
-            response_format={"type": "json_object", "schema": HabitSuggestions.model_json_schema()} 
-        ))
-        
-        suggestions_pool = response.suggestions
+        # Sample from the cached pool so repeated requests still vary
+        suggestions_pool = await get_suggestion_pool(current_habits_summary)
+        if not suggestions_pool:
+            raise ValueError("Groq returned no usable suggestions")
         sample_count = min(3, len(suggestions_pool))
         return random.sample(suggestions_pool, sample_count)
 
     except Exception as e:
         print(f"Groq API Error: {e}")
+        local = local_suggestions(current_habits_summary)
+        if local:
+            return local
         # Provide diverse fallback suggestions when API fails
         fallback_suggestions = [
             SuggestedHabit(name="Mindful Minute", description="Take a 60-second break to breathe.", category="health", frequency="daily"),
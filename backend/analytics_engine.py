@@ -0,0 +1,113 @@
+# backend/analytics_engine.py
+
+from datetime import date
+from typing import Dict, Iterable, Sequence
+
+import numpy as np
+
+FREQUENCIES = ("daily", "weekly", "monthly")
+COMPLETED = "completed"
+
+# 1970-01-01 was a Thursday; shifting by 3 days makes weeks start on Monday.
+_WEEK_SHIFT = 3
+_PERIOD_OFFSET = 1 << 31
+
+
+def day_ordinals(dates: Iterable[date]) -> np.ndarray:
+    """Days since 1970-01-01 as an int64 array."""
+    return np.asarray(list(dates), dtype="datetime64[D]").astype(np.int64)
+
+
+def period_index(days: np.ndarray, frequency: str | np.ndarray) -> np.ndarray:
+    """
+    Maps day ordinals to consecutive period numbers for a frequency. `frequency`
+    may be a single value or an array with one frequency per day.
+    """
+    days = np.asarray(days, dtype=np.int64)
+    weeks = (days + _WEEK_SHIFT) // 7
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    if isinstance(frequency, str):
+        return {"daily": days, "weekly": weeks, "monthly": months}[frequency]
+    frequency = np.asarray(frequency)
+    return np.select([frequency == "weekly", frequency == "monthly"], [weeks, months], default=days)
+
+
+def habit_metrics(
+    habit_ids: Sequence[int],
+    frequencies: Sequence[str],
+    targets: Sequence[int | None],
+    start_dates: Sequence[date],
+    checkin_habit_ids: np.ndarray,
+    checkin_days: np.ndarray,
+    checkin_statuses: Sequence[str],
+    today: date | None = None,
+    window_days: int = 30,
+) -> Dict[int, dict]:
+    """
+    Streak and completion metrics for many habits at once. A period counts as hit
+    when it holds at least `target` (default 1) completed check-ins. Streaks are
+    measured in periods of the habit's own frequency and stay alive through the
+    current, still-open period. Check-ins after `today` are ignored.
+    """
+    habit_ids = np.asarray(habit_ids, dtype=np.int64)
+    n = len(habit_ids)
+    if n == 0:
+        return {}
+    order = np.argsort(habit_ids)
+    frequencies = np.asarray(frequencies)
+    required = np.array([t if t and t > 0 else 1 for t in targets], dtype=np.int64)
+
+    today_day = day_ordinals([today or date.today()])[0]
+    current = period_index(np.full(n, today_day), frequencies)
+    first_day = np.maximum(day_ordinals(start_dates), today_day - window_days + 1)
+    window_start = period_index(first_day, frequencies)
+
+    # Resolve each check-in to the position of its habit and keep completed ones.
+    checkin_habit_ids = np.asarray(checkin_habit_ids, dtype=np.int64)
+    checkin_days = np.asarray(checkin_days, dtype=np.int64)
+    slot = order[np.searchsorted(habit_ids, checkin_habit_ids, sorter=order).clip(max=n - 1)]
+    keep = (
+        (habit_ids[slot] == checkin_habit_ids)
+        & (np.asarray(checkin_statuses) == COMPLETED)
+        & (checkin_days <= today_day)
+    )
+    slot = slot[keep]
+    periods = period_index(checkin_days[keep], frequencies[slot])
+
+    # Count check-ins per (habit, period) and keep the periods that met the target.
+    keys, counts = np.unique((slot << 32) | (periods + _PERIOD_OFFSET), return_counts=True)
+    key_slot = keys >> 32
+    key_period = (keys & 0xFFFFFFFF) - _PERIOD_OFFSET
+    hit = counts >= required[key_slot]
+    hit_slot, hit_period = key_slot[hit], key_period[hit]
+
+    # Runs of consecutive hit periods within each habit.
+    breaks = np.ones(len(hit_slot), dtype=bool)
+    breaks[1:] = (np.diff(hit_slot) != 0) | (np.diff(hit_period) != 1)
+    run_id = np.cumsum(breaks) - 1
+    run_length = np.bincount(run_id)
+    run_slot = hit_slot[breaks]
+    run_last = np.ones(len(hit_slot), dtype=bool)
+    run_last[:-1] = breaks[1:]
+    run_end = hit_period[run_last]
+
+    longest = np.zeros(n, dtype=np.int64)
+    np.maximum.at(longest, run_slot, run_length)
+    current_streak = np.zeros(n, dtype=np.int64)
+    live = run_end >= current[run_slot] - 1
+    current_streak[run_slot[live]] = run_length[live]
+
+    in_window = hit_period >= window_start[hit_slot]
+    window_hits = np.bincount(hit_slot[in_window], minlength=n)
+    window_periods = np.maximum(current - window_start + 1, 1)
+
+    return {
+        int(habit_ids[i]): {
+            "current_streak": int(current_streak[i]),
+            "longest_streak": int(longest[i]),
+            "completion_rate": round(float(window_hits[i] / window_periods[i]), 4),
+            "frequency": str(frequencies[i]),
+        }
+        for i in range(n)
+    }
+
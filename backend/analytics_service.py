@@ -0,0 +1,217 @@
+# backend/analytics_service.py
+
+from datetime import date, timedelta
+from typing import Optional, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import Date
+
+import bitmap_service
+from config import CHECKIN_BITMAP_READS
+import models
+
+class week_start(FunctionElement):
+    """The Monday on or before a DATE expression."""
+    type = Date()
+    inherit_cache = True
+
+
+class month_start(FunctionElement):
+    """The first day of the month of a DATE expression."""
+    type = Date()
+    inherit_cache = True
+
+
+@compiles(week_start)
+def _week_start_default(element, compiler, **kw):
+    return "CAST(date_trunc('week', %s) AS DATE)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(week_start, "sqlite")
+def _week_start_sqlite(element, compiler, **kw):
+    # 'weekday 1' moves forward to the next Monday, so step back six days first.
+    return "date(%s, '-6 days', 'weekday 1')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(month_start)
+def _month_start_default(element, compiler, **kw):
+    return "CAST(date_trunc('month', %s) AS DATE)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(month_start, "sqlite")
+def _month_start_sqlite(element, compiler, **kw):
+    return "date(%s, 'start of month')" % compiler.process(element.clauses, **kw)
+
+
+def bucket_expression(bucket: str):
+    column = models.HabitCheckin.checkin_date
+    if bucket == "week":
+        return week_start(column)
+    if bucket == "month":
+        return month_start(column)
+    return column
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start: date, bucket: str) -> date:
+    if bucket == "week":
+        return start + timedelta(days=7)
+    if bucket == "month":
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_starts(since: date, until: date, bucket: str) -> list[date]:
+    starts, start = [], bucket_start(since, bucket)
+    while start <= until:
+        starts.append(start)
+        start = next_bucket(start, bucket)
+    return starts
+
+
+def _habit_criteria(user_id: int, habit_ids: Optional[Sequence[int]], categories: Optional[Sequence[str]]) -> list:
+    criteria = [models.Habit.user_id == user_id]
+    if habit_ids:
+        criteria.append(models.Habit.id.in_(habit_ids))
+    if categories:
+        criteria.append(models.Habit.category.in_(categories))
+    return criteria
+
+
+def _possible_days(habit_starts: Sequence[date], since: date, until: date, starts: Sequence[date], bucket: str) -> list[int]:
+    """
+    Habit-days per bucket: for every habit, the days of the bucket that fall in
+    [since, until] on or after the habit's start date.
+    """
+    possible = []
+    for start in starts:
+        end = min(next_bucket(start, bucket) - timedelta(days=1), until)
+        possible.append(sum(
+            max((end - max(start, since, habit_start or since)).days + 1, 0)
+            for habit_start in habit_starts
+        ))
+    return possible
+
+
+def _ratio(count: int, possible: int) -> float:
+    return round(min(count / possible, 1.0), 4) if possible else 0.0
+
+
+def checkin_counts(
+    db: Session,
+    user_id: int,
+    since: date,
+    until: date,
+    bucket: str,
+    habit_ids: Optional[Sequence[int]] = None,
+    categories: Optional[Sequence[str]] = None,
+    per_habit: bool = False,
+):
+    """
+    Completed check-in counts grouped by bucket start (and by habit when
+    `per_habit`), counted in the database over the (habit_id, checkin_date)
+    index, or from habit_checkin_bitmaps when CHECKIN_BITMAP_READS is set.
+    """
+    if CHECKIN_BITMAP_READS:
+        windows = [
+            (start, max(start, since), min(next_bucket(start, bucket) - timedelta(days=1), until))
+            for start in bucket_starts(since, until, bucket)
+        ]
+        return bitmap_service.bucket_counts(db, _habit_criteria(user_id, habit_ids, categories), windows, per_habit)
+    start = bucket_expression(bucket).label("start")
+    columns = [start, models.HabitCheckin.habit_id] if per_habit else [start]
+    return db.execute(
+        select(*columns, func.count())
+        .join(models.Habit, models.Habit.id == models.HabitCheckin.habit_id)
+        .where(
+            *_habit_criteria(user_id, habit_ids, categories),
+            models.HabitCheckin.status == bitmap_service.COMPLETED,
+            models.HabitCheckin.checkin_date >= since,
+            models.HabitCheckin.checkin_date <= until,
+        )
+        .group_by(*columns)
+        .order_by(start)
+    ).all()
+
+
+def _matching_habits(db: Session, user_id: int, habit_ids, categories) -> list:
+    return db.execute(
+        select(models.Habit.id, models.Habit.start_date)
+        .where(*_habit_criteria(user_id, habit_ids, categories))
+        .order_by(models.Habit.id)
+    ).all()
+
+
+def get_heatmap(
+    db: Session,
+    user_id: int,
+    since: date,
+    until: date,
+    bucket: str = "day",
+    habit_ids: Optional[Sequence[int]] = None,
+    categories: Optional[Sequence[str]] = None,
+) -> dict:
+    """
+    Sparse heatmap: only buckets with at least one check-in, as parallel arrays
+    of bucket starts, counts and completion ratios (check-ins over habit-days).
+    """
+    habits = _matching_habits(db, user_id, habit_ids, categories)
+    rows = checkin_counts(db, user_id, since, until, bucket, habit_ids, categories)
+    starts = [start for start, _ in rows]
+    counts = [count for _, count in rows]
+    possible = _possible_days([habit.start_date for habit in habits], since, until, starts, bucket)
+    return {
+        "bucket": bucket,
+        "since": since,
+        "until": until,
+        "starts": starts,
+        "counts": counts,
+        "ratios": [_ratio(count, days) for count, days in zip(counts, possible)],
+    }
+
+
+def get_series(
+    db: Session,
+    user_id: int,
+    since: date,
+    until: date,
+    bucket: str = "week",
+    habit_ids: Optional[Sequence[int]] = None,
+    categories: Optional[Sequence[str]] = None,
+) -> dict:
+    """
+    Dense time series over every bucket in the range: per-habit counts (one
+    array per habit, aligned with `starts`), their totals and completion ratios.
+    """
+    habits = _matching_habits(db, user_id, habit_ids, categories)
+    starts = bucket_starts(since, until, bucket)
+    index = {start: i for i, start in enumerate(starts)}
+    rows_of = {habit.id: i for i, habit in enumerate(habits)}
+    counts = [[0] * len(starts) for _ in habits]
+    for start, habit_id, count in checkin_counts(
+        db, user_id, since, until, bucket, habit_ids, categories, per_habit=True
+    ):
+        if habit_id in rows_of:  # Skip habits created after the habit list was read.
+            counts[rows_of[habit_id]][index[start]] = count
+    totals = [sum(column) for column in zip(*counts)] if habits else [0] * len(starts)
+    possible = _possible_days([habit.start_date for habit in habits], since, until, starts, bucket)
+    return {
+        "bucket": bucket,
+        "since": since,
+        "until": until,
+        "starts": starts,
+        "habit_ids": [habit.id for habit in habits],
+        "counts": counts,
+        "totals": totals,
+        "ratios": [_ratio(total, days) for total, days in zip(totals, possible)],
+    }
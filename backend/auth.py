@@ -1,29 +1,41 @@
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from threading import Lock
+from time import monotonic
 from typing import Optional
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from sqlalchemy import event
 
+import cache
 import models
-from config import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY
-from database import get_db
+import password_service
+from config import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    ALGORITHM,
+    DATABASE_REPLICA_URL,
+    PRINCIPAL_CACHE_SIZE,
+    PRINCIPAL_CACHE_TTL_SECONDS,
+    SECRET_KEY,
+)
+from database import AsyncSessionLocal
 from schemas.token import TokenData
 
-# FIX: Switched from 'bcrypt' to 'pbkdf2_sha256'
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_service.verify_sync(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    # Truncate password to prevent the old bcrypt 72-byte limit crash.
-    return pwd_context.hash(password[:72])
+    return password_service.hash_sync(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -37,9 +49,94 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-):
+def create_user_token(user) -> str:
+    # `sub` carries the primary key so requests can be authorized without a lookup
+    # by email; `ver` lets a token_version bump revoke every outstanding token.
+    return create_access_token(data={"sub": str(user.id), "ver": user.token_version})
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as seen by the routers; detached from any session."""
+    id: int
+    username: str
+    email: str
+    token_version: int
+
+
+class PrincipalCache:
+    """Thread-safe LRU of principals keyed by user id, with a per-entry TTL."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, tuple[float, Principal]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, principal = entry
+            if expires < monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def put(self, principal: Principal) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[principal.id] = (monotonic() + self.ttl, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_principal(mapper, connection, target):
+    principal_cache.invalidate(target.id)
+
+
+async def load_principal(user_id: int) -> Optional[Principal]:
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    async with AsyncSessionLocal() as db:
+        user = await db.get(models.User, user_id)
+        if user is None:
+            return None
+        principal = Principal(
+            id=user.id, username=user.username, email=user.email, token_version=user.token_version
+        )
+    principal_cache.put(principal)
+    return principal
+
+
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    Resolves the bearer token to a Principal. Only a principal cache miss reads
+    the database; the session is opened on demand rather than per request. A
+    cached principal is also reloaded when the cache backend holds a newer
+    token_version for the user, published by the worker that revoked it.
+    With a read replica, a write pins the user's reads to the primary for a
+    few seconds, through the cache backend so every worker sees it, and reads
+    tag the request so database.get_async_read_db honours the pin.
+    """
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
@@ -47,13 +144,26 @@ def get_current_user(
     )
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
-    except JWTError:
+        token_data = TokenData(user_id=payload.get("sub"), token_version=payload.get("ver"))
+    except (JWTError, ValidationError):
         raise credentials_exception
-    user = db.query(models.User).filter(models.User.email == token_data.email).first()
-    if user is None:
+    if token_data.user_id is None:
+        raise credentials_exception
+    pin_reads = bool(DATABASE_REPLICA_URL) and request.method in SAFE_METHODS
+    marks = await cache.user_marks(
+        token_data.user_id, ("token_version", "read_primary") if pin_reads else ("token_version",)
+    )
+    cached = principal_cache.get(token_data.user_id)
+    if cached is not None and (marks is None or marks[0] not in (None, cached.token_version)):
+        # Revoked on another worker, or the backend cannot tell: reload it.
+        principal_cache.invalidate(token_data.user_id)
+    principal = await load_principal(token_data.user_id)
+    if principal is None or principal.token_version != token_data.token_version:
         raise credentials_exception
-    return user
\ No newline at end of file
+    request.state.user_id = principal.id
+    if DATABASE_REPLICA_URL:
+        if not pin_reads:
+            await cache.pin_reads_to_primary(principal.id)
+        else:
+            request.state.read_primary = marks is None or marks[1] is not None
+    return principal
@@ -0,0 +1,123 @@
+# backend/benchmarks/bench_ai_cache.py
+"""
+Offline hit rate and latency of the AI suggestion cache against a fake Groq client.
+
+Requests draw habit sets from a skewed popularity distribution (a few common
+sets, a long tail), with shuffled order and casing so normalization matters.
+Each run is compared against calling the upstream for every request, as
+get_habit_suggestions did before the cache.
+
+    python benchmarks/bench_ai_cache.py --requests 2000 --habit-sets 300 --latency 0.3
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CATEGORIES = ["health", "work", "learning", "other"]
+
+
+class FakeGroqClient:
+    """Mimics `Groq().chat.completions.create` with a fixed latency and canned JSON."""
+
+    def __init__(self, latency: float, pool_size: int):
+        self.latency = latency
+        self.pool_size = pool_size
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        seed = random.randrange(1 << 30)
+        content = json.dumps({"suggestions": [
+            {
+                "name": f"Suggestion {seed}-{i}",
+                "description": "A small step that compounds.",
+                "category": CATEGORIES[i % len(CATEGORIES)],
+                "frequency": "daily",
+            }
+            for i in range(self.pool_size)
+        ]})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def habit_sets(count: int, rng: random.Random) -> list:
+    names = [f"habit {i}" for i in range(60)]
+    return [
+        [{"name": name, "category": rng.choice(CATEGORIES), "frequency": "daily"} for name in rng.sample(names, rng.randint(0, 6))]
+        for _ in range(count)
+    ]
+
+
+def request_stream(sets: list, requests: int, rng: random.Random) -> list:
+    weights = [1 / (rank + 1) for rank in range(len(sets))]
+    stream = []
+    for summary in rng.choices(sets, weights=weights, k=requests):
+        summary = [dict(h, name=rng.choice([h["name"], h["name"].upper(), f" {h['name']} "])) for h in summary]
+        rng.shuffle(summary)
+        stream.append(summary)
+    return stream
+
+
+async def run(call, stream: list, concurrency: int) -> tuple[list, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(summary):
+        async with semaphore:
+            started = time.perf_counter()
+            await call(summary)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(summary) for summary in stream))
+    return sorted(latencies), time.perf_counter() - started
+
+
+def percentile(values: list, q: float) -> float:
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--habit-sets", type=int, default=200, help="Distinct habit sets in the population.")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake upstream latency in seconds.")
+    args = parser.parse_args()
+
+    import ai_service
+
+    rng = random.Random(13)
+    stream = request_stream(habit_sets(args.habit_sets, rng), args.requests, rng)
+    fake = FakeGroqClient(args.latency, ai_service.AI_SUGGESTION_POOL_SIZE)
+    ai_service.set_client(fake)
+
+    print(f"{args.requests} requests over {args.habit_sets} habit sets, concurrency {args.concurrency}, upstream {args.latency * 1000:.0f} ms")
+    print(f"{'mode':<10}{'upstream':>10}{'hit rate':>10}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>10}")
+    for mode, call in (("uncached", ai_service._request_suggestions), ("cached", ai_service.get_habit_suggestions)):
+        ai_service.set_client(fake)
+        fake.calls = 0
+        for stat in ai_service.suggestion_cache.stats:
+            ai_service.suggestion_cache.stats[stat] = 0
+        latencies, elapsed = asyncio.run(run(call, stream, args.concurrency))
+        stats = ai_service.suggestion_cache.stats
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = (args.requests - fake.calls) / args.requests if mode == "cached" else 0.0
+        print(
+            f"{mode:<10}{fake.calls:>10}{hit_rate:>10.1%}{percentile(latencies, 0.5):>10.2f}"
+            f"{percentile(latencies, 0.95):>10.2f}{args.requests / elapsed:>10.0f}"
+        )
+        if mode == "cached":
+            print(f"cache lookups {lookups}, hits {stats['hits']}, coalesced {stats['coalesced']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# backend/benchmarks/bench_ai_resilience.py
+"""
+Drives the AI suggestion path through a healthy, a slow and a recovered upstream.
+
+Starts groq_stub_server in-process and points the real Groq client at it, with
+the suggestion cache disabled so every request reaches the upstream guards.
+The slow phase injects latency above the call deadline: the first calls time
+out, the breaker opens and the remaining requests fall back immediately. The
+recovered phase waits out the half-open interval and lets a probe close it.
+
+    python benchmarks/bench_ai_resilience.py --timeout 0.5 --slow-latency 3
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def run_phase(ai_service, requests: int, concurrency: int, offset: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, fallbacks = [], 0
+
+    async def one(i):
+        nonlocal fallbacks
+        summary = [{"name": f"habit {offset + i}", "category": "health", "frequency": "daily"}]
+        async with semaphore:
+            started = time.perf_counter()
+            suggestions = await ai_service.get_habit_suggestions(summary)
+            latencies.append(time.perf_counter() - started)
+        if not suggestions[0].name.startswith("Stub habit"):
+            fallbacks += 1
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return sorted(latencies), fallbacks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40, help="Requests per phase.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=0.5, help="Per-call deadline in seconds.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Healthy upstream latency in seconds.")
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    parser.add_argument("--failures", type=int, default=3, help="Consecutive failures that open the breaker.")
+    parser.add_argument("--reset", type=float, default=1.0, help="Seconds before the breaker half-opens.")
+    args = parser.parse_args()
+
+    from groq_stub_server import start_stub_server
+
+    stub = start_stub_server(latency=args.latency)
+    os.environ.update({
+        "GROQ_API_KEY": "stub",
+        "GROQ_BASE_URL": stub.url,
+        "AI_CACHE_MAX_ENTRIES": "0",
+        "AI_TIMEOUT_SECONDS": str(args.timeout),
+        "AI_BREAKER_FAILURE_THRESHOLD": str(args.failures),
+        "AI_BREAKER_RESET_SECONDS": str(args.reset),
+    })
+    import ai_service
+
+    phases = [
+        ("healthy", args.latency),
+        ("slow", args.slow_latency),
+        ("half-open", args.latency),
+        ("recovered", args.latency),
+    ]
+    print(f"deadline {args.timeout * 1000:.0f} ms, breaker opens after {args.failures} failures, half-opens after {args.reset}s")
+    print(f"{'phase':<11}{'upstream':>9}{'fallback':>9}{'timeouts':>9}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}  breaker")
+    for index, (phase, latency) in enumerate(phases):
+        if phase == "half-open":
+            time.sleep(args.reset)
+        stub.latency = latency
+        stub.requests = 0
+        timeouts_before = ai_service.metrics()["upstream"]["timeouts"]
+        latencies, fallbacks = asyncio.run(run_phase(ai_service, args.requests, args.concurrency, index * args.requests))
+        upstream = ai_service.metrics()["upstream"]
+        print(
+            f"{phase:<11}{stub.requests:>9}{fallbacks:>9}{upstream['timeouts'] - timeouts_before:>9}"
+            f"{latencies[len(latencies) // 2] * 1000:>9.1f}{latencies[int(0.95 * (len(latencies) - 1))] * 1000:>9.1f}"
+            f"{latencies[-1] * 1000:>9.1f}  {upstream['breaker_state']}"
+        )
+    print(ai_service.metrics()["upstream"])
+    ai_service.shutdown()
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+# backend/benchmarks/bench_api.py
+"""
+Benchmarks every router of the API in-process and records the results as JSON.
+
+Seeds a temporary SQLite file with scripts/seed_data.py, or uses --database-url
+pointing at an already seeded database. Each endpoint is driven through an
+in-process ASGI client as random seeded users, at every --concurrency level.
+For each run it reports p50/p95/p99 latency, throughput, errors and SQL
+statements per request. With --compare, the run is checked against an earlier
+--output file, and the command exits with status 1 when p95 latency or
+queries per request regress past --threshold.
+
+    python benchmarks/bench_api.py --users 200 --requests 200 --concurrency 1 10 50 --output before.json
+    python benchmarks/bench_api.py --users 200 --requests 200 --concurrency 1 10 50 --compare before.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", help="An already seeded database; defaults to seeding a temporary SQLite file.")
+    parser.add_argument("--users", type=int, default=200, help="Users to seed (temporary database only).")
+    parser.add_argument("--habits", type=int, default=5, help="Habits per seeded user.")
+    parser.add_argument("--years", type=int, default=2, help="Years of seeded check-ins.")
+    parser.add_argument("--password", default="password", help="Password of the seeded users.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency level.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per endpoint before its runs.")
+    parser.add_argument("--endpoints", nargs="*", help="Only run endpoints whose name contains one of these.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="Compare against the results in this JSON file.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative p95 increase treated as a regression.")
+    return parser.parse_args()
+
+
+class Context:
+    """Seeded users and their habits, plus what write endpoints created along the way."""
+
+    def __init__(self, users: dict, password: str):
+        self.users = users  # user_id -> (headers, [habit_id, ...])
+        self.user_ids = [user_id for user_id, (_, habits) in users.items() if habits]
+        self.password = password
+        self.rng = random.Random(3)
+        self.counter = itertools.count()
+        self.created_habits = []
+        self.created_checkins = []
+
+    def user(self):
+        user_id = self.rng.choice(self.user_ids)
+        headers, habits = self.users[user_id]
+        return user_id, headers, habits
+
+    def past_day(self, days: int = 730) -> str:
+        return (date.today() - timedelta(days=self.rng.randrange(days))).isoformat()
+
+
+def endpoint_scenarios():
+    """(name, coroutine making one request); each delete consumes what the create before it made."""
+
+    async def login(client, ctx):
+        user_id, _, _ = ctx.user()
+        return await client.request(
+            "POST", "/auth/login", data={"username": f"user{user_id}@example.com", "password": ctx.password}
+        )
+
+    async def register(client, ctx):
+        name = f"bench{next(ctx.counter)}-{time.time_ns()}"
+        return await client.request(
+            "POST", "/auth/register",
+            json={"username": name, "email": f"{name}@example.com", "password": ctx.password},
+        )
+
+    async def me(client, ctx):
+        return await client.request("GET", "/auth/me", headers=ctx.user()[1])
+
+    async def list_habits(client, ctx):
+        return await client.request("GET", "/habits/", headers=ctx.user()[1])
+
+    async def create_habit(client, ctx):
+        _, headers, _ = ctx.user()
+        response = await client.request("POST", "/habits/", headers=headers, json={
+            "name": f"Bench habit {next(ctx.counter)}", "frequency": "daily", "category": "other",
+            "start_date": date.today().isoformat(),
+        })
+        if response.status_code == 200:
+            ctx.created_habits.append((headers, response.json()))
+        return response
+
+    async def update_habit(client, ctx):
+        _, headers, habits = ctx.user()
+        habit_id = ctx.rng.choice(habits)
+        return await client.request("PUT", f"/habits/{habit_id}", headers=headers, json={
+            "name": f"Renamed {next(ctx.counter)}", "frequency": "daily", "category": "health",
+            "start_date": "2024-01-01",
+        })
+
+    async def delete_habit(client, ctx):
+        if not ctx.created_habits:
+            return None
+        headers, habit = ctx.created_habits.pop()
+        return await client.request("DELETE", f"/habits/{habit['id']}", headers=headers)
+
+    async def all_checkins(client, ctx):
+        return await client.request("GET", "/habits/checkins/all", headers=ctx.user()[1], params={"limit": 1000})
+
+    async def habit_checkins(client, ctx):
+        _, headers, habits = ctx.user()
+        return await client.request("GET", f"/habits/{ctx.rng.choice(habits)}/checkins/", headers=headers)
+
+    async def create_checkin(client, ctx):
+        _, headers, habits = ctx.user()
+        habit_id = ctx.rng.choice(habits)
+        response = await client.request(
+            "POST", f"/habits/{habit_id}/checkins/", headers=headers, json={"checkin_date": ctx.past_day()}
+        )
+        if response.status_code == 200:
+            ctx.created_checkins.append((headers, habit_id, response.json()["id"]))
+        return response
+
+    async def delete_checkin(client, ctx):
+        if not ctx.created_checkins:
+            return None
+        headers, habit_id, checkin_id = ctx.created_checkins.pop()
+        return await client.request("DELETE", f"/habits/{habit_id}/checkins/{checkin_id}", headers=headers)
+
+    async def batch_checkins(client, ctx):
+        _, headers, habits = ctx.user()
+        items = [{"habit_id": ctx.rng.choice(habits), "checkin_date": ctx.past_day()} for _ in range(20)]
+        return await client.request("POST", "/habits/checkins/batch", headers=headers, json={"checkins": items})
+
+    async def stats(client, ctx):
+        return await client.request("GET", "/analytics/stats", headers=ctx.user()[1])
+
+    async def heatmap(client, ctx):
+        return await client.request("GET", "/analytics/heatmap", headers=ctx.user()[1])
+
+    async def series(client, ctx):
+        return await client.request("GET", "/analytics/series", headers=ctx.user()[1], params={"bucket": "week"})
+
+    async def dashboard(client, ctx):
+        return await client.request("GET", "/dashboard/", headers=ctx.user()[1], params={"days": 366})
+
+    async def suggest(client, ctx):
+        return await client.request("GET", "/ai/suggest_habits", headers=ctx.user()[1])
+
+    async def report_pdf(client, ctx):
+        return await client.request("GET", "/report/pdf", headers=ctx.user()[1])
+
+    async def report_job(client, ctx):
+        return await client.request("POST", "/report/pdf/jobs", headers=ctx.user()[1])
+
+    return [
+        ("POST /auth/login", login),
+        ("POST /auth/register", register),
+        ("GET /auth/me", me),
+        ("GET /habits/", list_habits),
+        ("POST /habits/", create_habit),
+        ("PUT /habits/{id}", update_habit),
+        ("DELETE /habits/{id}", delete_habit),
+        ("GET /habits/checkins/all", all_checkins),
+        ("GET /habits/{id}/checkins/", habit_checkins),
+        ("POST /habits/{id}/checkins/", create_checkin),
+        ("DELETE /habits/{id}/checkins/{id}", delete_checkin),
+        ("POST /habits/checkins/batch", batch_checkins),
+        ("GET /analytics/stats", stats),
+        ("GET /analytics/heatmap", heatmap),
+        ("GET /analytics/series", series),
+        ("GET /dashboard/", dashboard),
+        ("GET /ai/suggest_habits", suggest),
+        ("GET /report/pdf", report_pdf),
+        ("POST /report/pdf/jobs", report_job),
+    ]
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
+
+
+async def drive(client, ctx: Context, scenario, requests: int, concurrency: int, counter: dict) -> dict:
+    latencies, statuses = [], {}
+    remaining = itertools.count()
+
+    async def worker():
+        while next(remaining) < requests:
+            started = time.perf_counter()
+            response = await scenario(client, ctx)
+            if response is None:
+                continue  # Nothing left to delete.
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    queries_before = counter["queries"]
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    done = len(latencies)
+    return {
+        "requests": done,
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "rps": round(done / elapsed, 1) if done else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2) if done else None,
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2) if done else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2) if done else None,
+        "queries_per_request": round((counter["queries"] - queries_before) / done, 2) if done else None,
+    }
+
+
+def load_users(password: str) -> dict:
+    from sqlalchemy import select
+
+    import auth
+    import models
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        users = {user.id: (user, []) for user in db.scalars(select(models.User).where(models.User.email.like("user%@example.com")))}
+        for habit_id, user_id in db.execute(select(models.Habit.id, models.Habit.user_id).order_by(models.Habit.id)):
+            if user_id in users:
+                users[user_id][1].append(habit_id)
+    finally:
+        db.close()
+    return {
+        user_id: ({"Authorization": f"Bearer {auth.create_user_token(user)}"}, habits)
+        for user_id, (user, habits) in users.items()
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list, baseline_path: str, threshold: float) -> int:
+    with open(baseline_path) as f:
+        baseline = {(r["endpoint"], r["concurrency"]): r for r in json.load(f)["results"]}
+    print(f"\nAgainst {baseline_path} (regression: p95 or queries per request up {threshold:.0%})")
+    print(f"{'endpoint':<36}{'conc':>5}{'p95 ms':>18}{'rps':>18}{'queries':>14}")
+    regressions = 0
+    for result in results:
+        before = baseline.get((result["endpoint"], result["concurrency"]))
+        if before is None or result["p95_ms"] is None or before["p95_ms"] is None:
+            continue
+        slower = result["p95_ms"] > before["p95_ms"] * (1 + threshold)
+        chattier = result["queries_per_request"] > before["queries_per_request"] * (1 + threshold)
+        regressions += slower or chattier
+        print(
+            f"{result['endpoint']:<36}{result['concurrency']:>5}"
+            f"{before['p95_ms']:>8.1f} ->{result['p95_ms']:>7.1f}"
+            f"{before['rps']:>8.0f} ->{result['rps']:>7.0f}"
+            f"{before['queries_per_request']:>5.1f} ->{result['queries_per_request']:>5.1f}"
+            f"{'  REGRESSION' if slower or chattier else ''}"
+        )
+    print(f"{regressions} regressions")
+    return regressions
+
+
+def main() -> None:
+    args = parse_args()
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    import httpx
+    from sqlalchemy import event
+
+    import main as app_main
+    from database import Base, SessionLocal, async_engine, engine
+
+    if not args.database_url:
+        from scripts.seed_data import seed_database
+
+        Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        started = time.perf_counter()
+        counts = seed_database(db, args.users, args.habits, args.years, args.password)
+        db.close()
+        print(f"Seeded {counts['checkins']} check-ins for {counts['users']} users in {time.perf_counter() - started:.1f}s")
+
+    counter = {"queries": 0}
+
+    def count(*_):
+        counter["queries"] += 1
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", count)
+
+    ctx = Context(load_users(args.password), args.password)
+    scenarios = [
+        (name, scenario) for name, scenario in endpoint_scenarios()
+        if not args.endpoints or any(part in name for part in args.endpoints)
+    ]
+
+    async def run_all():
+        results = []
+        print(f"{'endpoint':<36}{'conc':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'errors':>8}")
+        transport = httpx.ASGITransport(app=app_main.app)
+        async with app_main.app.router.lifespan_context(app_main.app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                # Warm the principal cache so every run sees the same auth cost.
+                for headers, _ in ctx.users.values():
+                    await client.get("/auth/me", headers=headers)
+                for name, scenario in scenarios:
+                    await drive(client, ctx, scenario, args.warmup, 1, counter)
+                    for concurrency in args.concurrency:
+                        result = {"endpoint": name, "concurrency": concurrency,
+                                  **await drive(client, ctx, scenario, args.requests, concurrency, counter)}
+                        results.append(result)
+                        if result["requests"]:
+                            print(
+                                f"{name:<36}{concurrency:>5}{result['rps']:>9.0f}{result['p50_ms']:>9.1f}"
+                                f"{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+                                f"{result['queries_per_request']:>9.1f}{result['errors']:>8}"
+                            )
+        return results
+
+    results = asyncio.run(run_all())
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "database": engine.dialect.name,
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+    regressions = compare(results, args.compare, args.threshold) if args.compare else 0
+    if not args.database_url:
+        engine.dispose()
+        os.remove(path)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
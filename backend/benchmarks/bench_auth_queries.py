@@ -0,0 +1,75 @@
+# backend/benchmarks/bench_auth_queries.py
+"""
+Database statements per authenticated request, with the principal cache cold
+(every request misses, as before the cache existed) and warm.
+
+    python benchmarks/bench_auth_queries.py --requests 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENDPOINTS = ["/auth/me", "/habits/", "/analytics/stats", "/habits/checkins/all"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and mode.")
+    args = parser.parse_args()
+
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    import auth
+    import main as app_main
+    import models
+    from database import Base, SessionLocal, async_engine, engine
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = models.User(username="bench", email="bench@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    db.add(models.Habit(name="Read", frequency="daily", category="learning", start_date=date.today(), user_id=user.id))
+    db.commit()
+    headers = {"Authorization": f"Bearer {auth.create_user_token(user)}"}
+    db.close()
+
+    statements = 0
+
+    def count(*_):
+        nonlocal statements
+        statements += 1
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", count)
+
+    print(f"{'endpoint':<24}{'cold q/req':>12}{'warm q/req':>12}{'cold ms':>10}{'warm ms':>10}")
+    with TestClient(app_main.app) as client:
+        for endpoint in ENDPOINTS:
+            row = [endpoint]
+            timings = []
+            for cold in (True, False):
+                client.get(endpoint, headers=headers)  # Warm the cache for the warm pass.
+                statements = 0
+                started = time.perf_counter()
+                for _ in range(args.requests):
+                    if cold:
+                        auth.principal_cache.clear()
+                    client.get(endpoint, headers=headers)
+                timings.append((time.perf_counter() - started) * 1000 / args.requests)
+                row.append(statements / args.requests)
+            print(f"{row[0]:<24}{row[1]:>12.2f}{row[2]:>12.2f}{timings[0]:>10.2f}{timings[1]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# backend/benchmarks/bench_cache.py
+"""
+Response cache backends: operation latency and cross-worker invalidation.
+
+For each backend (memory, a temporary SQLite file and Redis, by default the
+stand-in from redis_stub_server.py) it times --ops sets, hits, misses and
+invalidations of --size-byte bodies. Then it opens the backend a second time,
+as a second worker would, records a write there and checks that the first
+instance no longer serves the entry, and whether it sees the read-replica pin
+that write set. Exits with status 1 when a stale entry is served.
+
+    python benchmarks/bench_cache.py --ops 5000 --size 20000
+    python benchmarks/bench_cache.py --backends redis --redis-url redis://127.0.0.1:6379/0
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+USERS = 50
+
+
+async def time_ops(backend, ops: int, value: bytes) -> dict:
+    """Mean microseconds per set, hit, miss and invalidate."""
+    timings = {}
+    started = time.perf_counter()
+    for i in range(ops):
+        await backend.set(i % USERS, 1, f"key-{i}", value)
+    timings["set"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i in range(ops):
+        await backend.get(i % USERS, 1, f"key-{ops - 1 - i % USERS}")
+    timings["hit"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i in range(ops):
+        await backend.get(i % USERS, 1, f"missing-{i}")
+    timings["miss"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i in range(ops):
+        await backend.invalidate(i % USERS)
+    timings["invalidate"] = time.perf_counter() - started
+    return {name: seconds / ops * 1e6 for name, seconds in timings.items()}
+
+
+async def stale_after_write(worker, other) -> bool:
+    """Whether `worker` still serves an entry after `other` handled a write to its user."""
+    user_id, version, key = 7, 3, 'W/"3-digest"'
+    await worker.set(user_id, version, key, b"before")
+    if await worker.get(user_id, version, key) != b"before":
+        raise RuntimeError("entry was not stored")
+    # The write: data_version goes to 4 and the writing worker evicts the user.
+    await other.invalidate(user_id)
+    return (
+        await worker.get(user_id, version + 1, key) is not None
+        or await worker.get(user_id, version, key) is not None
+    )
+
+
+async def pin_shared(worker, other) -> bool:
+    """Whether `worker` sees the read-your-writes pin set by `other` (memory: never)."""
+    await other.set_mark(7, "read_primary", 1, 5)
+    return await worker.get_marks(7, ("read_primary",)) == [1]
+
+
+async def run(name: str, url: str, ops: int, value: bytes) -> tuple[dict, bool, bool]:
+    import cache
+
+    backend, other = cache.create_backend(name, url), cache.create_backend(name, url)
+    try:
+        await backend.set(0, 1, "warm-up", value)  # Connects, creates the table.
+        timings = await time_ops(backend, ops, value)
+        stale = await stale_after_write(backend, other)
+        shared = await pin_shared(backend, other)
+    finally:
+        await backend.close()
+        await other.close()
+    return timings, stale, shared
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["memory", "sqlite", "redis"])
+    parser.add_argument("--ops", type=int, default=5000)
+    parser.add_argument("--size", type=int, default=20000, help="Bytes per cached body.")
+    parser.add_argument("--redis-url", help="Defaults to a local redis_stub_server.")
+    args = parser.parse_args()
+
+    from redis_stub_server import start_stub_server
+
+    stub = None
+    redis_url = args.redis_url
+    if "redis" in args.backends and not redis_url:
+        stub = start_stub_server()
+        redis_url = stub.url
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    urls = {"memory": "", "sqlite": path, "redis": redis_url}
+    value = os.urandom(args.size)
+
+    print(f"{'backend':<10}{'set us':>10}{'hit us':>10}{'miss us':>10}{'invalidate us':>15}  after a write elsewhere  pin")
+    failures = []
+    for name in args.backends:
+        timings, stale, shared = asyncio.run(run(name, urls[name], args.ops, value))
+        print(f"{name:<10}{timings['set']:>10.1f}{timings['hit']:>10.1f}{timings['miss']:>10.1f}"
+              f"{timings['invalidate']:>15.1f}  {'STALE' if stale else 'evicted':<23}  {'shared' if shared else 'per worker'}")
+        if stale:
+            failures.append(name)
+
+    if stub:
+        stub.shutdown()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    for name in failures:
+        print(f"STALE {name}: served an entry after another worker's write")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
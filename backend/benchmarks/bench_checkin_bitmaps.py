@@ -0,0 +1,154 @@
+# backend/benchmarks/bench_checkin_bitmaps.py
+"""
+Storage and latency of habit_checkin_bitmaps against scanning check-in rows.
+
+Seeds a temporary SQLite file with --users users of --habits habits each and
+--years years of check-ins at --density, then rebuilds the bitmaps. Reports the
+on-disk size of both tables with their indexes, then times per-habit streak and
+completion math (gaps-and-islands SQL over the rows vs. bit operations on the
+bitmaps) and a per-user weekly /analytics/series with CHECKIN_BITMAP_READS off
+and on.
+
+    python benchmarks/bench_checkin_bitmaps.py --users 200 --habits 10 --years 3
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(engine, models, users: int, habits: int, years: int, density: float) -> None:
+    from sqlalchemy import insert
+
+    rng = random.Random(7)
+    days = 365 * years
+    start = date.today() - timedelta(days=days - 1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"id": u, "username": f"user{u}", "email": f"user{u}@example.com", "hashed_password": "x"}
+            for u in range(1, users + 1)
+        ])
+        conn.execute(insert(models.Habit), [
+            {"id": h, "name": f"Habit {h}", "frequency": "daily", "category": ("health", "work")[h % 2],
+             "start_date": start, "user_id": (h - 1) // habits + 1}
+            for h in range(1, users * habits + 1)
+        ])
+        batch = []
+        for habit_id in range(1, users * habits + 1):
+            batch.extend(
+                {"habit_id": habit_id, "checkin_date": start + timedelta(days=day), "status": "completed"}
+                for day in range(days) if rng.random() < density
+            )
+            if len(batch) >= 20000:
+                conn.execute(insert(models.HabitCheckin), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(models.HabitCheckin), batch)
+
+
+def table_bytes(conn, table: str) -> int:
+    return conn.exec_driver_sql(
+        "SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+        "(SELECT name FROM sqlite_master WHERE tbl_name = ?)",
+        (table,),
+    ).scalar()
+
+
+def timed(fn, samples) -> tuple[float, float]:
+    latencies = []
+    for sample in samples:
+        started = time.perf_counter()
+        fn(sample)
+        latencies.append(time.perf_counter() - started)
+    return statistics.median(latencies) * 1e6, statistics.mean(latencies) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--habits", type=int, default=10, help="Habits per user.")
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--density", type=float, default=0.7, help="Share of days checked in.")
+    parser.add_argument("--samples", type=int, default=300, help="Habits (and users) timed per path.")
+    args = parser.parse_args()
+
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    from sqlalchemy import func, select
+
+    import analytics_service
+    import bitmap_service
+    import models
+    import stats_service
+    from database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    seed(engine, models, args.users, args.habits, args.years, args.density)
+    seeded = time.perf_counter() - started
+    db = SessionLocal()
+    started = time.perf_counter()
+    bitmap_service.rebuild_bitmaps(db)
+    rebuilt = time.perf_counter() - started
+    rows = db.scalar(select(func.count()).select_from(models.HabitCheckin))
+    print(f"{rows} check-ins for {args.users * args.habits} habits (seed {seeded:.1f}s, bitmap rebuild {rebuilt:.1f}s)")
+
+    with engine.connect() as conn:
+        row_bytes, bitmap_bytes = table_bytes(conn, "habit_checkins"), table_bytes(conn, "habit_checkin_bitmaps")
+    print(f"{'storage':<26}{'bytes':>14}{'bytes/check-in':>16}")
+    print(f"{'habit_checkins':<26}{row_bytes:>14}{row_bytes / rows:>16.1f}")
+    print(f"{'habit_checkin_bitmaps':<26}{bitmap_bytes:>14}{bitmap_bytes / rows:>16.2f}  ({row_bytes / bitmap_bytes:.0f}x smaller)")
+
+    rng = random.Random(11)
+    habit_ids = rng.sample(range(1, args.users * args.habits + 1), min(args.samples, args.users * args.habits))
+    user_ids = rng.sample(range(1, args.users + 1), min(args.samples, args.users))
+    today = date.today()
+    year_ago = today - timedelta(days=364)
+
+    def rows_streaks(habit_id):
+        db.rollback()
+        stats_service.compute_habit_stats(db, models.HabitCheckin.habit_id == habit_id)
+        db.scalar(
+            select(func.count()).where(
+                models.HabitCheckin.habit_id == habit_id, models.HabitCheckin.checkin_date >= year_ago
+            )
+        )
+
+    def bitmap_streaks(habit_id):
+        db.rollback()
+        history = bitmap_service.load_histories(db, models.Habit.id == habit_id)[habit_id]
+        history.run_ending(today)
+        history.longest_run()
+        history.count(year_ago, today)
+
+    def series(user_id):
+        db.rollback()
+        analytics_service.get_series(db, user_id, year_ago, today, "week")
+
+    print(f"{'per request':<26}{'p50 us':>14}{'mean us':>16}")
+    for name, fn, samples in (
+        ("streaks+rate rows (SQL)", rows_streaks, habit_ids),
+        ("streaks+rate bitmaps", bitmap_streaks, habit_ids),
+    ):
+        p50, mean = timed(fn, samples)
+        print(f"{name:<26}{p50:>14.0f}{mean:>16.0f}")
+    for flag in (False, True):
+        analytics_service.CHECKIN_BITMAP_READS = flag
+        p50, mean = timed(series, user_ids)
+        print(f"{'weekly series ' + ('bitmaps' if flag else 'rows'):<26}{p50:>14.0f}{mean:>16.0f}")
+
+    db.close()
+    engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# backend/benchmarks/bench_metrics.py
+"""
+Per-request cost of the /metrics instrumentation.
+
+Times a do-nothing ASGI app called directly with and without MetricsMiddleware,
+and `SELECT 1` on an in-memory SQLite engine with and without the statement
+hooks, so the difference is the instrumentation alone (best of --repeats
+runs). Also times rendering /metrics for --routes route templates.
+
+    python benchmarks/bench_metrics.py --requests 50000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class Route:
+    path = "/habits/{habit_id}"
+
+
+async def plain_app(scope, receive, send):
+    scope["route"] = Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def scope() -> dict:
+    return {"type": "http", "method": "GET", "path": "/habits/1", "headers": []}
+
+
+async def time_calls(app, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(scope(), receive, send)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def time_statements(engine, statements: int, request_db=None) -> float:
+    import metrics
+
+    token = metrics._request_db.set(request_db) if request_db is not None else None
+    with engine.connect() as conn:
+        started = time.perf_counter()
+        for _ in range(statements):
+            conn.exec_driver_sql("SELECT 1")
+        elapsed = time.perf_counter() - started
+    if token is not None:
+        metrics._request_db.reset(token)
+    return elapsed / statements * 1e6
+
+
+def best(fn, repeats: int) -> float:
+    return min(fn() for _ in range(repeats))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--routes", type=int, default=40, help="Route templates rendered by /metrics.")
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+
+    import metrics
+
+    baseline = best(lambda: asyncio.run(time_calls(plain_app, args.requests)), args.repeats)
+    instrumented = best(lambda: asyncio.run(time_calls(metrics.MetricsMiddleware(plain_app), args.requests)), args.repeats)
+    print(f"{'middleware':<22}{'plain us':>10}{'metered us':>12}{'overhead us':>13}")
+    print(f"{'request':<22}{baseline:>10.2f}{instrumented:>12.2f}{instrumented - baseline:>13.2f}")
+
+    engine = create_engine("sqlite://")
+    plain = best(lambda: time_statements(engine, args.requests), args.repeats)
+    metrics.instrument_engines()
+    hooked_idle = best(lambda: time_statements(engine, args.requests), args.repeats)
+    hooked = best(lambda: time_statements(engine, args.requests, [0, 0.0]), args.repeats)
+    print(f"{'SELECT 1':<22}{plain:>10.2f}{hooked:>12.2f}{hooked - plain:>13.2f}")
+    print(f"{'SELECT 1, no request':<22}{plain:>10.2f}{hooked_idle:>12.2f}{hooked_idle - plain:>13.2f}")
+
+    for metric in metrics.REGISTRY:
+        metric.series.clear()
+    for i in range(args.routes):
+        for method in ("GET", "POST"):
+            route = f"/route{i}/{{id}}"
+            metrics.REQUESTS.inc(1, method, route, "200")
+            metrics.REQUEST_SECONDS.observe(0.01, method, route)
+            metrics.DB_STATEMENTS.inc(3, method, route)
+            metrics.DB_SECONDS.inc(0.002, method, route)
+            metrics.DB_STATEMENTS_PER_REQUEST.observe(3, method, route)
+            metrics.DB_SECONDS_PER_REQUEST.observe(0.002, method, route)
+    started = time.perf_counter()
+    text = asyncio.run(metrics.render())
+    print(f"/metrics for {args.routes} routes: {len(text)} bytes in {(time.perf_counter() - started) * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
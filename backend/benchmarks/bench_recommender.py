@@ -0,0 +1,114 @@
+# backend/benchmarks/bench_recommender.py
+"""
+Build time, refresh time and lookup latency of the recommender on synthetic users.
+
+Generates habit sets for --users users from a skewed vocabulary with topical
+clusters, builds and saves the model, memory-maps it back and times lookups.
+An incremental refresh of --changed users is checked against a full rebuild.
+
+    python benchmarks/bench_recommender.py --users 100000 --lookups 20000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CATEGORIES = ["health", "work", "learning", "other"]
+
+
+def synthetic_rows(users: int, vocabulary: int, rng: random.Random) -> dict:
+    """{user_id: [(name, category, frequency), ...]} with clustered, Zipf-ish habit choices."""
+    clusters = [list(range(c, vocabulary, 8)) for c in range(8)]
+    weights = [[1 / (rank + 1) for rank in range(len(cluster))] for cluster in clusters]
+    habits = {}
+    for user_id in range(1, users + 1):
+        cluster = rng.randrange(len(clusters))
+        picks = set(rng.choices(clusters[cluster], weights[cluster], k=rng.randint(1, 8)))
+        picks |= {rng.randrange(vocabulary) for _ in range(rng.randint(0, 2))}
+        habits[user_id] = [(f"Habit {h}", CATEGORIES[h % 4], "daily") for h in sorted(picks)]
+    return habits
+
+
+def as_rows(habits: dict, user_ids=None):
+    stamp = None
+    for user_id in sorted(habits if user_ids is None else user_ids):
+        for name, category, frequency in habits.get(user_id, []):
+            yield user_id, name, category, frequency, stamp
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--vocabulary", type=int, default=2000, help="Distinct habit names.")
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--changed", type=int, default=1000, help="Users changed before the incremental refresh.")
+    args = parser.parse_args()
+
+    from recommender import Recommender
+
+    rng = random.Random(5)
+    habits = synthetic_rows(args.users, args.vocabulary, rng)
+
+    started = time.perf_counter()
+    model = Recommender.build(as_rows(habits))
+    build_seconds = time.perf_counter() - started
+    path = tempfile.mkdtemp(prefix="recommender-")
+    model.save(path)
+    size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+    served = Recommender.load(path)
+    print(
+        f"{args.users} users, {len(model.items)} habits, {len(model.pair_keys)} pairs: "
+        f"built in {build_seconds:.2f}s, {size / 1e6:.1f} MB on disk"
+    )
+
+    queries = [[name for name, _, _ in habits[rng.randint(1, args.users)]] for _ in range(args.lookups)]
+    latencies = []
+    for owned in queries:
+        started = time.perf_counter()
+        served.recommend(owned, 3)
+        latencies.append(time.perf_counter() - started)
+    latencies = np.array(latencies) * 1e6
+    print(
+        f"lookup: p50 {np.percentile(latencies, 50):.1f} us, p95 {np.percentile(latencies, 95):.1f} us, "
+        f"p99 {np.percentile(latencies, 99):.1f} us over {args.lookups} lookups"
+    )
+
+    changed = rng.sample(range(1, args.users + 1), args.changed)
+    for user_id in changed:
+        if rng.random() < 0.1:
+            del habits[user_id]
+        else:
+            habits[user_id] = habits[user_id][1:] + [(f"Habit {rng.randrange(args.vocabulary + 50)}", "other", "weekly")]
+    started = time.perf_counter()
+    model.refresh(as_rows(habits, changed), changed)
+    refresh_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    rebuilt = Recommender.build(as_rows(habits))
+    rebuild_seconds = time.perf_counter() - started
+
+    def pairs(m):
+        return {
+            (m.items[k >> 32]["key"], m.items[k & 0xFFFFFFFF]["key"]): int(c)
+            for k, c in zip(m.pair_keys.tolist(), m.pair_counts.tolist())
+        }
+
+    def normalized(counts):
+        return {tuple(sorted(pair)): c for pair, c in counts.items()}
+
+    consistent = normalized(pairs(model)) == normalized(pairs(rebuilt))
+    print(
+        f"refresh of {args.changed} users: {refresh_seconds:.2f}s vs full rebuild {rebuild_seconds:.2f}s "
+        f"(matches rebuild: {consistent})"
+    )
+    if not consistent:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# backend/benchmarks/bench_serialization.py
+"""
+Throughput of the check-in list serialization: ORM + Pydantic versus rows + orjson.
+
+The "orm" path is how the list endpoints used to answer: ORM entities validated
+against the route's response_model and rendered by JSONResponse. The "rows"
+path is the current one: plain column tuples encoded by serialization.rows_response.
+Both fetch the same rows from a temporary SQLite file, and their decoded bodies
+are compared before timing.
+
+    python benchmarks/bench_serialization.py --rows 1000 10000 100000 --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(engine, models, rows: int, habits: int) -> None:
+    from sqlalchemy import insert
+
+    days = -(-rows // habits)
+    start = date.today() - timedelta(days=days)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"id": 1, "username": "bench", "email": "bench@example.com", "hashed_password": "x"}])
+        conn.execute(insert(models.Habit), [
+            {"id": h, "name": f"Habit {h}", "frequency": "daily", "category": "other", "start_date": start, "user_id": 1}
+            for h in range(1, habits + 1)
+        ])
+        batch = []
+        for day in range(days):
+            for h in range(1, habits + 1):
+                note = f"Note for day {day}" if (day + h) % 3 == 0 else None
+                batch.append({"habit_id": h, "checkin_date": start + timedelta(days=day), "status": "completed", "notes": note})
+            if len(batch) >= 10000:
+                conn.execute(insert(models.HabitCheckin), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(models.HabitCheckin), batch)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--habits", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5, help="Best of this many runs per size.")
+    args = parser.parse_args()
+
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    from fastapi import Response
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+
+    import models
+    from database import AsyncSessionLocal, Base, async_engine, engine
+    from routers.habits import router
+    from serialization import CHECKIN_COLUMNS, rows_response
+    from sqlalchemy import select
+
+    Base.metadata.create_all(bind=engine)
+    seed(engine, models, max(args.rows), args.habits)
+    field = next(route.response_field for route in router.routes if route.path == "/habits/checkins/all")
+    order = (models.HabitCheckin.checkin_date, models.HabitCheckin.id)
+
+    async def orm_body(db, limit: int) -> bytes:
+        stmt = select(models.HabitCheckin).join(models.Habit).where(models.Habit.user_id == 1)
+        rows = (await db.scalars(stmt.order_by(*order).limit(limit))).all()
+        return JSONResponse(await serialize_response(field=field, response_content=rows)).body
+
+    async def rows_body(db, limit: int) -> bytes:
+        stmt = select(*CHECKIN_COLUMNS).join(models.Habit).where(models.Habit.user_id == 1)
+        rows = (await db.execute(stmt.order_by(*order).limit(limit))).all()
+        return rows_response(rows, Response()).body
+
+    async def best(render, limit: int):
+        timings = []
+        for _ in range(args.repeat):
+            async with AsyncSessionLocal() as db:
+                started = time.perf_counter()
+                body = await render(db, limit)
+                timings.append(time.perf_counter() - started)
+        return min(timings), body
+
+    async def run():
+        print(f"{'rows':>8}{'path':>6}{'bytes':>12}{'ms':>10}{'MB/s':>9}{'rows/s':>12}{'speedup':>9}")
+        for limit in args.rows:
+            orm_seconds, orm = await best(orm_body, limit)
+            rows_seconds, fast = await best(rows_body, limit)
+            assert json.loads(orm) == json.loads(fast), "bodies differ"
+            for name, seconds, body in (("orm", orm_seconds, orm), ("rows", rows_seconds, fast)):
+                print(
+                    f"{limit:>8}{name:>6}{len(body):>12}{seconds * 1000:>10.1f}"
+                    f"{len(body) / seconds / 1e6:>9.1f}{limit / seconds:>12.0f}"
+                    f"{orm_seconds / seconds:>8.1f}x"
+                )
+        await async_engine.dispose()
+
+    try:
+        asyncio.run(run())
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
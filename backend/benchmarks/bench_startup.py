@@ -0,0 +1,171 @@
+# backend/benchmarks/bench_startup.py
+"""
+Worker cold start: import time of `main` and time to the first answered request.
+
+Runs `python -X importtime -c "import main"` and lists the heaviest modules
+main pulls in. Then starts --runs fresh interpreters that import main, run the
+app's startup hooks and answer GET /health, timing each phase. Unless
+--database-url is given, the database is a temporary SQLite file created and
+then stamped with `alembic stamp head`, so startup sees an Alembic-managed
+database as in production. Exits with status 1 when the median import or
+first-request time exceeds its budget, or when groq, reportlab or numpy get
+imported before the first request.
+
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --max-import-ms 1500 --max-first-request-ms 2500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should only load on first use, never while a worker starts.
+LAZY_MODULES = ("groq", "reportlab", "numpy")
+
+# Default budgets, also held by tests/test_startup.py.
+MAX_IMPORT_MS = 2500
+MAX_FIRST_REQUEST_MS = 4000
+
+FIRST_REQUEST = """
+import asyncio, json, sys, time
+import httpx
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def first_request():
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.get("/health")
+        return ready, time.perf_counter(), response.status_code
+
+ready, answered, status = asyncio.run(first_request())
+print(json.dumps({
+    "import_ms": (imported - started) * 1e3,
+    "startup_ms": (ready - imported) * 1e3,
+    "request_ms": (answered - ready) * 1e3,
+    "status": status,
+    "lazy_loaded": sorted(name for name in %r if name in sys.modules),
+}))
+"""
+
+
+def import_times(env: dict) -> list[tuple[int, int, str]]:
+    """(self us, cumulative us, indented module name) per line of -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND, env=env, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if own.strip().isdigit():
+            rows.append((int(own), int(cumulative), name.rstrip()))
+    return rows
+
+
+def stamped_database(env: dict) -> str:
+    """Points env at a temporary SQLite file stamped at the Alembic head; returns its path."""
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    env["DATABASE_URL"] = f"sqlite:///{path}"
+    for command in (
+        ["-c", "import models; from database import Base, engine; Base.metadata.create_all(engine)"],
+        ["-m", "alembic", "stamp", "head"],
+    ):
+        subprocess.run([sys.executable, *command], cwd=BACKEND, env=env, capture_output=True, check=True)
+    return path
+
+
+def first_requests(env: dict, runs: int) -> list[dict]:
+    """Phase timings of `runs` fresh interpreters answering their first request."""
+    results = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", FIRST_REQUEST % (LAZY_MODULES,)],
+            cwd=BACKEND, env=env, capture_output=True, text=True, check=True,
+        )
+        run = json.loads(result.stdout.strip().splitlines()[-1])
+        run["process_ms"] = (time.perf_counter() - started) * 1e3
+        run["first_request_ms"] = run["import_ms"] + run["startup_ms"] + run["request_ms"]
+        results.append(run)
+    return results
+
+
+def medians_of(runs: list[dict]) -> dict:
+    return {key: statistics.median(run[key] for run in runs)
+            for key in ("import_ms", "startup_ms", "request_ms", "first_request_ms", "process_ms")}
+
+
+def budget_failures(runs: list[dict], max_import_ms: float, max_first_request_ms: float) -> list[str]:
+    """What the runs got wrong: a failed /health, a deferred module loaded, a median over budget."""
+    medians = medians_of(runs)
+    failures = []
+    if any(run["status"] != 200 for run in runs):
+        failures.append(f"GET /health answered {sorted({run['status'] for run in runs})}")
+    lazy_loaded = sorted({name for run in runs for name in run["lazy_loaded"]})
+    if lazy_loaded:
+        failures.append(f"loaded at startup: {', '.join(lazy_loaded)}")
+    if medians["import_ms"] > max_import_ms:
+        failures.append(f"import {medians['import_ms']:.0f} ms > {max_import_ms:.0f} ms")
+    if medians["first_request_ms"] > max_first_request_ms:
+        failures.append(f"first request {medians['first_request_ms']:.0f} ms > {max_first_request_ms:.0f} ms")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12, help="Heaviest direct imports of main to list.")
+    parser.add_argument("--database-url", help="Defaults to a temporary SQLite file stamped at the Alembic head.")
+    parser.add_argument("--max-import-ms", type=float, default=MAX_IMPORT_MS)
+    parser.add_argument("--max-first-request-ms", type=float, default=MAX_FIRST_REQUEST_MS,
+                        help="Budget from the start of `import main` to the /health response.")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    path = None
+    if args.database_url:
+        env["DATABASE_URL"] = args.database_url
+    else:
+        path = stamped_database(env)
+
+    rows = import_times(env)
+    total = next(cumulative for _, cumulative, name in rows if name.strip() == "main")
+    # -X importtime indents each nested import by two more spaces.
+    direct = sorted(
+        ((cumulative, name.strip()) for _, cumulative, name in rows if len(name) - len(name.lstrip()) == 3),
+        reverse=True,
+    )
+    print(f"import main: {total / 1e3:.0f} ms (-X importtime)")
+    for cumulative, name in direct[:args.top]:
+        print(f"  {name:<34}{cumulative / 1e3:>8.1f} ms")
+
+    runs = first_requests(env, args.runs)
+    if path:
+        os.remove(path)
+
+    print(f"{'median of ' + str(args.runs) + ' runs':<22}{'import':>9}{'startup':>9}{'request':>9}{'to first':>10}{'process':>9}")
+    medians = medians_of(runs)
+    print(f"{'ms':<22}{medians['import_ms']:>9.0f}{medians['startup_ms']:>9.0f}{medians['request_ms']:>9.0f}"
+          f"{medians['first_request_ms']:>10.0f}{medians['process_ms']:>9.0f}")
+
+    failures = budget_failures(runs, args.max_import_ms, args.max_first_request_ms)
+    for failure in failures:
+        print(f"OVER BUDGET {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# backend/benchmarks/bench_streak_engine.py
+"""
+Micro-benchmark: a per-habit Python streak walk, as the analytics router once
+used, against analytics_engine on 10k-day check-in histories.
+
+    python benchmarks/bench_streak_engine.py --days 10000 --habits 50
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics_engine
+
+
+def calculate_streak(checkins: list) -> int:
+    """Current daily streak of check-in objects, sorting and walking them one by one."""
+    if not checkins:
+        return 0
+
+    # Sort check-ins by date in descending order
+    sorted_checkins = sorted(checkins, key=lambda c: c.checkin_date, reverse=True)
+
+    today = date.today()
+    streak = 0
+
+    # Check if the most recent check-in is today or yesterday
+    if sorted_checkins[0].checkin_date == today or sorted_checkins[0].checkin_date == today - timedelta(days=1):
+        streak = 1
+        # Traverse backwards from the most recent check-in
+        for i in range(len(sorted_checkins) - 1):
+            # Check if the next check-in is the day before the current one
+            if sorted_checkins[i].checkin_date - timedelta(days=1) == sorted_checkins[i+1].checkin_date:
+                streak += 1
+            else:
+                break # Streak is broken
+
+    return streak
+
+
+def build_history(days: int, gap_rate: float, rng: random.Random) -> list[date]:
+    today = date.today()
+    # Keep the most recent stretch unbroken so both paths walk a long streak.
+    return [
+        today - timedelta(days=i)
+        for i in range(days)
+        if i < days // 2 or rng.random() > gap_rate
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=10_000)
+    parser.add_argument("--habits", type=int, default=50)
+    parser.add_argument("--gap-rate", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    histories = [build_history(args.days, args.gap_rate, rng) for _ in range(args.habits)]
+    checkin_objects = [[SimpleNamespace(checkin_date=d) for d in h] for h in histories]
+
+    habit_ids = list(range(1, args.habits + 1))
+    start = date.today() - timedelta(days=args.days)
+    checkin_habit_ids = np.concatenate([np.full(len(h), i) for i, h in zip(habit_ids, histories)])
+    checkin_days = np.concatenate([analytics_engine.day_ordinals(h) for h in histories])
+    statuses = np.full(len(checkin_days), analytics_engine.COMPLETED)
+
+    def run_python():
+        return [calculate_streak(c) for c in checkin_objects]
+
+    def run_engine():
+        return analytics_engine.habit_metrics(
+            habit_ids,
+            ["daily"] * args.habits,
+            [1] * args.habits,
+            [start] * args.habits,
+            checkin_habit_ids,
+            checkin_days,
+            statuses,
+        )
+
+    engine_result = run_engine()
+    assert run_python() == [engine_result[i]["current_streak"] for i in habit_ids]
+
+    total = len(checkin_days)
+    python_s = min(timeit.repeat(run_python, number=1, repeat=args.repeat))
+    engine_s = min(timeit.repeat(run_engine, number=1, repeat=args.repeat))
+    print(f"{args.habits} habits x {args.days} days ({total} check-ins)")
+    print(f"calculate_streak  {python_s * 1000:9.2f} ms   (current streak only)")
+    print(f"analytics_engine  {engine_s * 1000:9.2f} ms   (current, longest, completion rate)")
+    print(f"speed-up          {python_s / engine_s:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# backend/benchmarks/groq_stub_server.py
+"""
+Local stand-in for the Groq chat completions API with injectable latency and errors.
+
+Point the app at it with GROQ_BASE_URL (and any GROQ_API_KEY):
+
+    python benchmarks/groq_stub_server.py --port 8099 --latency 2.5 --error-rate 0.2
+    GROQ_BASE_URL=http://127.0.0.1:8099 GROQ_API_KEY=stub uvicorn main:app
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CATEGORIES = ["health", "work", "learning", "other"]
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.0, error_rate: float = 0.0, pool_size: int = 12):
+        super().__init__(address, StubHandler)
+        # Mutable while running, so a benchmark can move between scenarios.
+        self.latency = latency
+        self.error_rate = error_rate
+        self.pool_size = pool_size
+        self.requests = 0
+
+    def handle_error(self, request, client_address):
+        pass  # Clients that hit their deadline hang up before the delayed reply.
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server: StubServer
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests += 1
+        time.sleep(self.server.latency)
+        if random.random() < self.server.error_rate:
+            self._send(500, {"error": {"message": "Injected stub failure", "type": "server_error"}})
+            return
+        suggestions = [
+            {
+                "name": f"Stub habit {random.randrange(1 << 20)}",
+                "description": "Served by the local Groq stub.",
+                "category": CATEGORIES[i % len(CATEGORIES)],
+                "frequency": "daily",
+            }
+            for i in range(self.server.pool_size)
+        ]
+        self._send(200, {
+            "id": "stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "stub",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": json.dumps({"suggestions": suggestions})},
+            }],
+        })
+
+    def _send(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(latency: float = 0.0, error_rate: float = 0.0, port: int = 0) -> StubServer:
+    """Serves the stub on a background thread; call .shutdown() when done."""
+    server = StubServer(("127.0.0.1", port), latency=latency, error_rate=error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before each reply.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500.")
+    args = parser.parse_args()
+
+    server = StubServer(("127.0.0.1", args.port), latency=args.latency, error_rate=args.error_rate)
+    print(f"Groq stub listening on {server.url} (latency {args.latency}s, error rate {args.error_rate})")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
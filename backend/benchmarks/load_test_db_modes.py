@@ -0,0 +1,120 @@
+# backend/benchmarks/load_test_db_modes.py
+"""
+Load test: the same habit-list query served by a sync handler on the threadpool
+(Session via get_db) and by an async handler (AsyncSession via get_async_db),
+driven in-process at increasing concurrency.
+
+    python benchmarks/load_test_db_modes.py --requests 2000 --concurrency 10 50 200
+    python benchmarks/load_test_db_modes.py --database-url postgresql://user:pw@localhost/habit_hero_bench
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", help="Defaults to a temporary SQLite file.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--habits", type=int, default=20)
+    return parser.parse_args()
+
+
+def build_app():
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+
+    import models
+    from database import get_async_db, get_db
+
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_habits(db: Session = Depends(get_db)):
+        return len(db.scalars(select(models.Habit).where(models.Habit.user_id == 1)).all())
+
+    @app.get("/async")
+    async def async_habits(db: AsyncSession = Depends(get_async_db)):
+        return len((await db.scalars(select(models.Habit).where(models.Habit.user_id == 1))).all())
+
+    return app
+
+
+async def drive(app, path: str, requests: int, concurrency: int):
+    import httpx
+
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    import models
+    from database import Base, SessionLocal, async_engine, engine
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    if db.get(models.User, 1) is None:
+        db.add(models.User(id=1, username="bench", email="bench@example.com", hashed_password="x"))
+        db.add_all(
+            models.Habit(name=f"Habit {i}", frequency="daily", category="other", start_date=date.today(), user_id=1)
+            for i in range(args.habits)
+        )
+        db.commit()
+    db.close()
+
+    app = build_app()
+    print(f"{engine.url.get_backend_name()}: {args.requests} requests per run")
+    print(f"{'mode':<8}{'concurrency':>12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+
+    async def run_all():
+        for concurrency in args.concurrency:
+            for mode in ("sync", "async"):
+                result = await drive(app, f"/{mode}", args.requests, concurrency)
+                print(f"{mode:<8}{concurrency:>12}{result['rps']:>10.0f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}")
+        await async_engine.dispose()
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
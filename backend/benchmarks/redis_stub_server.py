@@ -0,0 +1,168 @@
+# backend/benchmarks/redis_stub_server.py
+"""
+Local stand-in for a Redis server, speaking enough of RESP2 for the response cache.
+
+Supports PING, AUTH, SELECT, GET, MGET, SET (with EX or PX), DEL, EXISTS, EXPIRE, TTL,
+HGET, HSET, HDEL, HLEN, DBSIZE and FLUSHDB, with injectable latency. Point
+the app at it with CACHE_BACKEND=redis:
+
+    python benchmarks/redis_stub_server.py --port 6399 --latency 0.001
+    CACHE_BACKEND=redis CACHE_URL=redis://127.0.0.1:6399/0 uvicorn main:app --workers 4
+"""
+import argparse
+import socket
+import socketserver
+import threading
+import time
+
+
+class StubServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, latency: float = 0.0):
+        super().__init__(address, StubHandler)
+        self.latency = latency
+        self.commands = 0
+        # key -> (value, expires at or None); values are bytes or dicts of bytes.
+        self.data = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def live(self, key: bytes):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+
+class StubHandler(socketserver.StreamRequestHandler):
+    server: StubServer
+
+    def setup(self):
+        super().setup()
+        # Like Redis itself; otherwise pipelined replies wait for delayed ACKs.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        while True:
+            try:
+                command = self._read_command()
+            except (ConnectionError, ValueError):
+                return
+            if command is None:
+                return
+            self.server.commands += 1
+            time.sleep(self.server.latency)
+            with self.server.lock:
+                reply = self._execute(command[0].upper().decode(), command[1:])
+            self.wfile.write(reply)
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()  # Inline command, as typed into telnet.
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _execute(self, name: str, args: list) -> bytes:
+        server = self.server
+        if name == "PING":
+            return b"+PONG\r\n"
+        if name in ("AUTH", "SELECT"):
+            return b"+OK\r\n"
+        if name == "FLUSHDB":
+            server.data.clear()
+            return b"+OK\r\n"
+        if name == "DBSIZE":
+            return integer(sum(server.live(key) is not None for key in list(server.data)))
+        if name == "GET":
+            entry = server.live(args[0])
+            return bulk(entry[0] if entry else None)
+        if name == "MGET":
+            entries = [server.live(key) for key in args]
+            return b"*%d\r\n" % len(entries) + b"".join(bulk(entry[0] if entry else None) for entry in entries)
+        if name == "SET":
+            expires = None
+            if len(args) >= 4 and args[2].upper() == b"EX":
+                expires = time.monotonic() + int(args[3])
+            elif len(args) >= 4 and args[2].upper() == b"PX":
+                expires = time.monotonic() + int(args[3]) / 1000
+            server.data[args[0]] = (args[1], expires)
+            return b"+OK\r\n"
+        if name == "DEL":
+            return integer(sum(server.data.pop(key, None) is not None for key in args))
+        if name == "EXISTS":
+            return integer(sum(server.live(key) is not None for key in args))
+        if name == "EXPIRE":
+            entry = server.live(args[0])
+            if entry is None:
+                return integer(0)
+            server.data[args[0]] = (entry[0], time.monotonic() + int(args[1]))
+            return integer(1)
+        if name == "TTL":
+            entry = server.live(args[0])
+            if entry is None:
+                return integer(-2)
+            return integer(-1 if entry[1] is None else int(entry[1] - time.monotonic()))
+        if name in ("HGET", "HSET", "HDEL", "HLEN"):
+            entry = server.live(args[0])
+            fields, expires = entry if entry else ({}, None)
+            if not isinstance(fields, dict):
+                return b"-WRONGTYPE Operation against a key holding the wrong kind of value\r\n"
+            if name == "HGET":
+                return bulk(fields.get(args[1]))
+            if name == "HLEN":
+                return integer(len(fields))
+            if name == "HDEL":
+                removed = sum(fields.pop(field, None) is not None for field in args[1:])
+            else:
+                pairs = dict(zip(args[1::2], args[2::2]))
+                removed = sum(field not in fields for field in pairs)
+                fields.update(pairs)
+            if fields:
+                server.data[args[0]] = (fields, expires)
+            else:
+                server.data.pop(args[0], None)
+            return integer(removed)
+        return f"-ERR unknown command '{name}'\r\n".encode()
+
+
+def bulk(value) -> bytes:
+    return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def integer(value: int) -> bytes:
+    return b":%d\r\n" % value
+
+
+def start_stub_server(latency: float = 0.0, port: int = 0) -> StubServer:
+    """Serves the stub on a background thread; call .shutdown() when done."""
+    server = StubServer(("127.0.0.1", port), latency=latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=6399)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before each reply.")
+    args = parser.parse_args()
+
+    server = StubServer(("127.0.0.1", args.port), latency=args.latency)
+    print(f"Redis stub listening on {server.url} (latency {args.latency}s)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
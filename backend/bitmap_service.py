@@ -0,0 +1,286 @@
+# backend/bitmap_service.py
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Iterable, Iterator, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from database import dialect_insert
+import models
+
+COMPLETED = "completed"
+
+YEAR_BITS = 366
+YEAR_BYTES = (YEAR_BITS + 7) // 8
+
+
+def day_bit(day: date) -> int:
+    return day.timetuple().tm_yday - 1
+
+
+def to_bytes(bits: int) -> bytes:
+    return bits.to_bytes(YEAR_BYTES, "little")
+
+
+def from_bytes(raw: bytes) -> int:
+    return int.from_bytes(raw, "little")
+
+
+def pack_days(checkins: Iterable[tuple[int, date]]) -> dict[tuple[int, int], int]:
+    """{(habit_id, year): bits} for (habit_id, day) pairs."""
+    packed = defaultdict(int)
+    for habit_id, day in checkins:
+        packed[habit_id, day.year] |= 1 << day_bit(day)
+    return dict(packed)
+
+
+def _bitmap_rows(db: Session, habit_ids: Sequence[int], lock: bool = False):
+    query = db.query(models.HabitCheckinBitmap).filter(models.HabitCheckinBitmap.habit_id.in_(habit_ids))
+    if lock:
+        query = query.with_for_update()
+    return {(bitmap.habit_id, bitmap.year): bitmap for bitmap in query}
+
+
+def _insert_missing(db: Session, packed: dict[tuple[int, int], int]) -> set[tuple[int, int]]:
+    """
+    Inserts bitmaps for keys that had no row, skipping any a concurrent writer
+    inserted first (waiting for it to commit or roll back). Returns the keys
+    inserted here.
+    """
+    table = models.HabitCheckinBitmap.__table__
+    stmt = (
+        dialect_insert(db)(table)
+        .values([{"habit_id": habit_id, "year": year, "bits": to_bytes(bits)} for (habit_id, year), bits in packed.items()])
+        .on_conflict_do_nothing(index_elements=["habit_id", "year"])
+        .returning(table.c.habit_id, table.c.year)
+    )
+    return {(habit_id, year) for habit_id, year in db.execute(stmt)}
+
+
+def set_days(db: Session, checkins: Iterable[tuple[int, date]]) -> None:
+    """
+    Sets the bits of newly recorded completed (habit_id, day) check-ins. Call
+    after the rows have been flushed and before commit, ahead of the stats_service
+    update. Missing years are inserted; a year another transaction inserted in
+    the meantime is locked and merged into like the rest.
+
+    The merge happens here rather than in `ON CONFLICT DO UPDATE SET bits = bits
+    | excluded.bits`: neither bytea nor BLOB has a bitwise OR.
+    """
+    packed = pack_days(checkins)
+    if not packed:
+        return
+    existing = _bitmap_rows(db, sorted({habit_id for habit_id, _ in packed}), lock=True)
+    missing = {key: bits for key, bits in packed.items() if key not in existing}
+    if missing:
+        raced = missing.keys() - _insert_missing(db, missing)
+        if raced:
+            existing.update(_bitmap_rows(db, sorted({habit_id for habit_id, _ in raced}), lock=True))
+    for key, bits in packed.items():
+        if key not in missing or key in existing:
+            bitmap = existing[key]
+            bitmap.bits = to_bytes(from_bytes(bitmap.bits) | bits)
+    db.flush()  # Visible to stats_service, which reads the bitmaps next.
+
+
+def set_day(db: Session, habit_id: int, day: date, status: str = COMPLETED) -> None:
+    if status == COMPLETED:
+        set_days(db, [(habit_id, day)])
+
+
+def clear_day(db: Session, habit_id: int, day: date, status: str = COMPLETED) -> None:
+    """Clears the bit of a deleted completed check-in; a year left empty loses its row."""
+    if status != COMPLETED:
+        return
+    bitmap = (
+        db.query(models.HabitCheckinBitmap)
+        .filter(models.HabitCheckinBitmap.habit_id == habit_id, models.HabitCheckinBitmap.year == day.year)
+        .with_for_update()
+        .first()
+    )
+    if bitmap is None:
+        return
+    bits = from_bytes(bitmap.bits) & ~(1 << day_bit(day))
+    if bits:
+        bitmap.bits = to_bytes(bits)
+    else:
+        db.delete(bitmap)
+    db.flush()
+
+
+def _expected(db: Session, habit_ids: Sequence[int]) -> dict[tuple[int, int], int]:
+    return pack_days(
+        db.execute(
+            select(models.HabitCheckin.habit_id, models.HabitCheckin.checkin_date)
+            .where(models.HabitCheckin.habit_id.in_(habit_ids), models.HabitCheckin.status == COMPLETED)
+        )
+    )
+
+
+def refresh_bitmaps(db: Session, habit_ids: Sequence[int]) -> None:
+    """Re-derives the bitmaps of the given habits from their check-in rows; the caller commits."""
+    expected = _expected(db, habit_ids)
+    existing = _bitmap_rows(db, habit_ids, lock=True)
+    missing = {key: bits for key, bits in expected.items() if key not in existing}
+    if missing and missing.keys() - _insert_missing(db, missing):
+        existing = _bitmap_rows(db, habit_ids, lock=True)  # A check-in write got there first.
+    for key, bits in expected.items():
+        bitmap = existing.pop(key, None)
+        if bitmap is not None and from_bytes(bitmap.bits) != bits:
+            bitmap.bits = to_bytes(bits)
+    for bitmap in existing.values():
+        db.delete(bitmap)
+
+
+def _habit_id_chunks(db: Session, chunk_size: int) -> Iterator[list[int]]:
+    last_id = 0
+    while True:
+        habit_ids = list(
+            db.scalars(
+                select(models.Habit.id).where(models.Habit.id > last_id).order_by(models.Habit.id).limit(chunk_size)
+            )
+        )
+        if not habit_ids:
+            return
+        yield habit_ids
+        last_id = habit_ids[-1]
+
+
+def rebuild_bitmaps(db: Session, chunk_size: int = 500) -> int:
+    """
+    Rebuilds the bitmaps of every habit, a chunk of habits per transaction.
+    Returns the number of habits processed.
+    """
+    processed = 0
+    for habit_ids in _habit_id_chunks(db, chunk_size):
+        refresh_bitmaps(db, habit_ids)
+        db.commit()
+        processed += len(habit_ids)
+    return processed
+
+
+def _days_of(year: int, bits: int) -> list[date]:
+    first = date(year, 1, 1)
+    return [first + timedelta(days=bit) for bit in range(bits.bit_length()) if bits >> bit & 1]
+
+
+def find_mismatches(db: Session, chunk_size: int = 500) -> Iterator[dict]:
+    """
+    Compares every habit's bitmaps with its check-in rows. Yields one entry per
+    (habit, year) that differs, with the days missing from and extra in the bitmap.
+    """
+    for habit_ids in _habit_id_chunks(db, chunk_size):
+        expected = _expected(db, habit_ids)
+        stored = {key: from_bytes(bitmap.bits) for key, bitmap in _bitmap_rows(db, habit_ids).items()}
+        for key in sorted(expected.keys() | stored.keys()):
+            want, have = expected.get(key, 0), stored.get(key, 0)
+            if want != have:
+                habit_id, year = key
+                yield {
+                    "habit_id": habit_id,
+                    "year": year,
+                    "missing": _days_of(year, want & ~have),
+                    "extra": _days_of(year, have & ~want),
+                }
+        db.rollback()  # Release the read snapshot between chunks.
+
+
+@dataclass(frozen=True)
+class History:
+    """A habit's check-in days as one integer: bit i is `origin` + i days."""
+    origin: date
+    bits: int
+
+    def _offset(self, day: date) -> int:
+        return (day - self.origin).days
+
+    def has(self, day: date) -> bool:
+        offset = self._offset(day)
+        return offset >= 0 and bool(self.bits >> offset & 1)
+
+    def count(self, since: date, until: date) -> int:
+        """Check-in days in [since, until]."""
+        low, high = max(self._offset(since), 0), self._offset(until)
+        if high < low:
+            return 0
+        return (self.bits >> low & ((1 << (high - low + 1)) - 1)).bit_count()
+
+    def last_day(self) -> date | None:
+        return self.origin + timedelta(days=self.bits.bit_length() - 1) if self.bits else None
+
+    def run_starting(self, day: date) -> int:
+        """Length of the run of consecutive check-in days starting on `day`."""
+        offset = self._offset(day)
+        if offset < 0:
+            return 0
+        bits = self.bits >> offset
+        return ((bits ^ (bits + 1)) >> 1).bit_length()
+
+    def run_ending(self, day: date) -> int:
+        """Length of the run of consecutive check-in days ending on `day`."""
+        offset = self._offset(day)
+        if offset < 0 or not self.bits >> offset & 1:
+            return 0
+        gaps = ~self.bits & ((1 << (offset + 1)) - 1)
+        return offset + 1 if not gaps else offset - gaps.bit_length() + 1
+
+    def longest_run(self) -> int:
+        # Each step shortens every run by one day.
+        bits, length = self.bits, 0
+        while bits:
+            bits &= bits >> 1
+            length += 1
+        return length
+
+
+def load_histories(db: Session, *criteria, since_year: int | None = None, until_year: int | None = None) -> dict[int, History]:
+    """
+    Histories of the habits matching `criteria` (on Habit), optionally limited to
+    a range of years. Habits without check-ins in those years are absent.
+    """
+    stmt = (
+        select(models.HabitCheckinBitmap.habit_id, models.HabitCheckinBitmap.year, models.HabitCheckinBitmap.bits)
+        .join(models.Habit, models.Habit.id == models.HabitCheckinBitmap.habit_id)
+        .where(*criteria)
+    )
+    if since_year is not None:
+        stmt = stmt.where(models.HabitCheckinBitmap.year >= since_year)
+    if until_year is not None:
+        stmt = stmt.where(models.HabitCheckinBitmap.year <= until_year)
+    years = defaultdict(list)
+    for habit_id, year, raw in db.execute(stmt):
+        years[habit_id].append((year, from_bytes(raw)))
+    histories = {}
+    for habit_id, rows in years.items():
+        origin = date(since_year or min(year for year, _ in rows), 1, 1)
+        bits = 0
+        for year, year_bits in rows:
+            bits |= year_bits << (date(year, 1, 1) - origin).days
+        histories[habit_id] = History(origin=origin, bits=bits)
+    return histories
+
+
+def bucket_counts(db: Session, criteria: Sequence, windows: Sequence[tuple[date, date, date]], per_habit: bool) -> list[tuple]:
+    """
+    Counts per (bucket start, first day, last day) window from the bitmaps, in the
+    shape of analytics_service.checkin_counts: (start, count) rows, or
+    (start, habit_id, count) rows when `per_habit`. Empty buckets are omitted.
+    """
+    if not windows:
+        return []
+    histories = load_histories(
+        db, *criteria, since_year=windows[0][1].year, until_year=windows[-1][2].year
+    )
+    rows = []
+    for start, first, last in windows:
+        counts = [(habit_id, history.count(first, last)) for habit_id, history in sorted(histories.items())]
+        if per_habit:
+            rows.extend((start, habit_id, count) for habit_id, count in counts if count)
+        else:
+            total = sum(count for _, count in counts)
+            if total:
+                rows.append((start, total))
+    return rows
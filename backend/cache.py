@@ -0,0 +1,486 @@
+# backend/cache.py
+
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from fastapi import Response
+
+from conditional import Validators
+from config import (
+    CACHE_BACKEND,
+    CACHE_MAX_ENTRIES,
+    CACHE_TIMEOUT_SECONDS,
+    CACHE_TTL_SECONDS,
+    CACHE_URL,
+    PRINCIPAL_CACHE_TTL_SECONDS,
+    REPLICA_READ_YOUR_WRITES_SECONDS,
+)
+from metrics import RESPONSE_CACHE_REQUESTS
+
+
+class RedisError(Exception):
+    """An error reply from the Redis server."""
+
+
+class CacheBackend:
+    """
+    Byte strings stored per user under keys that include the user's data_version.
+    Writes to a user's habits or check-ins call `invalidate`, which drops every
+    key of that user. This base class stores nothing (CACHE_BACKEND=none).
+
+    Backends also hold marks: small integers per user and name that expire,
+    such as the read-your-writes pin and the users' token_version. They are shared the way the entries are;
+    this class and MemoryCache keep them in the worker that set them.
+    """
+    name = "none"
+
+    def __init__(self):
+        self._marks: Dict[Tuple[int, str], Tuple[float, int]] = {}
+
+    async def get_marks(self, user_id: int, names: Tuple[str, ...]) -> List[Optional[int]]:
+        now = time.monotonic()
+        values = []
+        for name in names:
+            expires, value = self._marks.get((user_id, name), (0.0, None))
+            if expires <= now:
+                self._marks.pop((user_id, name), None)
+                value = None
+            values.append(value)
+        return values
+
+    async def set_mark(self, user_id: int, name: str, value: int, ttl: float) -> None:
+        self._marks[(user_id, name)] = (time.monotonic() + ttl, value)
+
+    async def get(self, user_id: int, version: int, key: str) -> Optional[bytes]:
+        return None
+
+    async def set(self, user_id: int, version: int, key: str, value: bytes) -> None:
+        pass
+
+    async def invalidate(self, user_id: int) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """
+    LRU with a per-entry TTL, private to this worker. A write served by another
+    worker never reaches it, so it also remembers the newest data_version seen
+    per user and drops that user's entries as soon as a newer one shows up.
+    """
+    name = "memory"
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[float, bytes]]" = OrderedDict()
+        self._keys: Dict[int, Set[str]] = {}
+        self._versions: Dict[int, int] = {}
+        self._lock = Lock()
+
+    def _current(self, user_id: int, version: int) -> bool:
+        """Records `version` for the user; False when it is older than one already seen."""
+        seen = self._versions.get(user_id)
+        if seen is not None and version < seen:
+            return False  # A lagging read replica.
+        if seen is not None and version > seen:
+            self._drop_user(user_id)
+        self._versions[user_id] = version
+        return True
+
+    def _drop_user(self, user_id: int) -> None:
+        for key in self._keys.pop(user_id, ()):
+            del self._entries[(user_id, key)]
+        self._versions.pop(user_id, None)
+
+    def _drop(self, user_id: int, key: str) -> None:
+        del self._entries[(user_id, key)]
+        keys = self._keys[user_id]
+        keys.discard(key)
+        if not keys:
+            del self._keys[user_id]
+
+    async def get(self, user_id: int, version: int, key: str) -> Optional[bytes]:
+        with self._lock:
+            if not self._current(user_id, version):
+                return None
+            entry = self._entries.get((user_id, key))
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                self._drop(user_id, key)
+                return None
+            self._entries.move_to_end((user_id, key))
+            return value
+
+    async def set(self, user_id: int, version: int, key: str, value: bytes) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if not self._current(user_id, version):
+                return
+            self._entries[(user_id, key)] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end((user_id, key))
+            self._keys.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                oldest_user, oldest_key = next(iter(self._entries))
+                self._drop(oldest_user, oldest_key)
+
+    async def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._drop_user(user_id)
+
+
+class SQLiteCache(CacheBackend):
+    """
+    A table in a SQLite file that every worker of one host opens (WAL mode, so
+    readers never wait for a writer). Invalidation is a DELETE, seen by all of
+    them at once. Expired rows and rows past `maxsize` are pruned every
+    PRUNE_EVERY sets. Calls run in the default thread pool, one connection per
+    thread.
+    """
+    name = "sqlite"
+    PRUNE_EVERY = 256
+
+    def __init__(self, path: str, maxsize: int, ttl: float, timeout: float):
+        super().__init__()
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = Lock()
+        self._sets = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # A lost entry is just a miss.
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                " user_id INTEGER NOT NULL, key TEXT NOT NULL, version INTEGER NOT NULL,"
+                " value BLOB NOT NULL, expires_at REAL NOT NULL, PRIMARY KEY (user_id, key)"
+                ") WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_response_cache_expires_at ON response_cache (expires_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS user_marks ("
+                " user_id INTEGER NOT NULL, name TEXT NOT NULL, value INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL, PRIMARY KEY (user_id, name)"
+                ") WITHOUT ROWID"
+            )
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _get(self, user_id: int, key: str) -> Optional[bytes]:
+        row = self._connect().execute(
+            "SELECT value FROM response_cache WHERE user_id = ? AND key = ? AND expires_at > ?",
+            (user_id, key, time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, user_id: int, version: int, key: str, value: bytes) -> None:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Entries of older versions are unreachable; drop them in case the
+            # write's own invalidation failed.
+            conn.execute("DELETE FROM response_cache WHERE user_id = ? AND version < ?", (user_id, version))
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache (user_id, key, version, value, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (user_id, key, version, value, time.time() + self.ttl),
+            )
+            self._sets += 1
+            if self._sets % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+                conn.execute(
+                    "DELETE FROM response_cache WHERE expires_at <= "
+                    "(SELECT expires_at FROM response_cache ORDER BY expires_at DESC LIMIT 1 OFFSET ?)",
+                    (self.maxsize,),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _invalidate(self, user_id: int) -> None:
+        self._connect().execute("DELETE FROM response_cache WHERE user_id = ?", (user_id,))
+
+    def _get_marks(self, user_id: int, names: Tuple[str, ...]) -> List[Optional[int]]:
+        # Expired marks are left for the next _set_mark of the same name to replace.
+        rows = dict(self._connect().execute(
+            "SELECT name, value FROM user_marks WHERE user_id = ? AND expires_at > ?", (user_id, time.time())
+        ).fetchall())
+        return [rows.get(name) for name in names]
+
+    def _set_mark(self, user_id: int, name: str, value: int, ttl: float) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO user_marks (user_id, name, value, expires_at) VALUES (?, ?, ?, ?)",
+            (user_id, name, value, time.time() + ttl),
+        )
+
+    async def get(self, user_id: int, version: int, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._get, user_id, key)
+
+    async def set(self, user_id: int, version: int, key: str, value: bytes) -> None:
+        await asyncio.to_thread(self._set, user_id, version, key, value)
+
+    async def invalidate(self, user_id: int) -> None:
+        await asyncio.to_thread(self._invalidate, user_id)
+
+    async def get_marks(self, user_id: int, names: Tuple[str, ...]) -> List[Optional[int]]:
+        return await asyncio.to_thread(self._get_marks, user_id, names)
+
+    async def set_mark(self, user_id: int, name: str, value: int, ttl: float) -> None:
+        await asyncio.to_thread(self._set_mark, user_id, name, value, ttl)
+
+    async def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+
+def _encode(*args) -> bytes:
+    """One command in the Redis protocol (RESP2): an array of bulk strings."""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def _read_reply(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Redis connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        raise RedisError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        return None if length < 0 else (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(rest)
+        return None if length < 0 else [await _read_reply(reader) for _ in range(length)]
+    raise RedisError(f"Unexpected reply {line!r}")
+
+
+class RedisCache(CacheBackend):
+    """
+    One hash per user on a Redis server (or anything speaking RESP2, see
+    benchmarks/redis_stub_server.py), so invalidation is a single DEL seen by
+    every worker. Commands are pipelined over one connection per worker and
+    serialised; one that fails or exceeds `timeout` drops the connection.
+    """
+    name = "redis"
+    PREFIX = "habithero:cache:"
+    MARK_PREFIX = "habithero:mark:"
+
+    def __init__(self, url: str, ttl: float, timeout: float):
+        super().__init__()
+        parsed = urlparse(url or "redis://127.0.0.1:6379/0")
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.ttl = int(ttl)
+        self.timeout = timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    def _hash(self, user_id: int) -> str:
+        return f"{self.PREFIX}{user_id}"
+
+    def _disconnect(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _send(self, commands: Tuple[tuple, ...]) -> list:
+        setup: Tuple[tuple, ...] = ()
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            if self.password:
+                setup += (("AUTH", self.password),)
+            if self.db:
+                setup += (("SELECT", self.db),)
+        self._writer.write(b"".join(_encode(*command) for command in setup + commands))
+        await self._writer.drain()
+        replies = [await _read_reply(self._reader) for _ in setup + commands]
+        return replies[len(setup):]
+
+    async def execute(self, *commands: tuple) -> list:
+        """Sends `commands` in one write and returns their replies in order."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # The connection belongs to the loop that opened it.
+            self._reader = self._writer = None
+            self._loop, self._lock = loop, asyncio.Lock()
+        async with self._lock:
+            try:
+                return await asyncio.wait_for(self._send(commands), self.timeout)
+            except BaseException:
+                self._disconnect()  # Replies may still be in flight.
+                raise
+
+    async def get(self, user_id: int, version: int, key: str) -> Optional[bytes]:
+        (value,) = await self.execute(("HGET", self._hash(user_id), key))
+        return value
+
+    async def set(self, user_id: int, version: int, key: str, value: bytes) -> None:
+        await self.execute(("HSET", self._hash(user_id), key, value), ("EXPIRE", self._hash(user_id), self.ttl))
+
+    async def invalidate(self, user_id: int) -> None:
+        await self.execute(("DEL", self._hash(user_id)))
+
+    async def get_marks(self, user_id: int, names: Tuple[str, ...]) -> List[Optional[int]]:
+        (values,) = await self.execute(("MGET", *(f"{self.MARK_PREFIX}{name}:{user_id}" for name in names)))
+        return [None if value is None else int(value) for value in values]
+
+    async def set_mark(self, user_id: int, name: str, value: int, ttl: float) -> None:
+        await self.execute(("SET", f"{self.MARK_PREFIX}{name}:{user_id}", value, "PX", max(1, int(ttl * 1000))))
+
+    async def close(self) -> None:
+        self._disconnect()
+
+
+# Failures that degrade a lookup to a miss instead of failing the request.
+BACKEND_ERRORS = (OSError, EOFError, sqlite3.Error, RedisError, asyncio.TimeoutError)
+
+
+def create_backend(name: str, url: str = "") -> CacheBackend:
+    if name == "memory":
+        return MemoryCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+    if name == "sqlite":
+        return SQLiteCache(url or "response_cache.db", CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, CACHE_TIMEOUT_SECONDS)
+    if name == "redis":
+        return RedisCache(url, CACHE_TTL_SECONDS, CACHE_TIMEOUT_SECONDS)
+    if name == "none":
+        return CacheBackend()
+    raise ValueError(f"Unknown CACHE_BACKEND {name!r}, expected memory, sqlite, redis or none")
+
+
+backend = create_backend(CACHE_BACKEND, CACHE_URL)
+
+_stats = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0, "errors": 0}
+
+
+def _failed(operation: str, error: Exception) -> None:
+    _stats["errors"] += 1
+    RESPONSE_CACHE_REQUESTS.inc(1, backend.name, "error")
+    if _stats["errors"] == 1:
+        print(f"WARNING: {backend.name} response cache {operation} failed, serving uncached: {error!r}")
+
+
+async def cached_response(user_id: int, validators: Validators, response: Response) -> Optional[Response]:
+    """The body stored for this ETag with `response`'s headers, or None on a miss."""
+    if backend.name == "none":
+        return None
+    try:
+        body = await backend.get(user_id, validators.version, validators.etag)
+    except BACKEND_ERRORS as e:
+        _failed("get", e)
+        return None
+    if body is None:
+        _stats["misses"] += 1
+        RESPONSE_CACHE_REQUESTS.inc(1, backend.name, "miss")
+        return None
+    _stats["hits"] += 1
+    RESPONSE_CACHE_REQUESTS.inc(1, backend.name, "hit")
+    return Response(body, media_type="application/json", headers=response.headers)
+
+
+async def store_response(user_id: int, validators: Validators, rendered: Response) -> Response:
+    """Stores the rendered JSON body under its ETag and passes `rendered` through."""
+    if backend.name == "none":
+        return rendered
+    try:
+        await backend.set(user_id, validators.version, validators.etag, rendered.body)
+        _stats["stores"] += 1
+    except BACKEND_ERRORS as e:
+        _failed("set", e)
+    return rendered
+
+
+async def invalidate_user(user_id: int) -> None:
+    """
+    Evicts the user's entries after a write to their habits or check-ins. Call it
+    once the write has committed; the bumped data_version already makes the old
+    entries unreachable, this frees them on every worker sharing the backend.
+    """
+    try:
+        await backend.invalidate(user_id)
+        _stats["invalidations"] += 1
+    except BACKEND_ERRORS as e:
+        _failed("invalidate", e)
+
+
+async def pin_reads_to_primary(user_id: int) -> None:
+    """
+    Sends the user's reads to the primary for REPLICA_READ_YOUR_WRITES_SECONDS,
+    on every worker sharing the backend, so they see the write being served.
+    """
+    try:
+        await backend.set_mark(user_id, "read_primary", 1, REPLICA_READ_YOUR_WRITES_SECONDS)
+    except BACKEND_ERRORS as e:
+        _failed("set_mark", e)
+
+
+async def publish_token_version(user_id: int, token_version: int) -> None:
+    """
+    Records the user's new token_version for PRINCIPAL_CACHE_TTL_SECONDS, as long
+    as any worker may still hold the user's principal, so the workers sharing
+    the backend drop principals with an older version instead of accepting
+    revoked tokens until their entry expires.
+    """
+    try:
+        await backend.set_mark(user_id, "token_version", token_version, PRINCIPAL_CACHE_TTL_SECONDS)
+    except BACKEND_ERRORS as e:
+        _failed("set_mark", e)
+
+
+async def user_marks(user_id: int, names: Tuple[str, ...]) -> Optional[List[Optional[int]]]:
+    """The user's marks, None for each one unset; None when the backend cannot tell."""
+    try:
+        return await backend.get_marks(user_id, names)
+    except BACKEND_ERRORS as e:
+        _failed("get_marks", e)
+        return None
+
+
+async def shutdown() -> None:
+    await backend.close()
+
+
+def metrics() -> dict:
+    """Response cache backend, hit rate and error count."""
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        "backend": backend.name,
+        **_stats,
+        "hit_rate": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+    }
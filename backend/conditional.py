@@ -0,0 +1,117 @@
+# backend/conditional.py
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request, Response, status
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from metrics import CONDITIONAL_REQUESTS, UNMATCHED_ROUTE
+
+# Conditional GETs per route template: how many were checked and answered 304.
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against `etag`."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+async def bump_data_version(db: AsyncSession, user_id: int) -> None:
+    """
+    Marks the user's habits and check-ins as changed. Call it inside the write's
+    transaction so the new version commits together with the data.
+    """
+    await db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(data_version=models.User.data_version + 1, updated_at=func.now())
+    )
+
+
+@dataclass(frozen=True)
+class Validators:
+    etag: str
+    version: int
+    last_modified: Optional[str]
+    matched: bool
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": "private, no-cache"}
+        if self.last_modified:
+            headers["Last-Modified"] = self.last_modified
+        return headers
+
+    def not_modified(self) -> Response:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=self.headers)
+
+
+async def validators_for(request: Request, db: AsyncSession, user_id: int, *vary) -> Validators:
+    """
+    Validators for a per-user GET, from the user's data_version alone: one primary
+    key lookup, so a matching request can be answered before any rows are read.
+    The ETag also covers the path, query string and Accept header, plus `vary`
+    for anything else the body depends on (e.g. today's date). Last-Modified has
+    one-second resolution, so it is only offered when there is no `vary`, and
+    If-None-Match takes precedence over If-Modified-Since.
+    """
+    version, modified = (
+        await db.execute(
+            select(models.User.data_version, models.User.updated_at).where(models.User.id == user_id)
+        )
+    ).one()
+    digest = hashlib.sha1(
+        repr((
+            user_id,
+            request.url.path,
+            sorted(request.query_params.multi_items()),
+            request.headers.get("accept"),
+            vary,
+        )).encode()
+    ).hexdigest()[:16]
+    etag = f'W/"{version}-{digest}"'
+    if modified is not None and modified.tzinfo is None:
+        modified = modified.replace(tzinfo=timezone.utc)  # SQLite returns naive UTC.
+    last_modified = format_datetime(modified, usegmt=True) if modified is not None and not vary else None
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        matched = etag_matches(if_none_match, etag)
+    else:
+        matched = last_modified is not None and _not_modified_since(
+            request.headers.get("if-modified-since"), modified
+        )
+
+    route = request.scope.get("route")
+    stats = _stats.setdefault(getattr(route, "path", request.url.path), {"requests": 0, "not_modified": 0})
+    stats["requests"] += 1
+    stats["not_modified"] += matched
+    CONDITIONAL_REQUESTS.inc(1, getattr(route, "path", UNMATCHED_ROUTE), "not_modified" if matched else "modified")
+    return Validators(etag=etag, version=version, last_modified=last_modified, matched=matched)
+
+
+def _not_modified_since(if_modified_since: Optional[str], modified: datetime) -> bool:
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return modified.replace(microsecond=0) <= since
+
+
+def metrics() -> dict:
+    """Conditional GETs per route and the share answered with 304."""
+    return {
+        route: {**stats, "hit_rate": round(stats["not_modified"] / stats["requests"], 4) if stats["requests"] else 0.0}
+        for route, stats in _stats.items()
+    }
@@ -1,16 +1,173 @@
-from sqlalchemy import create_engine
+import time
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from config import DATABASE_URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from config import (
+    ASYNC_DATABASE_URL,
+    DATABASE_REPLICA_URL,
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE_SECONDS,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT_SECONDS,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE,
+    SQLITE_MMAP_SIZE,
+)
+from metrics import DB_POOL_TIMEOUTS, DB_POOL_WAIT_SECONDS
+
+# Async drivers used when ASYNC_DATABASE_URL is not set explicitly.
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+# Checkout wait per pool, keyed by engine name; see pool_metrics().
+_pool_stats: dict = {}
+
+
+def to_async_url(url: str) -> str:
+    """Swaps the sync driver in a database URL for its async counterpart."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' databases")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def _timed_pool(base):
+    """Pool subclass that records how long each checkout waited for a connection."""
+
+    class TimedPool(base):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            except Exception:
+                _pool_stats[self.logging_name]["timeouts"] += 1
+                DB_POOL_TIMEOUTS.inc(1, self.logging_name)
+                raise
+            finally:
+                waited = time.perf_counter() - started
+                DB_POOL_WAIT_SECONDS.observe(waited, self.logging_name)
+                stats = _pool_stats[self.logging_name]
+                stats["checkouts"] += 1
+                stats["wait_seconds_sum"] += waited
+                stats["wait_seconds_max"] = max(stats["wait_seconds_max"], waited)
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
+
+
+TimedQueuePool = _timed_pool(QueuePool)
+TimedAsyncQueuePool = _timed_pool(AsyncAdaptedQueuePool)
+
+
+def engine_options(url: str, name: str, is_async: bool = False) -> dict:
+    """Pool and driver settings for `url`, tuned per backend from config.py."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    options = {}
+    if backend == "sqlite":
+        if not is_async:
+            options["connect_args"] = {"check_same_thread": False}
+        if parsed.database in (None, "", ":memory:"):
+            return options  # In-memory databases keep SQLAlchemy's single-connection pool.
+    _pool_stats.setdefault(name, {"checkouts": 0, "timeouts": 0, "wait_seconds_sum": 0.0, "wait_seconds_max": 0.0})
+    options.update(
+        poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+        pool_logging_name=name,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT_SECONDS,
+    )
+    if backend == "postgresql":
+        options.update(pool_pre_ping=DB_POOL_PRE_PING, pool_recycle=DB_POOL_RECYCLE_SECONDS)
+    return options
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE:d}")
+    cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE:d}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS:d}")
+    cursor.close()
+
+
+def _configure(engine: Engine) -> None:
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+def create_db_engine(url: str, name: str = "primary") -> Engine:
+    engine = create_engine(url, **engine_options(url, name))
+    _configure(engine)
+    return engine
+
+
+def create_async_db_engine(url: str, name: str = "primary_async") -> AsyncEngine:
+    engine = create_async_engine(url, **engine_options(url, name, is_async=True))
+    _configure(engine.sync_engine)
+    return engine
+
+
+def pool_metrics() -> dict:
+    """Checkout counts and wait times (seconds) per pool, plus current pool status."""
+    engines = {"primary": engine, "primary_async": async_engine.sync_engine}
+    if replica_async_engine is not async_engine:
+        engines["replica_async"] = replica_async_engine.sync_engine
+    return {
+        name: {**_pool_stats.get(name, {}), "status": target.pool.status()}
+        for name, target in engines.items()
+    }
+
+
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = create_async_db_engine(ASYNC_DATABASE_URL or to_async_url(DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Reads go to the replica when one is configured; otherwise they share the primary.
+if DATABASE_REPLICA_URL:
+    replica_async_engine = create_async_db_engine(to_async_url(DATABASE_REPLICA_URL), name="replica_async")
+    ReplicaSessionLocal = async_sessionmaker(replica_async_engine, autoflush=False, expire_on_commit=False)
+else:
+    replica_async_engine = async_engine
+    ReplicaSessionLocal = AsyncSessionLocal
+
+
+def read_session_factory(primary: bool) -> async_sessionmaker:
+    """The session factory for a read; `primary` keeps it off a lagging replica."""
+    return AsyncSessionLocal if primary else ReplicaSessionLocal
+
+
+def dialect_insert(db: Session):
+    """The bind's `insert`, which has ON CONFLICT; PostgreSQL and SQLite only."""
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Async dependency used by the routers
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Async dependency for GET routes. Relies on auth.get_current_user having run
+# first (it does as a router-level dependency) to set request.state.read_primary.
+async def get_async_read_db(request: Request):
+    async with read_session_factory(getattr(request.state, "read_primary", False))() as db:
+        yield db
@@ -2,12 +2,23 @@ from dotenv import load_dotenv # Import load_dotenv
 load_dotenv() # Load variables from .env file immediately
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
 
 # FIX: Imports are now direct and simple
-from database import Base, engine, get_db
-from routers import auth, habits, checkins, analytics, ai, report
+from config import METRICS_ENABLED, QUERY_PROFILER
+from database import Base, async_engine, engine, get_async_db, pool_metrics, replica_async_engine
+from pagination import NEXT_CURSOR_HEADER
+import ai_service
+import cache
+import conditional
+import metrics
+import password_service
+import query_profiler
+import report_service
+from routers import auth, habits, checkins, analytics, ai, report, dashboard
 
 app = FastAPI(
     title="Habit Hero API",
@@ -21,11 +32,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+if QUERY_PROFILER:
+    query_profiler.install()
+    app.add_middleware(query_profiler.QueryProfilerMiddleware)
+
+if METRICS_ENABLED:
+    # Added last so it wraps everything else, CORS included.
+    metrics.instrument_engines()
+    app.add_middleware(metrics.MetricsMiddleware)
+
 @app.on_event("startup")
 def on_startup():
-    Base.metadata.create_all(bind=engine)
+    # Once Alembic has stamped the database it owns the schema; create_all is
+    # only for fresh local databases and would just re-inspect every table.
+    if not inspect(engine).has_table("alembic_version"):
+        Base.metadata.create_all(bind=engine)
+
+@app.on_event("startup")
+async def start_metrics():
+    if METRICS_ENABLED:
+        metrics.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    password_service.shutdown()
+    report_service.shutdown()
+    ai_service.shutdown()
+    await cache.shutdown()
+    await metrics.shutdown()
+    await async_engine.dispose()
+    if replica_async_engine is not async_engine:
+        await replica_async_engine.dispose()
+    engine.dispose()
 
 app.include_router(auth.router)
 app.include_router(habits.router)
@@ -33,15 +74,29 @@ app.include_router(checkins.router)
 app.include_router(analytics.router)
 app.include_router(ai.router)
 app.include_router(report.router)
+app.include_router(dashboard.router)
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to Habit Hero API"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return PlainTextResponse(await metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/health")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_async_db)):
     try:
-        db.execute("SELECT 1")
-        return {"status": "healthy", "database": "connected"}
+        await db.execute(text("SELECT 1"))
+        return {
+            "status": "healthy",
+            "database": "connected",
+            "db_pools": pool_metrics(),
+            "password_hashing": password_service.metrics(),
+            "reports": report_service.metrics(),
+            "ai_suggestions": ai_service.metrics(),
+            "conditional_get": conditional.metrics(),
+            "response_cache": cache.metrics(),
+        }
     except Exception as e:
         return {"status": "unhealthy", "database": str(e)}
\ No newline at end of file
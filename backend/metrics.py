@@ -0,0 +1,307 @@
+# backend/metrics.py
+
+import asyncio
+import glob
+import json
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import METRICS_DIR, METRICS_FLUSH_SECONDS
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12, 16, 25, 50, 100)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+SLOW_CALL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Requests without a matching route share one label so 404 scans cannot add series.
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.series: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        self.series[labels] = self.series.get(labels, 0) + amount
+
+
+class Gauge(Counter):
+    """Current value per worker; /metrics sums the workers that are still flushing."""
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        self.series[labels] = value
+
+
+class Histogram:
+    """Per-bucket counts (made cumulative when rendered), then the sum, per label set."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, tuple(labels), tuple(buckets)
+        self.series: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+
+REQUESTS = Counter("habithero_http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+REQUEST_SECONDS = Histogram("habithero_http_request_duration_seconds", "HTTP request latency, including the response body.", ("method", "route"))
+IN_FLIGHT = Gauge("habithero_http_requests_in_flight", "HTTP requests being served.")
+IN_FLIGHT.set(0)
+DB_STATEMENTS = Counter("habithero_db_statements_total", "SQL statements executed while serving a route.", ("method", "route"))
+DB_SECONDS = Counter("habithero_db_seconds_total", "Time spent executing SQL statements while serving a route.", ("method", "route"))
+DB_STATEMENTS_PER_REQUEST = Histogram(
+    "habithero_db_statements_per_request", "SQL statements per request.", ("method", "route"), STATEMENT_BUCKETS
+)
+DB_SECONDS_PER_REQUEST = Histogram("habithero_db_seconds_per_request", "Time spent in SQL per request.", ("method", "route"))
+DB_POOL_WAIT_SECONDS = Histogram(
+    "habithero_db_pool_wait_seconds", "Time a checkout waited for a pooled connection.", ("pool",), POOL_WAIT_BUCKETS
+)
+DB_POOL_TIMEOUTS = Counter("habithero_db_pool_timeouts_total", "Checkouts that gave up waiting for a pooled connection.", ("pool",))
+PDF_REQUESTS = Counter("habithero_pdf_requests_total", "Report PDF lookups: cache hit, new render or shared in-flight render.", ("result",))
+PDF_RENDER_SECONDS = Histogram("habithero_pdf_render_seconds", "Report PDF render time in the render pool.", (), SLOW_CALL_BUCKETS)
+AI_CACHE_REQUESTS = Counter("habithero_ai_cache_requests_total", "Suggestion pool lookups: cache hit, miss or shared in-flight call.", ("result",))
+AI_UPSTREAM_SECONDS = Histogram("habithero_ai_upstream_seconds", "Groq call latency by outcome.", ("outcome",), SLOW_CALL_BUCKETS)
+AI_UPSTREAM_SKIPPED = Counter("habithero_ai_upstream_skipped_total", "Groq calls refused before they were made.", ("reason",))
+RESPONSE_CACHE_REQUESTS = Counter(
+    "habithero_response_cache_requests_total", "Response cache lookups: hit, miss or backend error.", ("backend", "result")
+)
+CONDITIONAL_REQUESTS = Counter(
+    "habithero_conditional_requests_total", "Validator checks on GET routes: answered 304 or with a full body.", ("route", "result")
+)
+PASSWORD_HASH_PENDING = Gauge("habithero_password_hash_pending", "Password hash or verify calls queued or running in the hashing pool.")
+PASSWORD_HASH_PENDING.set(0)
+PASSWORD_HASH_SECONDS = Histogram(
+    "habithero_password_hash_seconds", "Password hash or verify latency, queueing included, by outcome.", ("outcome",)
+)
+PASSWORD_HASH_REJECTED = Counter("habithero_password_hash_rejected_total", "Password hash or verify calls refused with a 503.")
+
+REGISTRY = [
+    REQUESTS, REQUEST_SECONDS, IN_FLIGHT,
+    DB_STATEMENTS, DB_SECONDS, DB_STATEMENTS_PER_REQUEST, DB_SECONDS_PER_REQUEST,
+    DB_POOL_WAIT_SECONDS, DB_POOL_TIMEOUTS,
+    PDF_REQUESTS, PDF_RENDER_SECONDS,
+    AI_CACHE_REQUESTS, AI_UPSTREAM_SECONDS, AI_UPSTREAM_SKIPPED,
+    RESPONSE_CACHE_REQUESTS, CONDITIONAL_REQUESTS,
+    PASSWORD_HASH_PENDING, PASSWORD_HASH_SECONDS, PASSWORD_HASH_REJECTED,
+]
+
+# [statements, seconds] of the request being served, shared with threads and
+# tasks started by it; None outside a request, where statements are not counted.
+_request_db: ContextVar[Optional[list]] = ContextVar("request_db", default=None)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status and SQL statements per route
+    template. All registry updates happen here, on the event loop thread.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        db = [0, 0.0]
+        token = _request_db.set(db)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc(1)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.inc(-1)
+            _request_db.reset(token)
+            method, route = scope["method"], getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            REQUESTS.inc(1, method, route, str(status))
+            REQUEST_SECONDS.observe(elapsed, method, route)
+            if db[0]:
+                DB_STATEMENTS.inc(db[0], method, route)
+                DB_SECONDS.inc(db[1], method, route)
+                DB_SECONDS_PER_REQUEST.observe(db[1], method, route)
+            DB_STATEMENTS_PER_REQUEST.observe(db[0], method, route)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _request_db.get() is not None:
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    db = _request_db.get()
+    if db is not None and conn.info.get("metrics_started"):
+        db[0] += 1
+        db[1] += time.perf_counter() - conn.info["metrics_started"].pop()
+
+
+def _handle_error(context):
+    # Failed statements skip after_cursor_execute; their start time must not linger.
+    if context.connection is not None and context.connection.info.get("metrics_started"):
+        context.connection.info["metrics_started"].pop()
+
+
+def instrument_engines() -> None:
+    """Counts statements on every engine, sync and async, for MetricsMiddleware."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+def snapshot() -> dict:
+    return {
+        metric.name: [[list(labels), value if metric.kind != "histogram" else list(value)]
+                      for labels, value in metric.series.items()]
+        for metric in REGISTRY
+    }
+
+
+def _snapshot_path() -> str:
+    return os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+
+
+def _write_snapshot(data: dict) -> None:
+    path = _snapshot_path()
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+
+def _worker_snapshots() -> list:
+    """
+    Snapshots flushed by the other workers sharing METRICS_DIR. Gauges only
+    count from workers that flushed recently; counters of stopped workers stay
+    so totals never go backwards.
+    """
+    fresh_after = time.time() - 3 * METRICS_FLUSH_SECONDS
+    gauges = {metric.name for metric in REGISTRY if metric.kind == "gauge"}
+    snapshots = []
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+        if path == _snapshot_path():
+            continue
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            live = os.path.getmtime(path) >= fresh_after
+        except (OSError, ValueError):
+            continue  # Removed or replaced while being read.
+        if not live:
+            data = {name: series for name, series in data.items() if name not in gauges}
+        snapshots.append(data)
+    return snapshots
+
+
+def _merge(snapshots: list) -> Dict[str, Dict[tuple, object]]:
+    merged: Dict[str, Dict[tuple, object]] = {metric.name: {} for metric in REGISTRY}
+    for data in snapshots:
+        for name, series in data.items():
+            if name not in merged:
+                continue  # Written by an older release.
+            target = merged[name]
+            for labels, value in series:
+                key = tuple(labels)
+                if isinstance(value, list):
+                    current = target.get(key)
+                    target[key] = value if current is None else [a + b for a, b in zip(current, value)]
+                else:
+                    target[key] = target.get(key, 0) + value
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_text(merged: Dict[str, Dict[tuple, object]]) -> str:
+    """Prometheus text exposition format (0.0.4) for merged snapshots."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for labels, value in sorted(merged[metric.name].items()):
+            if metric.kind != "histogram":
+                lines.append(f"{metric.name}{_labels(metric.labels, labels)} {_format(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*metric.buckets, "+Inf"], value[:-1]):
+                cumulative += count
+                le = f'le="{bound if bound == "+Inf" else _format(float(bound))}"'
+                lines.append(f"{metric.name}_bucket{_labels(metric.labels, labels, le)} {cumulative}")
+            lines.append(f"{metric.name}_sum{_labels(metric.labels, labels)} {_format(value[-1])}")
+            lines.append(f"{metric.name}_count{_labels(metric.labels, labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+async def render() -> str:
+    """This worker's live metrics, summed with the other workers' when METRICS_DIR is set."""
+    own = snapshot()
+    if not METRICS_DIR:
+        return render_text(_merge([own]))
+    return await asyncio.to_thread(lambda: render_text(_merge([own, *_worker_snapshots()])))
+
+
+_flush_task: Optional[asyncio.Task] = None
+
+
+async def _flush_loop() -> None:
+    while True:
+        await asyncio.sleep(METRICS_FLUSH_SECONDS)
+        try:
+            await asyncio.to_thread(_write_snapshot, snapshot())
+        except OSError as e:
+            print(f"WARNING: could not write metrics snapshot: {e}")
+
+
+def start() -> None:
+    """Starts flushing this worker's snapshot to METRICS_DIR, when it is set."""
+    global _flush_task
+    if METRICS_DIR and _flush_task is None:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        _flush_task = asyncio.get_running_loop().create_task(_flush_loop())
+
+
+async def shutdown() -> None:
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        _flush_task = None
+        IN_FLIGHT.set(0)
+        PASSWORD_HASH_PENDING.set(0)
+        await asyncio.to_thread(_write_snapshot, snapshot())
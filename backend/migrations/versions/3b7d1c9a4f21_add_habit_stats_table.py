@@ -0,0 +1,44 @@
+"""Add habit_stats table
+
+Revision ID: 3b7d1c9a4f21
+Revises: df8c05fe960f
+Create Date: 2026-10-18 09:12:40.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7d1c9a4f21'
+down_revision: Union[str, Sequence[str], None] = 'df8c05fe960f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'habit_stats',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.Column('habit_id', sa.Integer(), nullable=False),
+        sa.Column('current_streak', sa.Integer(), nullable=False),
+        sa.Column('longest_streak', sa.Integer(), nullable=False),
+        sa.Column('total_checkins', sa.Integer(), nullable=False),
+        sa.Column('last_checkin_date', sa.Date(), nullable=True),
+        sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('habit_id'),
+    )
+    op.create_index(op.f('ix_habit_stats_id'), 'habit_stats', ['id'], unique=False)
+    # Existing check-ins are folded in with `python scripts/backfill_habit_stats.py`.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_habit_stats_id'), table_name='habit_stats')
+    op.drop_table('habit_stats')
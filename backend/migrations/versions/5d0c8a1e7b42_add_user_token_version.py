@@ -0,0 +1,29 @@
+"""Add token_version to users
+
+Revision ID: 5d0c8a1e7b42
+Revises: c41f9b27e8d0
+Create Date: 2026-10-18 14:22:51.180337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d0c8a1e7b42'
+down_revision: Union[str, Sequence[str], None] = 'c41f9b27e8d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('token_version')
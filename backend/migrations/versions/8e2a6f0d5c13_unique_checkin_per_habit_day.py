@@ -0,0 +1,45 @@
+"""Unique check-in per habit and day
+
+Revision ID: 8e2a6f0d5c13
+Revises: 3b7d1c9a4f21
+Create Date: 2026-10-18 11:40:02.915377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2a6f0d5c13'
+down_revision: Union[str, Sequence[str], None] = '3b7d1c9a4f21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the oldest row for each (habit_id, checkin_date) before enforcing uniqueness.
+    op.execute(
+        """
+        DELETE FROM habit_checkins
+        WHERE id NOT IN (
+            SELECT keep_id FROM (
+                SELECT MIN(id) AS keep_id FROM habit_checkins GROUP BY habit_id, checkin_date
+            ) AS survivors
+        )
+        """
+    )
+    with op.batch_alter_table('habit_checkins') as batch_op:
+        batch_op.create_unique_constraint(
+            'uq_habit_checkins_habit_id_checkin_date', ['habit_id', 'checkin_date']
+        )
+    # Totals in habit_stats counted the removed duplicates; re-run
+    # `python scripts/backfill_habit_stats.py` after upgrading.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('habit_checkins') as batch_op:
+        batch_op.drop_constraint('uq_habit_checkins_habit_id_checkin_date', type_='unique')
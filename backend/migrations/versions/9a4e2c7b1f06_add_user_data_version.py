@@ -0,0 +1,29 @@
+"""Add data_version to users
+
+Revision ID: 9a4e2c7b1f06
+Revises: 5d0c8a1e7b42
+Create Date: 2026-10-18 16:52:07.414219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4e2c7b1f06'
+down_revision: Union[str, Sequence[str], None] = '5d0c8a1e7b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('data_version')
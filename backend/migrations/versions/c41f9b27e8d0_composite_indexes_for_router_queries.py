@@ -0,0 +1,29 @@
+"""Composite indexes for router queries
+
+Revision ID: c41f9b27e8d0
+Revises: 8e2a6f0d5c13
+Create Date: 2026-10-18 13:05:27.604118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f9b27e8d0'
+down_revision: Union[str, Sequence[str], None] = '8e2a6f0d5c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # habit_checkins is covered by uq_habit_checkins_habit_id_checkin_date.
+    op.create_index('ix_habits_user_id_id', 'habits', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_habits_user_id_id', table_name='habits')
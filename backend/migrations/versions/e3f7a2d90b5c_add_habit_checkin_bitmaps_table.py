@@ -0,0 +1,36 @@
+"""Add habit_checkin_bitmaps table
+
+Revision ID: e3f7a2d90b5c
+Revises: 9a4e2c7b1f06
+Create Date: 2026-10-18 19:04:51.236870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f7a2d90b5c'
+down_revision: Union[str, Sequence[str], None] = '9a4e2c7b1f06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'habit_checkin_bitmaps',
+        sa.Column('habit_id', sa.Integer(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('bits', sa.LargeBinary(length=46), nullable=False),
+        sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('habit_id', 'year'),
+    )
+    # Existing check-ins are folded in with `python scripts/rebuild_checkin_bitmaps.py`.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('habit_checkin_bitmaps')
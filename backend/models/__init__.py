@@ -1,6 +1,6 @@
 # Models package
 from .base import BaseModel
 from .user import User
-from .habit import Habit, HabitCheckin
+from .habit import Habit, HabitCheckin, HabitCheckinBitmap, HabitStats
 
-__all__ = ["BaseModel", "User", "Habit", "HabitCheckin"]
\ No newline at end of file
+__all__ = ["BaseModel", "User", "Habit", "HabitCheckin", "HabitCheckinBitmap", "HabitStats"]
\ No newline at end of file
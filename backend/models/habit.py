@@ -1,9 +1,14 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Date, Enum
+from sqlalchemy import Column, String, Integer, ForeignKey, Date, Enum, Index, LargeBinary, UniqueConstraint
 from sqlalchemy.orm import relationship
+from database import Base
 from .base import BaseModel
 
 class Habit(BaseModel):
     __tablename__ = "habits"
+    __table_args__ = (
+        # Per-user listing and keyset paging by id.
+        Index("ix_habits_user_id_id", "user_id", "id"),
+    )
     name = Column(String, index=True)
     description = Column(String, nullable=True) # Made description optional
     frequency = Column(Enum("daily", "weekly", "monthly", name="frequency_types"))
@@ -14,11 +19,45 @@ class Habit(BaseModel):
 
     user = relationship("User", back_populates="habits")
     checkins = relationship("HabitCheckin", back_populates="habit", cascade="all, delete-orphan")
+    stats = relationship("HabitStats", back_populates="habit", uselist=False, cascade="all, delete-orphan")
+    bitmaps = relationship("HabitCheckinBitmap", back_populates="habit", cascade="all, delete-orphan")
 
 class HabitCheckin(BaseModel):
     __tablename__ = "habit_checkins"
+    __table_args__ = (
+        # Also serves per-habit date ranges and keyset paging by (checkin_date, id):
+        # SQLite index entries end with the rowid, PostgreSQL sorts the few ties.
+        UniqueConstraint("habit_id", "checkin_date", name="uq_habit_checkins_habit_id_checkin_date"),
+    )
     checkin_date = Column(Date, index=True)
     status = Column(String, default="completed")
     notes = Column(String, nullable=True)
     habit_id = Column(Integer, ForeignKey("habits.id"))
-    habit = relationship("Habit", back_populates="checkins")
\ No newline at end of file
+    habit = relationship("Habit", back_populates="checkins")
+
+class HabitStats(BaseModel):
+    """
+    Per-habit streak counters, kept in step with check-in writes by stats_service.
+    A period (day, week or month, per the habit's frequency) is hit when it holds
+    at least `target` completed check-ins.
+    """
+    __tablename__ = "habit_stats"
+    habit_id = Column(Integer, ForeignKey("habits.id", ondelete="CASCADE"), unique=True, nullable=False)
+    current_streak = Column(Integer, nullable=False, default=0) # Hit periods in the run ending at last_checkin_date
+    longest_streak = Column(Integer, nullable=False, default=0) # In periods of the habit's frequency
+    total_checkins = Column(Integer, nullable=False, default=0) # Completed check-ins
+    last_checkin_date = Column(Date, nullable=True) # Latest check-in of the latest hit period
+    habit = relationship("Habit", back_populates="stats")
+
+class HabitCheckinBitmap(Base):
+    """
+    One bit per day of a year for a habit: bit N is day-of-year N + 1, set for a
+    completed check-in. Kept in step with check-in writes by bitmap_service;
+    habit_checkins stays the source of truth. Keyed on (habit_id, year) alone so
+    writers can upsert it.
+    """
+    __tablename__ = "habit_checkin_bitmaps"
+    habit_id = Column(Integer, ForeignKey("habits.id", ondelete="CASCADE"), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    bits = Column(LargeBinary(46), nullable=False) # 366 bits, little-endian
+    habit = relationship("Habit", back_populates="bitmaps")
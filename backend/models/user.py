@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String
+from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
 from passlib.context import CryptContext
 from models.base import BaseModel
@@ -10,6 +10,8 @@ class User(BaseModel):
     username = Column(String, unique=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0") # Bumped to revoke issued tokens
+    data_version = Column(Integer, nullable=False, default=0, server_default="0") # Bumped on every habit/check-in write
     habits = relationship("Habit", back_populates="user")
 
     def verify_password(self, password: str) -> bool:
@@ -0,0 +1,87 @@
+# backend/pagination.py
+
+import base64
+import binascii
+import json
+from datetime import date
+from typing import Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Clients follow this header to fetch the next page; it is absent on the last page.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, date) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        return tuple(
+            date.fromisoformat(value) if kind is date else kind(value)
+            for kind, value in zip(types, values, strict=True)
+        )
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(stmt: Select, columns: Sequence, after: Optional[str]) -> Select:
+    """Restricts `stmt` to rows strictly after the cursor in (columns...) order."""
+    if not after:
+        return stmt
+    values = decode_cursor(after, [column.type.python_type for column in columns])
+    return stmt.where(tuple_(*columns) > tuple_(*values))
+
+
+def _page_statement(stmt: Select, columns: Sequence, after: Optional[str], limit: int) -> Select:
+    # One extra row tells whether another page follows.
+    return keyset_filter(stmt, columns, after).order_by(*columns).limit(limit + 1)
+
+
+def _trim_page(rows: list, columns: Sequence, limit: int, response: Response) -> list:
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            *(getattr(last, column.key) for column in columns)
+        )
+    return rows
+
+
+async def keyset_page(
+    db: AsyncSession,
+    stmt: Select,
+    columns: Sequence,
+    after: Optional[str],
+    limit: int,
+    response: Response,
+) -> list:
+    """
+    Returns one page of the entities selected by `stmt`, ordered by `columns`,
+    which must end in a unique column. Sets the next-page cursor header when
+    more rows remain.
+    """
+    rows = (await db.scalars(_page_statement(stmt, columns, after, limit))).all()
+    return _trim_page(rows, columns, limit, response)
+
+
+async def keyset_rows(
+    db: AsyncSession,
+    stmt: Select,
+    columns: Sequence,
+    after: Optional[str],
+    limit: int,
+    response: Response,
+) -> list:
+    """
+    Like keyset_page, for statements that select plain columns: returns row
+    tuples, which must include `columns`, instead of ORM entities.
+    """
+    rows = (await db.execute(_page_statement(stmt, columns, after, limit))).all()
+    return _trim_page(rows, columns, limit, response)
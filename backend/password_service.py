@@ -0,0 +1,98 @@
+# backend/password_service.py
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from config import PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_WORKERS
+from metrics import PASSWORD_HASH_PENDING, PASSWORD_HASH_REJECTED, PASSWORD_HASH_SECONDS
+
+# Kept in this lightweight module so pool workers do not import the app.
+pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending = 0
+_stats = {"completed": 0, "failed": 0, "rejected": 0, "latency_seconds_sum": 0.0, "latency_seconds_max": 0.0}
+
+
+def hash_sync(password: str) -> str:
+    # Truncate password to prevent the old bcrypt 72-byte limit crash.
+    return pwd_context.hash(password[:72])
+
+
+def verify_sync(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Forking a process that runs the event loop and pool threads can copy
+        # locks held by other threads; spawned workers start clean.
+        _executor = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+async def _submit(fn, *args):
+    """
+    Runs `fn` in the hashing pool. Work beyond PASSWORD_HASH_MAX_PENDING queued or
+    running calls is refused with a 503 instead of waiting behind the backlog.
+    """
+    global _pending
+    if _pending >= PASSWORD_HASH_MAX_PENDING:
+        _stats["rejected"] += 1
+        PASSWORD_HASH_REJECTED.inc(1)
+        raise HTTPException(
+            status_code=503,
+            detail="Authentication is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    PASSWORD_HASH_PENDING.set(_pending)
+    started = time.perf_counter()
+    outcome = "failed"  # Also when cancelled with the request.
+    try:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(_get_executor(), fn, *args)
+        outcome = "completed"
+        return result
+    finally:
+        _pending -= 1
+        PASSWORD_HASH_PENDING.set(_pending)
+        elapsed = time.perf_counter() - started
+        _stats[outcome] += 1
+        PASSWORD_HASH_SECONDS.observe(elapsed, outcome)
+        _stats["latency_seconds_sum"] += elapsed
+        _stats["latency_seconds_max"] = max(_stats["latency_seconds_max"], elapsed)
+
+
+async def hash_password(password: str) -> str:
+    return await _submit(hash_sync, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _submit(verify_sync, plain_password, hashed_password)
+
+
+def metrics() -> dict:
+    """Queue depth and latency of the hashing pool, in seconds."""
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_pending": PASSWORD_HASH_MAX_PENDING,
+        "pending": _pending,
+        **_stats,
+    }
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
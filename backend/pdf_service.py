@@ -1,16 +1,25 @@
 # backend/pdf_service.py (CORRECTED)
 
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import Paragraph
 from io import BytesIO
 from datetime import date
 
+# Streaks count periods of the habit's own frequency.
+STREAK_UNITS = {"daily": "days", "weekly": "weeks", "monthly": "months"}
+
+
+def streak_label(habit: dict) -> str:
+    return f"{habit.get('streak', 0)} {STREAK_UNITS.get(habit['frequency'], 'days')}"
+
+
 def create_progress_pdf(username: str, habits_data: list, total_checkins: int) -> BytesIO:
     """
     Generates a PDF report of the user's habit progress.
     """
+    # ReportLab is imported on first render (in a report worker), not when the API starts.
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
     buffer = BytesIO()
     p = canvas.Canvas(buffer, pagesize=letter)
     width, height = letter
@@ -62,11 +71,16 @@ def create_progress_pdf(username: str, habits_data: list, total_checkins: int) -
         p.drawString(45, y_pos, f"Frequency: {habit['frequency'].capitalize()}")
         y_pos -= 14
         
-        p.drawString(45, y_pos, f"Total Check-ins: {len(habit['checkins'])}")
+        p.drawString(45, y_pos, f"Total Check-ins: {habit['checkin_count']}")
         y_pos -= 14
-        p.drawString(45, y_pos, f"Current Streak: {habit.get('streak', 0)} days")
+        p.drawString(45, y_pos, f"Current Streak: {streak_label(habit)}")
         y_pos -= 20
         
     p.save()
     buffer.seek(0)
-    return buffer
\ No newline at end of file
+    return buffer
+
+
+def render_progress_pdf(username: str, habits_data: list, total_checkins: int) -> bytes:
+    """create_progress_pdf as raw bytes, so it can run in a worker process."""
+    return create_progress_pdf(username, habits_data, total_checkins).getvalue()
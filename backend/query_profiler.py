@@ -0,0 +1,179 @@
+# backend/query_profiler.py
+
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import QUERY_PROFILER_RAISE, QUERY_REPEAT_THRESHOLD, SLOW_QUERY_EXPLAIN, SLOW_QUERY_MS
+
+logger = logging.getLogger("habithero.queries")
+
+EXPLAIN_PREFIXES = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+class RepeatedQueryError(AssertionError):
+    """The same statement ran more than QUERY_REPEAT_THRESHOLD times in one request."""
+
+
+class TooManyQueriesError(AssertionError):
+    """A block under assert_max_queries ran more statements than allowed."""
+
+
+def normalize(statement: str) -> str:
+    """
+    The statement with literals and bind placeholders replaced by `?` and IN
+    lists of any length collapsed, so one query run in a loop groups together.
+    """
+    statement = _STRINGS.sub("?", statement)
+    statement = _PLACEHOLDERS.sub("?", statement)
+    statement = _NUMBERS.sub("?", statement)
+    statement = _PLACEHOLDER_LISTS.sub("(?, ...)", statement)
+    return " ".join(statement.split())
+
+
+@dataclass
+class QueryProfile:
+    """Statements run on behalf of one request (or block), grouped by normalized SQL."""
+    label: str
+    repeat_threshold: Optional[int] = None
+    counts: Dict[str, int] = field(default_factory=dict)
+    statements: int = 0
+    seconds: float = 0.0
+
+    def record(self, statement: str) -> None:
+        key = normalize(statement)
+        count = self.counts[key] = self.counts.get(key, 0) + 1
+        self.statements += 1
+        if self.repeat_threshold is not None and count == self.repeat_threshold + 1:
+            message = f"{self.label}: the same statement ran {count} times (possible N+1):\n    {key}"
+            if QUERY_PROFILER_RAISE:
+                raise RepeatedQueryError(message)
+            logger.warning(message)
+
+    def summary(self, limit: int = 5) -> str:
+        top = sorted(self.counts.items(), key=lambda item: -item[1])[:limit]
+        return "\n".join(f"    {count}x {statement}" for statement, count in top)
+
+
+_profile: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+
+
+def explain(conn, statement: str, parameters) -> Optional[str]:
+    """EXPLAIN output for `statement` run on the same DBAPI connection; None when not explainable."""
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None or statement.lstrip().split(None, 1)[0].upper() not in EXPLAINABLE:
+        return None
+    # A raw cursor, so the EXPLAIN itself does not go through these events.
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _profile.get()
+    if profile is not None:
+        profile.record(statement)
+    conn.info.setdefault("profiler_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("profiler_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    profile = _profile.get()
+    if profile is not None:
+        profile.seconds += elapsed
+    if elapsed * 1000 < SLOW_QUERY_MS:
+        return
+    plan = None
+    if SLOW_QUERY_EXPLAIN and not executemany:
+        try:
+            plan = explain(conn, statement, parameters)
+        except Exception as e:
+            plan = f"EXPLAIN failed: {e}"
+    logger.warning(
+        "Slow query (%.1f ms)%s:\n    %s\n    parameters: %.500r%s",
+        elapsed * 1000,
+        f" in {profile.label}" if profile is not None else "",
+        " ".join(statement.split()),
+        parameters,
+        "\n    plan:\n        " + plan.replace("\n", "\n        ") if plan else "",
+    )
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    # so the next statement on this connection is not timed against it.
+    if context.connection is not None:
+        started = context.connection.info.get("profiler_started")
+        if started:
+            started.pop()
+
+
+def install() -> None:
+    """Profiles every statement on every engine, sync and async."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+class QueryProfilerMiddleware:
+    """ASGI middleware giving each request its own QueryProfile, for development."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _profile.set(QueryProfile(f"{scope['method']} {scope['path']}", QUERY_REPEAT_THRESHOLD))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _profile.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int, label: str = "block") -> Iterator[QueryProfile]:
+    """
+    Fails with TooManyQueriesError when the enclosed block runs more than `limit`
+    statements on any engine, listing the most frequent ones. Statements are
+    counted globally, so requests made through TestClient's thread count too:
+
+        with assert_max_queries(3, "GET /dashboard/"):
+            client.get("/dashboard/", headers=headers)
+    """
+    profile = QueryProfile(label)
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        profile.record(statement)
+
+    event.listen(Engine, "before_cursor_execute", count)
+    try:
+        yield profile
+    finally:
+        event.remove(Engine, "before_cursor_execute", count)
+    if profile.statements > limit:
+        raise TooManyQueriesError(
+            f"{label} ran {profile.statements} statements, expected at most {limit}:\n{profile.summary()}"
+        )
@@ -0,0 +1,322 @@
+# backend/recommender.py
+
+import json
+import os
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import models
+from config import RECOMMENDER_PATH
+
+# Neighbours kept per habit, and how many habits the popularity list holds.
+TOP_K = 32
+POPULAR_SIZE = 256
+
+_SERVING_ARRAYS = ("item_counts", "indptr", "neighbors", "scores", "popular")
+_STATE_ARRAYS = (
+    "pair_keys", "pair_counts", "user_ids", "user_indptr", "user_items", "user_habit_counts", "user_updated",
+)
+
+# (user_id, name, category, frequency, updated_at), ordered by user_id.
+HabitRow = Tuple[int, str, str, str, object]
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(name.split()).lower()
+
+
+def user_pairs(indptr: np.ndarray, items: np.ndarray) -> np.ndarray:
+    """
+    Keys (i << 32 | j, with i < j) of every pair of items held by the same user,
+    where user u holds items[indptr[u]:indptr[u + 1]] with no duplicates.
+    """
+    indptr = np.asarray(indptr, dtype=np.int64)
+    items = np.asarray(items, dtype=np.int64)
+    positions = np.arange(len(items))
+    ends = np.repeat(indptr[1:], np.diff(indptr))
+    later = ends - positions - 1
+    first = np.repeat(positions, later)
+    offsets = np.arange(later.sum()) - np.repeat(np.cumsum(later) - later, later)
+    a, b = items[first], items[first + 1 + offsets]
+    return (np.minimum(a, b) << 32) | np.maximum(a, b)
+
+
+def merge_counts(keys: np.ndarray, counts: np.ndarray, delta_keys: np.ndarray, delta_counts: np.ndarray):
+    """Adds (possibly negative) counts per key, dropping keys that reach zero."""
+    merged, inverse = np.unique(np.concatenate([keys, delta_keys]), return_inverse=True)
+    totals = np.bincount(inverse, weights=np.concatenate([counts, delta_counts])).astype(np.int64)
+    keep = totals > 0
+    return merged[keep], totals[keep]
+
+
+def _timestamp(value) -> float:
+    return value.timestamp() if value is not None else 0.0
+
+
+class Recommender:
+    """
+    Habit co-occurrence model over all users. Item i's neighbours are
+    neighbors[indptr[i]:indptr[i + 1]], ranked by cosine similarity
+    co_users(i, j) / sqrt(users(i) * users(j)), with similarities in `scores`.
+    Habits are matched by normalized name; the displayed name, category and
+    frequency are the most common ones seen when the habit entered the model.
+
+    Besides the serving arrays the model keeps raw pair counts and every user's
+    habit set, so refresh() can apply only the users whose habits changed.
+    """
+
+    def __init__(self, items: List[dict], arrays: Dict[str, np.ndarray], built_at: float):
+        self.items = items
+        self.index = {item["key"]: i for i, item in enumerate(items)}
+        self.built_at = built_at
+        for name in _SERVING_ARRAYS + _STATE_ARRAYS:
+            setattr(self, name, arrays.get(name))
+
+    # --- Building -------------------------------------------------------------
+
+    @staticmethod
+    def _group_users(rows: Iterable[HabitRow], items: List[dict], index: Dict[str, int]):
+        """
+        Groups rows into {user_id: [item set, habit count, latest updated_at]},
+        appending unseen habits to `items` under their most common spelling.
+        """
+        first_new = len(items)
+        users: Dict[int, list] = {}
+        labels: Dict[int, Counter] = {}
+        for user_id, name, category, frequency, updated_at in rows:
+            key = normalize_name(name)
+            item = index.get(key)
+            if item is None:
+                item = index[key] = len(items)
+                items.append({"key": key})
+            if item >= first_new:
+                labels.setdefault(item, Counter())[(" ".join(name.split()), category, frequency)] += 1
+            entry = users.setdefault(user_id, [set(), 0, 0.0])
+            entry[0].add(item)
+            entry[1] += 1
+            entry[2] = max(entry[2], _timestamp(updated_at))
+        for item, counter in labels.items():
+            name, category, frequency = counter.most_common(1)[0][0]
+            items[item].update(name=name, category=category, frequency=frequency)
+        return users
+
+    @staticmethod
+    def _user_arrays(users: Dict[int, list]) -> Dict[str, np.ndarray]:
+        user_ids = np.array(sorted(users), dtype=np.int64)
+        sets = [sorted(users[u][0]) for u in user_ids]
+        return {
+            "user_ids": user_ids,
+            "user_indptr": np.concatenate([[0], np.cumsum([len(s) for s in sets])]).astype(np.int64),
+            "user_items": np.fromiter((i for s in sets for i in s), dtype=np.int64),
+            "user_habit_counts": np.array([users[u][1] for u in user_ids], dtype=np.int64),
+            "user_updated": np.array([users[u][2] for u in user_ids], dtype=np.float64),
+        }
+
+    @classmethod
+    def build(cls, rows: Iterable[HabitRow]) -> "Recommender":
+        items: List[dict] = []
+        users = cls._group_users(rows, items, {})
+        arrays = cls._user_arrays(users)
+        arrays["pair_keys"], arrays["pair_counts"] = np.unique(
+            user_pairs(arrays["user_indptr"], arrays["user_items"]), return_counts=True
+        )
+        arrays["item_counts"] = np.bincount(arrays["user_items"], minlength=len(items)).astype(np.int64)
+        model = cls(items, arrays, time.time())
+        model._derive()
+        return model
+
+    def refresh(self, rows: Iterable[HabitRow], changed_user_ids: Sequence[int]) -> None:
+        """
+        Replaces the habit sets of `changed_user_ids` with `rows` (their current
+        habits; users absent from `rows` no longer have any) and updates the
+        counts by the difference instead of recounting every user.
+        """
+        changed = np.unique(np.asarray(changed_user_ids, dtype=np.int64))
+        if len(changed) == 0:
+            return
+        new_users = self._group_users(rows, self.items, self.index)
+
+        lengths = np.diff(self.user_indptr)
+        old = np.isin(self.user_ids, changed)
+        old_items_mask = np.repeat(old, lengths)
+        old_indptr = np.concatenate([[0], np.cumsum(lengths[old])])
+        old_items = self.user_items[old_items_mask]
+
+        fresh = self._user_arrays(new_users)
+        removed_pairs = user_pairs(old_indptr, old_items)
+        added_pairs = user_pairs(fresh["user_indptr"], fresh["user_items"])
+        self.pair_keys, self.pair_counts = merge_counts(
+            self.pair_keys,
+            self.pair_counts,
+            np.concatenate([removed_pairs, added_pairs]),
+            np.concatenate([-np.ones(len(removed_pairs), np.int64), np.ones(len(added_pairs), np.int64)]),
+        )
+        item_counts = np.zeros(len(self.items), dtype=np.int64)
+        item_counts[: len(self.item_counts)] = self.item_counts
+        item_counts -= np.bincount(old_items, minlength=len(self.items))
+        item_counts += np.bincount(fresh["user_items"], minlength=len(self.items))
+        self.item_counts = item_counts
+
+        # Merge kept and fresh users back into user_id order without a Python loop.
+        user_ids = np.concatenate([self.user_ids[~old], fresh["user_ids"]])
+        merged_items = np.concatenate([self.user_items[~old_items_mask], fresh["user_items"]])
+        merged_lengths = np.concatenate([lengths[~old], np.diff(fresh["user_indptr"])])
+        merged_starts = np.cumsum(merged_lengths) - merged_lengths
+        order = np.argsort(user_ids, kind="stable")
+        sorted_lengths = merged_lengths[order]
+        self.user_indptr = np.concatenate([[0], np.cumsum(sorted_lengths)]).astype(np.int64)
+        gather = (
+            np.arange(self.user_indptr[-1])
+            - np.repeat(self.user_indptr[:-1], sorted_lengths)
+            + np.repeat(merged_starts[order], sorted_lengths)
+        )
+        self.user_items = merged_items[gather].astype(np.int64)
+        self.user_ids = user_ids[order]
+        self.user_habit_counts = np.concatenate([self.user_habit_counts[~old], fresh["user_habit_counts"]])[order]
+        self.user_updated = np.concatenate([self.user_updated[~old], fresh["user_updated"]])[order]
+        self.built_at = time.time()
+        self._derive()
+
+    def _derive(self) -> None:
+        """Recomputes the top-K neighbour lists and popularity ranking from the counts."""
+        n = len(self.items)
+        i = (self.pair_keys >> 32).astype(np.int64)
+        j = (self.pair_keys & 0xFFFFFFFF).astype(np.int64)
+        similarity = self.pair_counts / np.sqrt(self.item_counts[i] * self.item_counts[j])
+        rows = np.concatenate([i, j])
+        cols = np.concatenate([j, i])
+        sims = np.concatenate([similarity, similarity])
+        order = np.lexsort((-sims, rows))
+        rows, cols, sims = rows[order], cols[order], sims[order]
+        starts = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n))])
+        rank = np.arange(len(rows)) - starts[rows]
+        keep = rank < TOP_K
+        self.neighbors = cols[keep].astype(np.int32)
+        self.scores = sims[keep].astype(np.float32)
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(rows[keep], minlength=n))]).astype(np.int64)
+        ranked = np.argsort(-self.item_counts, kind="stable")
+        self.popular = ranked[self.item_counts[ranked] > 0][:POPULAR_SIZE].astype(np.int32)
+
+    # --- Storage --------------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        """Writes one .npy file per array plus meta.json, which is replaced last."""
+        os.makedirs(path, exist_ok=True)
+        for name in _SERVING_ARRAYS + _STATE_ARRAYS:
+            tmp = os.path.join(path, f"{name}.tmp.npy")
+            np.save(tmp, getattr(self, name))
+            os.replace(tmp, os.path.join(path, f"{name}.npy"))
+        tmp = os.path.join(path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"built_at": self.built_at, "top_k": TOP_K, "items": self.items}, f)
+        os.replace(tmp, os.path.join(path, "meta.json"))
+
+    @classmethod
+    def load(cls, path: str, with_state: bool = False) -> "Recommender":
+        """Memory-maps the serving arrays; `with_state` also loads what refresh() needs."""
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        # np.asarray keeps the mapping but drops the memmap subclass and its per-slice overhead.
+        arrays = {
+            name: np.asarray(np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")) for name in _SERVING_ARRAYS
+        }
+        if with_state:
+            arrays.update({name: np.load(os.path.join(path, f"{name}.npy")) for name in _STATE_ARRAYS})
+            arrays.update({name: np.array(arrays[name]) for name in _SERVING_ARRAYS})
+        return cls(meta["items"], arrays, meta["built_at"])
+
+    # --- Serving --------------------------------------------------------------
+
+    def recommend(self, owned_names: Iterable[str], n: int = 3) -> List[dict]:
+        """
+        Top `n` habits the user does not have, scored by summed similarity to the
+        habits they do have, padded from the most popular habits.
+        """
+        owned = list({self.index[key] for key in map(normalize_name, owned_names) if key in self.index})
+        results: List[dict] = []
+        if owned:
+            positions = np.concatenate([np.arange(self.indptr[i], self.indptr[i + 1]) for i in owned])
+            # Dense accumulation over the vocabulary beats hashing the few hundred candidates.
+            totals = np.bincount(self.neighbors[positions], weights=self.scores[positions], minlength=len(self.items))
+            totals[owned] = 0.0
+            # Only a few hundred entries are non-zero; sorting those beats partitioning the vocabulary.
+            candidates = np.flatnonzero(totals)
+            for item in candidates[np.argsort(-totals[candidates])[:n]]:
+                results.append({**self.items[item], "score": float(totals[item])})
+        chosen = set(owned) | {self.index[r["key"]] for r in results}
+        for item in self.popular:
+            if len(results) >= n:
+                break
+            if int(item) not in chosen:
+                results.append({**self.items[item], "score": 0.0})
+        return results
+
+
+# --- Database -------------------------------------------------------------
+
+def habit_rows(db: Session, user_ids: Optional[Sequence[int]] = None) -> Iterable[HabitRow]:
+    query = db.query(
+        models.Habit.user_id,
+        models.Habit.name,
+        models.Habit.category,
+        models.Habit.frequency,
+        models.Habit.updated_at,
+    )
+    if user_ids is not None:
+        query = query.filter(models.Habit.user_id.in_(list(user_ids)))
+    return query.order_by(models.Habit.user_id).yield_per(5000)
+
+
+def changed_users(db: Session, model: Recommender) -> np.ndarray:
+    """
+    Users whose habits differ from the model: new, gone, or with a different
+    habit count or latest updated_at (which together catch adds, edits and
+    deletes), from one aggregate over habits.
+    """
+    versions = (
+        db.query(models.Habit.user_id, func.count(models.Habit.id), func.max(models.Habit.updated_at))
+        .group_by(models.Habit.user_id)
+        .all()
+    )
+    current = {user_id: (count, _timestamp(updated)) for user_id, count, updated in versions}
+    stored = {
+        int(user_id): (int(count), float(updated))
+        for user_id, count, updated in zip(model.user_ids, model.user_habit_counts, model.user_updated)
+    }
+    return np.array(
+        sorted(u for u in current.keys() | stored.keys() if current.get(u) != stored.get(u)), dtype=np.int64
+    )
+
+
+def build_from_db(db: Session) -> Recommender:
+    return Recommender.build(habit_rows(db))
+
+
+def refresh_from_db(db: Session, model: Recommender, chunk_size: int = 5000) -> int:
+    """Applies every user whose habits changed since the model was built; returns how many."""
+    changed = changed_users(db, model)
+    for start in range(0, len(changed), chunk_size):
+        chunk = changed[start:start + chunk_size]
+        model.refresh(list(habit_rows(db, chunk.tolist())), chunk)
+    return len(changed)
+
+
+_model: Optional[Recommender] = None
+_model_mtime = 0.0
+
+
+def get_model() -> Optional[Recommender]:
+    """The model saved at RECOMMENDER_PATH, reloaded when a build replaces it; None if absent."""
+    global _model, _model_mtime
+    try:
+        mtime = os.stat(os.path.join(RECOMMENDER_PATH, "meta.json")).st_mtime
+    except OSError:
+        return None
+    if _model is None or mtime != _model_mtime:
+        _model, _model_mtime = Recommender.load(RECOMMENDER_PATH), mtime
+    return _model
@@ -0,0 +1,270 @@
+# backend/report_service.py
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from functools import partial
+from typing import Dict, Iterable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from metrics import PDF_RENDER_SECONDS, PDF_REQUESTS
+import models
+from config import REPORT_CACHE_MAX_BYTES, REPORT_JOB_TTL_SECONDS, REPORT_MAX_JOBS, REPORT_PDF_WORKERS
+from pdf_service import render_progress_pdf
+from stats_service import live_streak
+
+
+@dataclass(frozen=True)
+class ReportInput:
+    """Everything the PDF depends on, plus a version that changes whenever it does."""
+    user_id: int
+    username: str
+    habits_data: list
+    total_checkins: int
+    version: str
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+    @property
+    def filename(self) -> str:
+        return f"habit_hero_report_{self.username}_{date.today().isoformat()}.pdf"
+
+    def render_kwargs(self) -> dict:
+        return {"username": self.username, "habits_data": self.habits_data, "total_checkins": self.total_checkins}
+
+
+def load_report_inputs(db: Session, user_ids: Iterable[int], today: Optional[date] = None) -> Dict[int, ReportInput]:
+    """
+    Assembles report inputs for many users with one query over users, habits and
+    habit_stats; check-in rows are never read. The version hashes the assembled
+    data together with the latest habit/stats `updated_at` and the report date.
+    """
+    today = today or date.today()
+    rows = (
+        db.query(
+            models.User.id,
+            models.User.username,
+            models.Habit.name,
+            models.Habit.category,
+            models.Habit.frequency,
+            models.Habit.updated_at,
+            models.HabitStats,
+        )
+        .outerjoin(models.Habit, models.Habit.user_id == models.User.id)
+        .outerjoin(models.HabitStats, models.HabitStats.habit_id == models.Habit.id)
+        .filter(models.User.id.in_(list(user_ids)))
+        .order_by(models.User.id, models.Habit.id)
+        .all()
+    )
+    grouped: Dict[int, dict] = {}
+    for user_id, username, name, category, frequency, habit_updated_at, habit_stats in rows:
+        entry = grouped.setdefault(user_id, {"username": username, "habits": [], "latest": None})
+        if name is None:
+            continue  # User without habits.
+        entry["habits"].append({
+            "name": name,
+            "category": category,
+            "frequency": frequency,
+            "checkin_count": habit_stats.total_checkins if habit_stats is not None else 0,
+            "streak": live_streak(habit_stats, frequency, today),
+        })
+        changed = [habit_updated_at] + ([habit_stats.updated_at] if habit_stats is not None else [])
+        entry["latest"] = max(filter(None, [entry["latest"], *changed]))
+
+    reports = {}
+    for user_id, entry in grouped.items():
+        digest = hashlib.sha1(
+            json.dumps([today, entry["latest"], entry["username"], entry["habits"]], default=str).encode()
+        ).hexdigest()
+        reports[user_id] = ReportInput(
+            user_id=user_id,
+            username=entry["username"],
+            habits_data=entry["habits"],
+            total_checkins=sum(h["checkin_count"] for h in entry["habits"]),
+            version=digest[:20],
+        )
+    return reports
+
+
+class ReportCache:
+    """LRU of rendered PDFs bounded by total bytes, holding one version per user."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, tuple[str, bytes]]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int, version: str) -> Optional[bytes]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, user_id: int, version: str, pdf: bytes) -> None:
+        self.invalidate(user_id)
+        if len(pdf) > self.max_bytes:
+            return
+        self._entries[user_id] = (version, pdf)
+        self.size += len(pdf)
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def invalidate(self, user_id: int) -> None:
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+
+report_cache = ReportCache(REPORT_CACHE_MAX_BYTES)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_inflight: Dict[tuple, asyncio.Future] = {}
+_stats = {"renders": 0, "render_seconds_sum": 0.0, "render_seconds_max": 0.0}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Spawned, not forked, for the same reason as password_service's pool.
+        _executor = ProcessPoolExecutor(
+            max_workers=REPORT_PDF_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+async def _render(report: ReportInput) -> bytes:
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    pdf = await loop.run_in_executor(_get_executor(), partial(render_progress_pdf, **report.render_kwargs()))
+    elapsed = time.perf_counter() - started
+    _stats["renders"] += 1
+    _stats["render_seconds_sum"] += elapsed
+    _stats["render_seconds_max"] = max(_stats["render_seconds_max"], elapsed)
+    PDF_RENDER_SECONDS.observe(elapsed)
+    report_cache.put(report.user_id, report.version, pdf)
+    return pdf
+
+
+async def get_report_pdf(report: ReportInput) -> bytes:
+    """
+    Returns the rendered PDF for `report`, from the cache when its version is
+    current. Concurrent requests for the same version share a single render.
+    """
+    pdf = report_cache.get(report.user_id, report.version)
+    if pdf is not None:
+        PDF_REQUESTS.inc(1, "hit")
+        return pdf
+    key = (report.user_id, report.version)
+    task = _inflight.get(key)
+    if task is None:
+        PDF_REQUESTS.inc(1, "render")
+        task = asyncio.ensure_future(_render(report))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    else:
+        PDF_REQUESTS.inc(1, "shared")
+    return await asyncio.shield(task)
+
+
+@dataclass
+class ReportJob:
+    job_id: str
+    user_id: int
+    etag: str
+    filename: str
+    status: str = "pending"
+    detail: Optional[str] = None
+    pdf: Optional[bytes] = field(default=None, repr=False)
+    expires_at: float = 0.0
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+_jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+
+
+def _prune_jobs() -> None:
+    now = time.monotonic()
+    while _jobs:
+        job = next(iter(_jobs.values()))
+        if job.expires_at > now:
+            break
+        _jobs.popitem(last=False)
+
+
+async def _run_job(job: ReportJob, report: ReportInput) -> None:
+    try:
+        job.pdf = await get_report_pdf(report)
+        job.status = "done"
+    except Exception as e:
+        job.status, job.detail = "failed", str(e)
+
+
+def submit_job(report: ReportInput) -> ReportJob:
+    """Starts rendering in the background; the job is kept for REPORT_JOB_TTL_SECONDS."""
+    _prune_jobs()
+    if len(_jobs) >= REPORT_MAX_JOBS:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many report jobs, please retry shortly",
+            headers={"Retry-After": "5"},
+        )
+    job = ReportJob(
+        job_id=uuid.uuid4().hex,
+        user_id=report.user_id,
+        etag=report.etag,
+        filename=report.filename,
+        expires_at=time.monotonic() + REPORT_JOB_TTL_SECONDS,
+    )
+    _jobs[job.job_id] = job
+    job.task = asyncio.create_task(_run_job(job, report))
+    return job
+
+
+def get_job(job_id: str, user_id: int) -> ReportJob:
+    _prune_jobs()
+    job = _jobs.get(job_id)
+    if job is None or job.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+
+def metrics() -> dict:
+    """Cache efficiency, render latency (seconds) and job backlog."""
+    return {
+        "workers": REPORT_PDF_WORKERS,
+        "cache_entries": len(report_cache._entries),
+        "cache_bytes": report_cache.size,
+        "cache_hits": report_cache.hits,
+        "cache_misses": report_cache.misses,
+        "inflight_renders": len(_inflight),
+        "jobs": len(_jobs),
+        **_stats,
+    }
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from database import get_db
+from database import get_async_read_db
 from ai_service import get_habit_suggestions, SuggestedHabit, get_habits_summary
-from auth import get_current_user
+from auth import Principal, get_current_user
 import models
 
 router = APIRouter(
@@ -15,14 +16,19 @@ router = APIRouter(
 
 @router.get("/suggest_habits", response_model=List[SuggestedHabit])
 async def suggest_habits_endpoint(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     Generates AI-based habit suggestions by analyzing the user's existing habits.
     """
     # Fetch user's existing habits
-    habits = db.query(models.Habit).filter(models.Habit.user_id == current_user.id).all()
+    habits = (
+        await db.execute(
+            select(models.Habit.name, models.Habit.category, models.Habit.frequency)
+            .where(models.Habit.user_id == current_user.id)
+        )
+    ).all()
     
     # Prepare data for the AI prompt
     habits_summary = get_habits_summary(habits)
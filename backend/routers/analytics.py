@@ -1,13 +1,18 @@
 from datetime import date, timedelta
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # FIX: Explicitly import dependency functions
-from auth import get_current_user 
-import models
-from database import get_db
-from schemas.analytics import AnalyticsStats
+from auth import Principal, get_current_user
+from cache import cached_response, store_response
+from conditional import validators_for
+from database import get_async_read_db
+import analytics_service
+from serialization import json_response
+import stats_service
+from schemas.analytics import AnalyticsStats, Bucket, Heatmap, Series
 
 router = APIRouter(
     prefix="/analytics",
@@ -15,55 +20,95 @@ router = APIRouter(
     dependencies=[Depends(get_current_user)],
 )
 
-def calculate_streak(checkins: list[models.HabitCheckin]) -> int:
-    if not checkins:
-        return 0
+@router.get("/stats", response_model=AnalyticsStats)
+async def get_user_stats(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    # Live streaks depend on the date as well as the data.
+    validators = await validators_for(request, db, current_user.id, date.today())
+    if validators.matched:
+        return validators.not_modified()
+    response.headers.update(validators.headers)
+    cached = await cached_response(current_user.id, validators, response)
+    if cached is not None:
+        return cached
+    stats = await db.run_sync(stats_service.get_user_stats, current_user.id)
+    return await store_response(current_user.id, validators, json_response(stats, response))
 
-    # Sort check-ins by date in descending order
-    sorted_checkins = sorted(checkins, key=lambda c: c.checkin_date, reverse=True)
-    
-    today = date.today()
-    streak = 0
-    
-    # Check if the most recent check-in is today or yesterday
-    if sorted_checkins[0].checkin_date == today or sorted_checkins[0].checkin_date == today - timedelta(days=1):
-        streak = 1
-        # Traverse backwards from the most recent check-in
-        for i in range(len(sorted_checkins) - 1):
-            # Check if the next check-in is the day before the current one
-            if sorted_checkins[i].checkin_date - timedelta(days=1) == sorted_checkins[i+1].checkin_date:
-                streak += 1
-            else:
-                break # Streak is broken
-    
-    return streak
 
+# Longest date range a heatmap or series may cover.
+MAX_RANGE_DAYS = 3660
 
-@router.get("/stats", response_model=AnalyticsStats)
-def get_user_stats(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+
+def date_range(since: Optional[date], until: Optional[date]) -> tuple[date, date]:
+    """Defaults to the year ending today; rejects reversed or oversized ranges."""
+    until = until or date.today()
+    since = since or until - timedelta(days=364)
+    if since > until:
+        raise HTTPException(status_code=400, detail="since must not be after until")
+    if (until - since).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_RANGE_DAYS} days")
+    return since, until
+
+
+@router.get("/heatmap", response_model=Heatmap)
+async def get_heatmap(
+    request: Request,
+    response: Response,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    bucket: Bucket = "day",
+    habit_id: Optional[List[int]] = Query(None),
+    category: Optional[List[str]] = Query(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    habits = db.query(models.Habit).filter(models.Habit.user_id == current_user.id).all()
-    
-    total_habits = len(habits)
-    total_checkins = 0
-    longest_streak = 0
-    streaks = {}
+    """
+    Check-in counts and completion ratios per bucket, for calendar heatmaps.
+    Only buckets with check-ins are listed; the arrays are parallel.
+    """
+    since, until = date_range(since, until)
+    validators = await validators_for(request, db, current_user.id, since, until)
+    if validators.matched:
+        return validators.not_modified()
+    response.headers.update(validators.headers)
+    cached = await cached_response(current_user.id, validators, response)
+    if cached is not None:
+        return cached
+    heatmap = await db.run_sync(
+        analytics_service.get_heatmap, current_user.id, since, until, bucket, habit_id, category
+    )
+    return await store_response(current_user.id, validators, json_response(heatmap, response))
 
-    for habit in habits:
-        checkins = db.query(models.HabitCheckin).filter(models.HabitCheckin.habit_id == habit.id).all()
-        total_checkins += len(checkins)
-        
-        current_habit_streak = calculate_streak(checkins)
-        streaks[habit.id] = current_habit_streak
-        
-        if current_habit_streak > longest_streak:
-            longest_streak = current_habit_streak
 
-    return {
-        "total_habits": total_habits,
-        "total_checkins": total_checkins,
-        "longest_streak": longest_streak,
-        "streaks": streaks,
-    }
\ No newline at end of file
+@router.get("/series", response_model=Series)
+async def get_series(
+    request: Request,
+    response: Response,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    bucket: Bucket = "week",
+    habit_id: Optional[List[int]] = Query(None),
+    category: Optional[List[str]] = Query(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Per-habit check-in counts for every bucket in the range, with totals and
+    completion ratios, for charts. `counts` has one row per entry of `habit_ids`.
+    """
+    since, until = date_range(since, until)
+    validators = await validators_for(request, db, current_user.id, since, until)
+    if validators.matched:
+        return validators.not_modified()
+    response.headers.update(validators.headers)
+    cached = await cached_response(current_user.id, validators, response)
+    if cached is not None:
+        return cached
+    series = await db.run_sync(
+        analytics_service.get_series, current_user.id, since, until, bucket, habit_id, category
+    )
+    return await store_response(current_user.id, validators, json_response(series, response))
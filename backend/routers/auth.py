@@ -1,37 +1,61 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-import auth, models
-from database import get_db
+import auth, cache, models, password_service
+from database import get_async_db
 from schemas.token import Token
 from schemas.user import UserCreate, UserOut
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+def _user_by_email(email: str):
+    return select(models.User).where(models.User.email == email)
+
+
+# Hashing runs in password_service's process pool so it never blocks the event loop.
 @router.post("/register", response_model=UserOut)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await db.scalar(_user_by_email(user.email))
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed_password = auth.get_password_hash(user.password)
+    hashed_password = await password_service.hash_password(user.password)
     db_user = models.User(username=user.username, email=user.email, hashed_password=hashed_password)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.post("/login", response_model=Token)
-def login(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+async def login(db: AsyncSession = Depends(get_async_db), form_data: OAuth2PasswordRequestForm = Depends()):
+    user = await db.scalar(_user_by_email(form_data.username))
+    if not user or not await password_service.verify_password(form_data.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Incorrect username or password", headers={"WWW-Authenticate": "Bearer"})
-    access_token = auth.create_access_token(data={"sub": user.email})
+    access_token = auth.create_user_token(user)
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserOut)
-async def read_users_me(current_user: models.User = Depends(auth.get_current_user)):
+async def read_users_me(current_user: auth.Principal = Depends(auth.get_current_user)):
     """
     Get current user.
     """
-    return current_user
\ No newline at end of file
+    return current_user
+
+@router.post("/logout", status_code=204)
+async def logout_everywhere(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: auth.Principal = Depends(auth.get_current_user),
+):
+    """
+    Revokes every token issued to the current user.
+    """
+    db_user = await db.get(models.User, current_user.id)
+    if db_user is None:
+        # Deleted while its principal was still cached.
+        raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+    db_user.token_version += 1
+    token_version = db_user.token_version
+    await db.commit()
+    # Other workers may still hold the principal with the old version.
+    await cache.publish_token_version(current_user.id, token_version)
\ No newline at end of file
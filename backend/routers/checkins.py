@@ -1,13 +1,23 @@
-from typing import List
+from datetime import date
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.orm import contains_eager
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # FIX: Explicitly import dependency functions
-from auth import get_current_user 
+from auth import Principal, get_current_user
+import bitmap_service
+from cache import invalidate_user
 import models
-from database import get_db
+from conditional import bump_data_version
+from database import get_async_db, get_async_read_db
+from pagination import keyset_rows
+from routers.habits import get_owned_habit
+import stats_service
 from schemas.checkin import CheckIn, CheckInCreate
+from serialization import CHECKIN_COLUMNS, rows_response
 
 router = APIRouter(
     prefix="/habits/{habit_id}/checkins",
@@ -17,71 +27,86 @@ router = APIRouter(
 
 
 @router.post("/", response_model=CheckIn)
-def create_checkin_for_habit(
+async def create_checkin_for_habit(
     habit_id: int,
     checkin: CheckInCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    db_habit = (
-        db.query(models.Habit)
-        .filter(models.Habit.id == habit_id, models.Habit.user_id == current_user.id)
-        .first()
+    # Held so stats_service finds the habit's frequency in the identity map.
+    db_habit = await get_owned_habit(db, habit_id, current_user.id)
+    existing = await db.scalar(
+        select(models.HabitCheckin).where(
+            models.HabitCheckin.habit_id == habit_id,
+            models.HabitCheckin.checkin_date == checkin.checkin_date,
+        )
     )
-    if db_habit is None:
-        raise HTTPException(status_code=404, detail="Habit not found")
-    db_checkin = models.HabitCheckin(**checkin.dict(), habit_id=habit_id)
+    if existing is not None:
+        # Replays of an already recorded day are idempotent; a different write
+        # for the day is refused rather than silently dropped.
+        if (existing.status, existing.notes) != (checkin.status, checkin.notes):
+            raise HTTPException(
+                status_code=409, detail="A check-in with different fields is already recorded for this day"
+            )
+        return existing
+    db_checkin = models.HabitCheckin(**checkin.model_dump(), habit_id=habit_id)
     db.add(db_checkin)
-    db.commit()
-    db.refresh(db_checkin)
+    await db.flush()
+    await db.run_sync(bitmap_service.set_day, habit_id, db_checkin.checkin_date, db_checkin.status)
+    await db.run_sync(stats_service.record_checkin, habit_id, db_checkin.checkin_date, db_checkin.status)
+    await bump_data_version(db, current_user.id)
+    await db.commit()
+    await invalidate_user(current_user.id)
+    await db.refresh(db_checkin)
     return db_checkin
 
 
 @router.get("/", response_model=List[CheckIn])
-def read_checkins_for_habit(
+async def read_checkins_for_habit(
     habit_id: int,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    response: Response,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    after: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    db_habit = (
-        db.query(models.Habit)
-        .filter(models.Habit.id == habit_id, models.Habit.user_id == current_user.id)
-        .first()
-    )
-    if db_habit is None:
-        raise HTTPException(status_code=404, detail="Habit not found")
-    checkins = (
-        db.query(models.HabitCheckin)
-        .filter(models.HabitCheckin.habit_id == habit_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
-    return checkins
+    await get_owned_habit(db, habit_id, current_user.id)
+    stmt = select(*CHECKIN_COLUMNS).where(models.HabitCheckin.habit_id == habit_id)
+    if since is not None:
+        stmt = stmt.where(models.HabitCheckin.checkin_date >= since)
+    if until is not None:
+        stmt = stmt.where(models.HabitCheckin.checkin_date <= until)
+    columns = [models.HabitCheckin.checkin_date, models.HabitCheckin.id]
+    return rows_response(await keyset_rows(db, stmt, columns, after, limit, response), response)
 
 
 @router.delete("/{checkin_id}", response_model=CheckIn)
-def delete_checkin(
+async def delete_checkin(
     habit_id: int,
     checkin_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    db_checkin = (
-        db.query(models.HabitCheckin)
+    db_checkin = await db.scalar(
+        select(models.HabitCheckin)
         .join(models.Habit)
-        .filter(
+        .options(contains_eager(models.HabitCheckin.habit))
+        .where(
             models.Habit.user_id == current_user.id,
             models.HabitCheckin.habit_id == habit_id,
             models.HabitCheckin.id == checkin_id,
         )
-        .first()
     )
     if db_checkin is None:
         raise HTTPException(status_code=404, detail="Check-in not found")
 
-    db.delete(db_checkin)
-    db.commit()
-    return db_checkin
\ No newline at end of file
+    await db.delete(db_checkin)
+    await db.flush()
+    await db.run_sync(bitmap_service.clear_day, habit_id, db_checkin.checkin_date, db_checkin.status)
+    await db.run_sync(stats_service.remove_checkin, habit_id, db_checkin.checkin_date, db_checkin.status)
+    await bump_data_version(db, current_user.id)
+    await db.commit()
+    await invalidate_user(current_user.id)
+    return db_checkin
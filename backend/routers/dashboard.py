@@ -0,0 +1,105 @@
+# backend/routers/dashboard.py
+
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth import Principal, get_current_user
+import models
+from cache import cached_response, store_response
+from conditional import validators_for
+from database import get_async_read_db
+from schemas.dashboard import Dashboard
+from serialization import CHECKIN_COLUMNS, json_response, rows_to_dicts
+from stats_service import live_streak
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["dashboard"],
+    dependencies=[Depends(get_current_user)],
+)
+
+
+@router.get("/", response_model=Dashboard)
+async def get_dashboard(
+    request: Request,
+    response: Response,
+    days: int = Query(30, ge=1, le=3660, description="Days of check-ins to include, ending today."),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Everything the dashboard renders on load: the user's habits with their
+    streak counters, the check-ins of the last `days` days, and the totals of
+    /analytics/stats. Two queries after the validator lookup, one for habits
+    joined to their HabitStats row and one for the check-in window, and none
+    when the response cache already holds the body for this ETag.
+    """
+    today = date.today()
+    validators = await validators_for(request, db, current_user.id, today)
+    if validators.matched:
+        return validators.not_modified()
+    response.headers.update(validators.headers)
+    cached = await cached_response(current_user.id, validators, response)
+    if cached is not None:
+        return cached
+
+    since = today - timedelta(days=days - 1)
+    habit_rows = (
+        await db.execute(
+            select(
+                models.Habit.id,
+                models.Habit.name,
+                models.Habit.description,
+                models.Habit.frequency,
+                models.Habit.category,
+                models.Habit.start_date,
+                models.Habit.target,
+                models.Habit.user_id,
+                models.HabitStats.current_streak,
+                models.HabitStats.longest_streak,
+                models.HabitStats.total_checkins,
+                models.HabitStats.last_checkin_date,
+            )
+            .outerjoin(models.HabitStats, models.HabitStats.habit_id == models.Habit.id)
+            .where(models.Habit.user_id == current_user.id)
+            .order_by(models.Habit.id)
+        )
+    ).all()
+    checkin_rows = (
+        await db.execute(
+            select(*CHECKIN_COLUMNS)
+            .join(models.Habit)
+            .where(models.Habit.user_id == current_user.id, models.HabitCheckin.checkin_date >= since)
+            .order_by(models.HabitCheckin.checkin_date, models.HabitCheckin.id)
+        )
+    ).all()
+
+    done_today = {row.habit_id for row in checkin_rows if row.checkin_date == today}
+    habits = []
+    for row in habit_rows:
+        habit = row._asdict()
+        del habit["current_streak"]
+        habit.update(
+            streak=live_streak(row, row.frequency, today),
+            longest_streak=row.longest_streak or 0,
+            total_checkins=row.total_checkins or 0,
+            completed_today=row.id in done_today,
+        )
+        habits.append(habit)
+    streaks = {str(habit["id"]): habit["streak"] for habit in habits}
+    dashboard = {
+        "today": today,
+        "since": since,
+        "habits": habits,
+        "checkins": rows_to_dicts(checkin_rows),
+        "stats": {
+            "total_habits": len(habits),
+            "total_checkins": sum(habit["total_checkins"] for habit in habits),
+            "longest_streak": max(streaks.values(), default=0),
+            "streaks": streaks,
+        },
+    }
+    return await store_response(current_user.id, validators, json_response(dashboard, response))
@@ -1,14 +1,24 @@
-from typing import List
+from datetime import date
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # FIX: Use absolute imports for stability and dependency injection
-from auth import get_current_user 
+from auth import Principal, get_current_user
+import bitmap_service
+from cache import invalidate_user
 import models
-from database import get_db
+from conditional import bump_data_version, validators_for
+from database import get_async_db, get_async_read_db, read_session_factory
+from pagination import keyset_filter, keyset_page, keyset_rows
 from schemas.habit import Habit, HabitCreate, HabitUpdate
-from schemas.checkin import CheckIn 
+from schemas.checkin import CheckIn, CheckInBatch, CheckInBatchResult
+from serialization import CHECKIN_COLUMNS, ndjson_chunk, rows_response
+import stats_service
 
 
 router = APIRouter(
@@ -19,89 +29,253 @@ router = APIRouter(
 )
 
 
+async def get_owned_habit(db: AsyncSession, habit_id: int, user_id: int) -> models.Habit:
+    db_habit = await db.scalar(
+        select(models.Habit).where(models.Habit.id == habit_id, models.Habit.user_id == user_id)
+    )
+    if db_habit is None:
+        raise HTTPException(status_code=404, detail="Habit not found")
+    return db_habit
+
+
 @router.post("/", response_model=Habit)
-def create_habit(
+async def create_habit(
     habit: HabitCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    db_habit = models.Habit(**habit.dict(), user_id=current_user.id)
+    db_habit = models.Habit(**habit.model_dump(), user_id=current_user.id)
+    # Created up front, so check-ins always find a row to lock.
+    db_habit.stats = models.HabitStats(current_streak=0, longest_streak=0, total_checkins=0)
     db.add(db_habit)
-    db.commit()
-    db.refresh(db_habit)
+    await bump_data_version(db, current_user.id)
+    await db.commit()
+    await invalidate_user(current_user.id)
+    await db.refresh(db_habit)
     return db_habit
 
 
 @router.get("/", response_model=List[Habit])
-def read_habits(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+async def read_habits(
+    request: Request,
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    habits = (
-        db.query(models.Habit)
-        .filter(models.Habit.user_id == current_user.id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
-    return habits
+    """
+    Lists the user's habits in id order. Pass the `X-Next-Cursor` response header
+    back as `after` to fetch the next page.
+    """
+    validators = await validators_for(request, db, current_user.id)
+    if validators.matched:
+        return validators.not_modified()
+    response.headers.update(validators.headers)
+    stmt = select(models.Habit).where(models.Habit.user_id == current_user.id)
+    return await keyset_page(db, stmt, [models.Habit.id], after, limit, response)
 
 
 @router.put("/{habit_id}", response_model=Habit)
-def update_habit(
+async def update_habit(
     habit_id: int,
     habit: HabitUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    db_habit = (
-        db.query(models.Habit)
-        .filter(models.Habit.id == habit_id, models.Habit.user_id == current_user.id)
-        .first()
-    )
-    if db_habit is None:
-        raise HTTPException(status_code=404, detail="Habit not found")
+    db_habit = await get_owned_habit(db, habit_id, current_user.id)
 
     # Only update fields that are provided
+    rules = (db_habit.frequency, db_habit.target)
     for var, value in vars(habit).items():
         if value is not None:
             setattr(db_habit, var, value)
 
     db.add(db_habit)
-    db.commit()
-    db.refresh(db_habit)
+    if (db_habit.frequency, db_habit.target) != rules:
+        # Streaks are counted in periods of the frequency, hit at `target`.
+        await db.run_sync(stats_service.refresh_habit_stats, [habit_id])
+    await bump_data_version(db, current_user.id)
+    await db.commit()
+    await invalidate_user(current_user.id)
+    await db.refresh(db_habit)
     return db_habit
 
 
 @router.delete("/{habit_id}", response_model=Habit)
-def delete_habit(
+async def delete_habit(
     habit_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    db_habit = (
-        db.query(models.Habit)
-        .filter(models.Habit.id == habit_id, models.Habit.user_id == current_user.id)
-        .first()
-    )
-    if db_habit is None:
-        raise HTTPException(status_code=404, detail="Habit not found")
+    db_habit = await get_owned_habit(db, habit_id, current_user.id)
 
-    db.delete(db_habit)
-    db.commit()
+    # Set-based deletes of the children instead of the ORM cascade, which would
+    # load every check-in of the habit first.
+    for child in (models.HabitCheckin, models.HabitStats, models.HabitCheckinBitmap):
+        await db.execute(
+            delete(child).where(child.habit_id == habit_id).execution_options(synchronize_session=False)
+        )
+    await db.execute(delete(models.Habit).where(models.Habit.id == habit_id).execution_options(synchronize_session=False))
+    await bump_data_version(db, current_user.id)
+    await db.commit()
+    await invalidate_user(current_user.id)
     return db_habit
 
-@router.get("/checkins/all", response_model=List[CheckIn])
-def read_all_user_checkins(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-):
-    checkins = (
-        db.query(models.HabitCheckin)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _user_checkins(user_id: int, since: Optional[date], until: Optional[date]):
+    stmt = (
+        select(models.HabitCheckin)
         .join(models.Habit)
-        .filter(models.Habit.user_id == current_user.id)
-        .all()
+        .where(models.Habit.user_id == user_id)
     )
-    return checkins
\ No newline at end of file
+    if since is not None:
+        stmt = stmt.where(models.HabitCheckin.checkin_date >= since)
+    if until is not None:
+        stmt = stmt.where(models.HabitCheckin.checkin_date <= until)
+    return stmt
+
+
+async def _stream_checkins(stmt, session_factory):
+    # The request-scoped session is closed before the body is streamed, so the
+    # generator runs the query on a session it owns for the lifetime of the cursor.
+    async with session_factory() as db:
+        rows = await db.stream(stmt.execution_options(yield_per=1000))
+        async for partition in rows.partitions():
+            yield ndjson_chunk(partition)
+
+
+@router.get("/checkins/all", response_model=List[CheckIn])
+async def read_all_user_checkins(
+    request: Request,
+    response: Response,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    after: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=5000),
+    accept: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Lists the user's check-ins ordered by (checkin_date, id), one page at a time.
+    With `Accept: application/x-ndjson` every matching row after the cursor is
+    streamed instead, one JSON object per line, ignoring `limit`.
+    """
+    validators = await validators_for(request, db, current_user.id)
+    if validators.matched:
+        return validators.not_modified()
+    stmt = _user_checkins(current_user.id, since, until).with_only_columns(*CHECKIN_COLUMNS)
+    columns = [models.HabitCheckin.checkin_date, models.HabitCheckin.id]
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        return StreamingResponse(
+            _stream_checkins(
+                keyset_filter(stmt, columns, after).order_by(*columns),
+                read_session_factory(getattr(request.state, "read_primary", False)),
+            ),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers=validators.headers,
+        )
+    response.headers.update(validators.headers)
+    return rows_response(await keyset_rows(db, stmt, columns, after, limit, response), response)
+
+
+BATCH_INSERT_CHUNK = 500
+
+
+def _insert_ignoring_duplicates(db: AsyncSession):
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    return insert(models.HabitCheckin.__table__)
+
+
+@router.post("/checkins/batch", response_model=List[CheckInBatchResult])
+async def create_checkins_batch(
+    batch: CheckInBatch,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Records many check-ins across habits in one transaction. Replaying a day that
+    is already recorded is a no-op reported as "duplicate"; habits the user does
+    not own are reported as "not_found". Results follow the request order.
+    """
+    requested_ids = {item.habit_id for item in batch.checkins}
+    owned = {
+        habit_id
+        for habit_id in await db.scalars(
+            select(models.Habit.id).where(
+                models.Habit.id.in_(requested_ids), models.Habit.user_id == current_user.id
+            )
+        )
+    }
+
+    rows = {}
+    for item in batch.checkins:
+        key = (item.habit_id, item.checkin_date)
+        if item.habit_id in owned and key not in rows:
+            rows[key] = {
+                "habit_id": item.habit_id,
+                "checkin_date": item.checkin_date,
+                "status": item.status,
+                "notes": item.notes,
+            }
+
+    ids = {}
+    values = list(rows.values())
+    table = models.HabitCheckin.__table__
+    for start in range(0, len(values), BATCH_INSERT_CHUNK):
+        stmt = (
+            _insert_ignoring_duplicates(db)
+            .values(values[start:start + BATCH_INSERT_CHUNK])
+            .on_conflict_do_nothing(index_elements=["habit_id", "checkin_date"])
+            .returning(table.c.id, table.c.habit_id, table.c.checkin_date)
+        )
+        for checkin_id, habit_id, checkin_date in await db.execute(stmt):
+            ids[(habit_id, checkin_date)] = checkin_id
+    created = set(ids)
+
+    existing_keys = [key for key in rows if key not in created]
+    if existing_keys:
+        existing = await db.execute(
+            select(
+                models.HabitCheckin.id, models.HabitCheckin.habit_id, models.HabitCheckin.checkin_date
+            ).where(
+                tuple_(models.HabitCheckin.habit_id, models.HabitCheckin.checkin_date).in_(existing_keys)
+            )
+        )
+        for checkin_id, habit_id, checkin_date in existing:
+            ids[(habit_id, checkin_date)] = checkin_id
+
+    if created:
+        await db.run_sync(
+            bitmap_service.set_days, [key for key in created if rows[key]["status"] == bitmap_service.COMPLETED]
+        )
+        await db.run_sync(stats_service.refresh_habit_stats, sorted({habit_id for habit_id, _ in created}))
+        await bump_data_version(db, current_user.id)
+    await db.commit()
+    if created:
+        await invalidate_user(current_user.id)
+
+    results = []
+    for item in batch.checkins:
+        key = (item.habit_id, item.checkin_date)
+        if item.habit_id not in owned:
+            result = "not_found"
+        elif key in created:
+            result = "created"
+            created.discard(key)  # Later repeats within the batch are duplicates.
+        else:
+            result = "duplicate"
+        results.append(
+            CheckInBatchResult(
+                habit_id=item.habit_id,
+                checkin_date=item.checkin_date,
+                result=result,
+                id=ids.get(key),
+            )
+        )
+    return results
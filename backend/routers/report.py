@@ -1,19 +1,15 @@
 # backend/routers/report.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from typing import List
-from io import BytesIO
-# FIX: Import date from datetime
-from datetime import date 
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 
-from database import get_db
-from auth import get_current_user
-from pdf_service import create_progress_pdf 
-from routers.analytics import get_user_stats 
-from routers.habits import read_habits 
-import models
+from database import get_async_read_db
+from auth import Principal, get_current_user
+from conditional import etag_matches
+import report_service
+from report_service import ReportInput
+from schemas.report import ReportJob
 
 router = APIRouter(
     prefix="/report",
@@ -21,46 +17,73 @@ router = APIRouter(
     dependencies=[Depends(get_current_user)],
 )
 
+
+def pdf_response(pdf: bytes, etag: str, filename: str) -> Response:
+    return Response(
+        content=pdf,
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "ETag": etag,
+            # Always revalidate; an unchanged report then costs a 304.
+            "Cache-Control": "private, no-cache",
+        },
+    )
+
+
+async def load_report(db: AsyncSession, current_user: Principal) -> ReportInput:
+    reports = await db.run_sync(report_service.load_report_inputs, [current_user.id])
+    if current_user.id not in reports:
+        raise HTTPException(status_code=404, detail="User not found")
+    return reports[current_user.id]
+
+
 @router.get("/pdf", summary="Export User Progress as PDF Report")
 async def export_pdf_report(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     Generates a PDF report summarizing all habit progress for the authenticated user.
+    The report is rendered in a worker pool and cached per data version, which is
+    also its ETag.
     """
-    
-    # 1. Fetch data required for the report
-    habits = read_habits(db=db, current_user=current_user)
-    stats = get_user_stats(db=db, current_user=current_user)
-    
-    # 2. Prepare data structure for PDF utility
-    report_data = []
-    total_checkins = 0
-    
-    for habit in habits:
-        habit_dict = {
-            'name': habit.name,
-            'category': habit.category,
-            'frequency': habit.frequency,
-            'checkins': [{"checkin_date": str(c.checkin_date)} for c in habit.checkins],
-            'streak': stats['streaks'].get(habit.id, 0)
-        }
-        report_data.append(habit_dict)
-        total_checkins += len(habit.checkins)
-        
-    # 3. Generate the PDF
-    pdf_buffer = create_progress_pdf(
-        username=current_user.username,
-        habits_data=report_data,
-        total_checkins=total_checkins
-    )
-    
-    # 4. Return as Streaming Response
-    return StreamingResponse(
-        pdf_buffer,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=habit_hero_report_{current_user.username}_{date.today().isoformat()}.pdf"
-        }
-    )
\ No newline at end of file
+    report = await load_report(db, current_user)
+    if etag_matches(if_none_match, report.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": report.etag})
+    pdf = await report_service.get_report_pdf(report)
+    return pdf_response(pdf, report.etag, report.filename)
+
+
+@router.post("/pdf/jobs", response_model=ReportJob, status_code=status.HTTP_202_ACCEPTED)
+async def submit_pdf_report_job(
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Starts rendering the report in the background; poll the job, then download it."""
+    job = report_service.submit_job(await load_report(db, current_user))
+    response.headers["Location"] = router.url_path_for("get_pdf_report_job", job_id=job.job_id)
+    return job
+
+
+@router.get("/pdf/jobs/{job_id}", response_model=ReportJob)
+async def get_pdf_report_job(job_id: str, current_user: Principal = Depends(get_current_user)):
+    return report_service.get_job(job_id, current_user.id)
+
+
+@router.get("/pdf/jobs/{job_id}/download", summary="Download a finished PDF report job")
+async def download_pdf_report_job(
+    job_id: str,
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_user),
+):
+    job = report_service.get_job(job_id, current_user.id)
+    if job.status == "pending":
+        raise HTTPException(status_code=409, detail="Report is not ready yet")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=f"Report generation failed: {job.detail}")
+    if etag_matches(if_none_match, job.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": job.etag})
+    return pdf_response(job.pdf, job.etag, job.filename)
@@ -1,5 +1,6 @@
+from datetime import date
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Literal
 
 class AnalyticsStats(BaseModel):
     total_habits: int
@@ -8,4 +9,28 @@ class AnalyticsStats(BaseModel):
     streaks: Dict[str, int] # Maps habit_id to its streak
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+Bucket = Literal["day", "week", "month"]
+
+
+class Heatmap(BaseModel):
+    bucket: Bucket
+    since: date
+    until: date
+    # Parallel arrays, one entry per bucket that has check-ins
+    starts: List[date]
+    counts: List[int]
+    ratios: List[float]
+
+
+class Series(BaseModel):
+    bucket: Bucket
+    since: date
+    until: date
+    starts: List[date]  # Every bucket in the range
+    habit_ids: List[int]
+    counts: List[List[int]]  # One row per habit in habit_ids, aligned with starts
+    totals: List[int]
+    ratios: List[float]
@@ -1,7 +1,7 @@
 from datetime import date
-from typing import Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class CheckInBase(BaseModel):
@@ -19,4 +19,19 @@ class CheckIn(CheckInBase):
     habit_id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class CheckInBatchItem(CheckInCreate):
+    habit_id: int
+
+
+class CheckInBatch(BaseModel):
+    checkins: List[CheckInBatchItem] = Field(..., max_length=5000)
+
+
+class CheckInBatchResult(BaseModel):
+    habit_id: int
+    checkin_date: date
+    result: Literal["created", "duplicate", "not_found"]
+    id: Optional[int] = None
@@ -0,0 +1,24 @@
+from datetime import date
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from schemas.analytics import AnalyticsStats
+from schemas.checkin import CheckIn
+from schemas.habit import Habit
+
+
+class DashboardHabit(Habit):
+    streak: int
+    longest_streak: int
+    total_checkins: int
+    last_checkin_date: Optional[date] = None
+    completed_today: bool
+
+
+class Dashboard(BaseModel):
+    today: date
+    since: date  # First day of the check-in window
+    habits: List[DashboardHabit]
+    checkins: List[CheckIn]
+    stats: AnalyticsStats
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+
+class ReportJob(BaseModel):
+    job_id: str
+    status: Literal["pending", "done", "failed"]
+    etag: str
+    detail: Optional[str] = None
+
+    class Config:
+        from_attributes = True
@@ -7,4 +7,5 @@ class Token(BaseModel):
 
 
 class TokenData(BaseModel):
-    email: str | None = None
\ No newline at end of file
+    user_id: int | None = None
+    token_version: int | None = None
\ No newline at end of file
@@ -0,0 +1,36 @@
+# backend/scripts/backfill_habit_stats.py
+"""
+Rebuilds the habit_stats table from the full check-in history.
+
+Run once after `alembic upgrade head` adds the table, or any time the counters
+need to be re-derived:
+
+    python scripts/backfill_habit_stats.py --chunk-size 500
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal
+import stats_service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=500, help="Habits recomputed per transaction.")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        processed = stats_service.backfill_habit_stats(db, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    print(f"Backfilled stats for {processed} habits in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
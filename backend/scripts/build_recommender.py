@@ -0,0 +1,48 @@
+# backend/scripts/build_recommender.py
+"""
+Builds or refreshes the local habit co-occurrence recommender.
+
+Without --full, an existing model is refreshed incrementally: only users whose
+habits changed since the last run (new, removed, or with a different habit
+count or latest updated_at) are re-read and applied. Schedule it as often as
+suggestions should follow new habits:
+
+    python scripts/build_recommender.py --full
+    python scripts/build_recommender.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import RECOMMENDER_PATH
+from database import SessionLocal
+import recommender
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--path", default=RECOMMENDER_PATH, help="Model directory.")
+    parser.add_argument("--full", action="store_true", help="Rebuild from every habit instead of refreshing.")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        if args.full or not os.path.exists(os.path.join(args.path, "meta.json")):
+            model = recommender.build_from_db(db)
+            action = f"Built from {len(model.user_ids)} users"
+        else:
+            model = recommender.Recommender.load(args.path, with_state=True)
+            changed = recommender.refresh_from_db(db, model)
+            action = f"Refreshed {changed} changed users"
+    finally:
+        db.close()
+    model.save(args.path)
+    print(f"{action}: {len(model.items)} habits, {len(model.pair_keys)} pairs, in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# backend/scripts/check_checkin_bitmaps.py
+"""
+Checks that habit_checkin_bitmaps matches the check-in rows.
+
+Prints every (habit, year) whose bits differ from its completed check-ins and exits
+with status 1 if any do; --repair re-derives just those habits:
+
+    python scripts/check_checkin_bitmaps.py --repair
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal
+import bitmap_service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=500, help="Habits compared per query.")
+    parser.add_argument("--repair", action="store_true", help="Rebuild the bitmaps of mismatched habits.")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        mismatched = set()
+        for mismatch in bitmap_service.find_mismatches(db, chunk_size=args.chunk_size):
+            mismatched.add(mismatch["habit_id"])
+            print(
+                f"habit {mismatch['habit_id']} {mismatch['year']}: "
+                f"{len(mismatch['missing'])} missing {[d.isoformat() for d in mismatch['missing'][:5]]}, "
+                f"{len(mismatch['extra'])} extra {[d.isoformat() for d in mismatch['extra'][:5]]}"
+            )
+        if mismatched and args.repair:
+            bitmap_service.refresh_bitmaps(db, sorted(mismatched))
+            db.commit()
+            print(f"Repaired {len(mismatched)} habits")
+        elif mismatched:
+            print(f"{len(mismatched)} habits out of step; rerun with --repair")
+            sys.exit(1)
+        else:
+            print("Check-in bitmaps match the check-in rows")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
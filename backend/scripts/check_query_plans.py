@@ -0,0 +1,243 @@
+# backend/scripts/check_query_plans.py
+"""
+Query plan regression check for the API routers.
+
+Seeds a throwaway SQLite database (or uses --database-url), drives every router
+endpoint in-process, captures each distinct statement the ORM emits, and runs
+EXPLAIN QUERY PLAN / EXPLAIN (FORMAT JSON) on it. Exits with status 1 when a
+statement reads `habits` or `habit_checkins` with a full table scan, or when an
+endpoint runs more statements than its entry in QUERY_BUDGETS. The test
+suite runs the SQLite scan check (tests/test_query_plans.py); use this
+command for PostgreSQL or a larger dataset.
+
+    python scripts/check_query_plans.py --users 50 --days 365
+    python scripts/check_query_plans.py --output plans.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HOT_TABLES = ("habits", "habit_checkins")
+
+# Most statements each endpoint may run, as exercised below and in
+# tests/test_query_budgets.py. The first request also looks up the caller,
+# later ones find them in the principal cache.
+QUERY_BUDGETS = {
+    ("GET", "/habits/"): 3,
+    ("POST", "/habits/"): 4,
+    ("PUT", "/habits/{habit_id}"): 4,
+    ("DELETE", "/habits/{habit_id}"): 6,
+    ("GET", "/habits/checkins/all"): 2,
+    ("POST", "/habits/checkins/batch"): 10,
+    ("GET", "/habits/{habit_id}/checkins/"): 2,
+    ("POST", "/habits/{habit_id}/checkins/"): 12,
+    ("DELETE", "/habits/{habit_id}/checkins/{checkin_id}"): 12,
+    ("GET", "/analytics/stats"): 2,
+    ("GET", "/analytics/heatmap"): 3,
+    ("GET", "/analytics/series"): 3,
+    ("GET", "/dashboard/"): 3,
+    ("GET", "/report/pdf"): 1,
+    ("GET", "/ai/suggest_habits"): 1,
+    ("GET", "/auth/me"): 1,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", help="Defaults to a temporary SQLite file.")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--habits", type=int, default=5, help="Habits per user.")
+    parser.add_argument("--days", type=int, default=365, help="Days of check-in history.")
+    parser.add_argument("--output", help="Write the captured plans to this JSON file.")
+    return parser.parse_args()
+
+
+def seed(db, users: int, habits: int, days: int) -> None:
+    import models
+    import stats_service
+
+    rng = random.Random(7)
+    today = date.today()
+    db.bulk_insert_mappings(
+        models.User,
+        [
+            {"id": u, "username": f"user{u}", "email": f"user{u}@example.com", "hashed_password": "x"}
+            for u in range(1, users + 1)
+        ],
+    )
+    habit_rows, checkin_rows = [], []
+    for u in range(1, users + 1):
+        for h in range(habits):
+            habit_id = len(habit_rows) + 1
+            habit_rows.append({
+                "id": habit_id,
+                "name": f"Habit {h}",
+                "frequency": "daily",
+                "category": rng.choice(["health", "work", "learning", "other"]),
+                "start_date": today - timedelta(days=days),
+                "user_id": u,
+            })
+            checkin_rows.extend(
+                {"habit_id": habit_id, "checkin_date": today - timedelta(days=d), "status": "completed"}
+                for d in range(days)
+                if rng.random() < 0.8
+            )
+    db.bulk_insert_mappings(models.Habit, habit_rows)
+    db.bulk_insert_mappings(models.HabitCheckin, checkin_rows)
+    db.commit()
+    stats_service.backfill_habit_stats(db)
+
+
+def exercise_routes(client, user_id: int) -> list:
+    """
+    Calls every router endpoint once as `user_id`. Returns the endpoints that
+    ran more statements than their QUERY_BUDGETS entry.
+    """
+    import auth
+    from query_profiler import TooManyQueriesError, assert_max_queries
+
+    token = auth.create_access_token(data={"sub": str(user_id), "ver": 0})
+    headers = {"Authorization": f"Bearer {token}"}
+    today = date.today()
+    over_budget = []
+
+    def call(method, route, url=None, **kwargs):
+        kwargs["headers"] = {**headers, **kwargs.get("headers", {})}
+        try:
+            with assert_max_queries(QUERY_BUDGETS[method, route], f"{method} {route}"):
+                response = client.request(method, url or route, **kwargs)
+        except TooManyQueriesError as e:
+            over_budget.append(str(e))
+        if response.status_code >= 400:
+            raise SystemExit(f"{method} {response.request.url} -> {response.status_code}: {response.text}")
+        return response
+
+    habits = call("GET", "/habits/", params={"limit": 2})
+    call("GET", "/habits/", params={"after": habits.headers["X-Next-Cursor"]})
+    habit_id = habits.json()[0]["id"]
+    page = call("GET", "/habits/checkins/all", params={"limit": 50})
+    call("GET", "/habits/checkins/all", params={"after": page.headers["X-Next-Cursor"]})
+    call("GET", "/habits/checkins/all", params={"since": (today - timedelta(days=30)).isoformat()})
+    call("GET", "/habits/checkins/all", headers={"Accept": "application/x-ndjson"})
+    checkins = f"/habits/{habit_id}/checkins/"
+    page = call("GET", "/habits/{habit_id}/checkins/", checkins, params={"limit": 20})
+    call(
+        "GET", "/habits/{habit_id}/checkins/", checkins,
+        params={"after": page.headers["X-Next-Cursor"], "until": today.isoformat()},
+    )
+    created = call(
+        "POST", "/habits/{habit_id}/checkins/", checkins,
+        json={"checkin_date": (today + timedelta(days=1)).isoformat()},
+    ).json()
+    call("DELETE", "/habits/{habit_id}/checkins/{checkin_id}", f"{checkins}{created['id']}")
+    removed = call("GET", "/habits/{habit_id}/checkins/", checkins, params={"limit": 1}).json()[0]
+    call("DELETE", "/habits/{habit_id}/checkins/{checkin_id}", f"{checkins}{removed['id']}")
+    call("POST", "/habits/checkins/batch", json={"checkins": [
+        {"habit_id": habit_id, "checkin_date": removed["checkin_date"]},
+        {"habit_id": habit_id, "checkin_date": (today - timedelta(days=1)).isoformat()},
+    ]})
+    habit = habits.json()[1]
+    call("PUT", "/habits/{habit_id}", f"/habits/{habit['id']}", json={**habit, "name": "Renamed"})
+    call("GET", "/analytics/stats")
+    call("GET", "/analytics/heatmap")
+    call("GET", "/analytics/series", params={"bucket": "month", "category": "health"})
+    call("GET", "/dashboard/", params={"days": 30})
+    call("GET", "/report/pdf")
+    call("GET", "/ai/suggest_habits")
+    call("GET", "/auth/me")
+    new_habit = call("POST", "/habits/", json={**habit, "name": "Temp"}).json()
+    call("DELETE", "/habits/{habit_id}", f"/habits/{new_habit['id']}")
+    return over_budget
+
+
+def sqlite_full_scans(conn, statement, parameters):
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    plan = [row[-1] for row in rows]
+    # "SCAN t" and "SCAN t USING [COVERING] INDEX" both read every row of t.
+    scans = [
+        line for line in plan
+        if line.startswith("SCAN ") and line.split()[1] in HOT_TABLES
+    ]
+    return plan, scans
+
+
+def postgresql_full_scans(conn, statement, parameters):
+    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+    scans = []
+
+    def walk(node):
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in HOT_TABLES:
+            scans.append(f"Seq Scan on {node['Relation Name']}")
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return plan, scans
+
+
+def main() -> None:
+    args = parse_args()
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    import main as app_main
+    from database import Base, SessionLocal, async_engine, engine
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    seed(db, args.users, args.habits, args.days)
+    db.close()
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+        conn.commit()
+
+    captured = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE", "WITH"):
+            captured.setdefault(statement, parameters)
+
+    # Routers run on the async engine; scripts and services may still use the sync one.
+    engines = (engine, async_engine.sync_engine)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", capture)
+    with TestClient(app_main.app) as client:
+        over_budget = exercise_routes(client, user_id=args.users // 2 or 1)
+    for target in engines:
+        event.remove(target, "before_cursor_execute", capture)
+
+    explain = postgresql_full_scans if engine.dialect.name == "postgresql" else sqlite_full_scans
+    report, failures = [], 0
+    with engine.connect() as conn:
+        for statement, parameters in captured.items():
+            plan, scans = explain(conn, statement, parameters)
+            report.append({"statement": statement, "plan": plan, "full_scans": scans})
+            if scans:
+                failures += 1
+                print(f"FULL SCAN {scans}:\n    {' '.join(statement.split())}\n")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+    for message in over_budget:
+        print(f"OVER BUDGET {message}\n")
+    print(f"Checked {len(report)} distinct statements, {failures} with full scans of {', '.join(HOT_TABLES)}")
+    print(f"Checked {len(QUERY_BUDGETS)} endpoints against their query budgets, {len(over_budget)} over budget")
+    sys.exit(1 if failures or over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
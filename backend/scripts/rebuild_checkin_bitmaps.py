@@ -0,0 +1,36 @@
+# backend/scripts/rebuild_checkin_bitmaps.py
+"""
+Rebuilds the habit_checkin_bitmaps table from the check-in rows.
+
+Run once after `alembic upgrade head` adds the table, before enabling
+CHECKIN_BITMAP_READS, or to repair what check_checkin_bitmaps.py reports:
+
+    python scripts/rebuild_checkin_bitmaps.py --chunk-size 500
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal
+import bitmap_service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=500, help="Habits rebuilt per transaction.")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        processed = bitmap_service.rebuild_bitmaps(db, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    print(f"Rebuilt check-in bitmaps for {processed} habits in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
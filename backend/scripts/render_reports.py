@@ -0,0 +1,121 @@
+# backend/scripts/render_reports.py
+"""
+Renders progress PDF reports for every user into a directory.
+
+Users are processed in chunks: each chunk's report data comes from the same
+set-based query the /report/pdf endpoint uses, and the PDFs are rendered across
+a process pool. Finished reports are recorded in OUTPUT_DIR/manifest.jsonl with
+their data version, so an interrupted run resumes where it stopped and a later
+run only re-renders users whose data changed:
+
+    python scripts/render_reports.py --output-dir reports/2024-w21 --workers 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MANIFEST = "manifest.jsonl"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--chunk-size", type=int, default=500, help="Users loaded per query.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--force", action="store_true", help="Ignore the manifest and re-render everyone.")
+    return parser.parse_args()
+
+
+def read_manifest(path: str) -> dict:
+    """user_id -> version of reports already written."""
+    done = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line from an interrupted run.
+                done[entry["user_id"]] = entry["version"]
+    return done
+
+
+def render_to_file(path: str, render_kwargs: dict) -> int:
+    """Runs in a worker process; writes atomically so partial files never count as done."""
+    from pdf_service import render_progress_pdf
+
+    pdf = render_progress_pdf(**render_kwargs)
+    with open(f"{path}.tmp", "wb") as f:
+        f.write(pdf)
+    os.replace(f"{path}.tmp", path)
+    return len(pdf)
+
+
+def user_id_chunks(db, chunk_size: int):
+    import models
+
+    last_id = 0
+    while True:
+        ids = [
+            user_id for (user_id,) in db.query(models.User.id)
+            .filter(models.User.id > last_id)
+            .order_by(models.User.id)
+            .limit(chunk_size)
+        ]
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def main() -> None:
+    args = parse_args()
+    from database import SessionLocal
+    from report_service import load_report_inputs
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest_path = os.path.join(args.output_dir, MANIFEST)
+    done = {} if args.force else read_manifest(manifest_path)
+
+    started = time.perf_counter()
+    rendered = skipped = total_bytes = 0
+    db = SessionLocal()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool, open(manifest_path, "a+") as manifest:
+            if manifest.tell():
+                manifest.seek(manifest.tell() - 1)
+                if manifest.read(1) != "\n":
+                    manifest.write("\n")  # Terminate a torn line before appending.
+            for ids in user_id_chunks(db, args.chunk_size):
+                reports = [
+                    report for report in load_report_inputs(db, ids).values()
+                    if done.get(report.user_id) != report.version
+                ]
+                skipped += len(ids) - len(reports)
+                paths = [os.path.join(args.output_dir, f"{report.user_id}.pdf") for report in reports]
+                sizes = pool.map(render_to_file, paths, [r.render_kwargs() for r in reports], chunksize=8)
+                for report, size in zip(reports, sizes):
+                    manifest.write(json.dumps({"user_id": report.user_id, "version": report.version}) + "\n")
+                    rendered += 1
+                    total_bytes += size
+                manifest.flush()
+                db.expire_all()
+                elapsed = time.perf_counter() - started
+                print(f"  {rendered} rendered, {skipped} up to date, {rendered / elapsed:.1f} reports/s", flush=True)
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Rendered {rendered} reports ({total_bytes / 1e6:.1f} MB), skipped {skipped} up to date, "
+        f"in {elapsed:.2f}s: {rendered / elapsed if elapsed else 0:.1f} reports/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
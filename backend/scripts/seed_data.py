@@ -0,0 +1,163 @@
+# backend/scripts/seed_data.py
+"""
+Bulk-loads a synthetic but realistic dataset for load tests and benchmarks.
+
+Creates --users users with --habits habits each and up to --years years of
+check-ins. Every habit has its own start date and adherence. Check-ins follow
+streaks that lapse and resume, some habits are abandoned, and weekly habits
+land on one day a week. All users share the password given by --password.
+Rows go through the model tables in large executemany batches, after which
+habit_stats is derived from them; habit_checkin_bitmaps is packed on the way.
+
+    python scripts/seed_data.py --database-url sqlite:///seed.db --users 1000 --habits 5 --years 3
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CATEGORIES = ["health", "work", "learning", "other"]
+HABIT_NAMES = {
+    "health": ["Morning run", "Drink water", "Stretch", "Meditate", "Sleep by 11", "Walk 10k steps"],
+    "work": ["Inbox zero", "Plan the day", "Deep work block", "Weekly review", "No meetings before 10"],
+    "learning": ["Read 20 pages", "Practice Spanish", "Leetcode problem", "Watch a lecture", "Write notes"],
+    "other": ["Call family", "Journal", "Tidy desk", "Cook dinner", "Practice guitar"],
+}
+INSERT_BATCH = 20000
+
+
+def habit_days(rng: random.Random, start: date, today: date, frequency: str) -> list[date]:
+    """Check-in days from `start` to `today` with streaks, lapses and possible abandonment."""
+    adherence = rng.betavariate(5, 2)
+    total = (today - start).days + 1
+    # One habit in six is dropped at some point and never resumed.
+    stop = rng.randrange(total) if rng.random() < 1 / 6 else total
+    days = []
+    if frequency == "weekly":
+        for week in range(0, stop, 7):
+            if rng.random() < adherence:
+                offset = week + rng.randrange(7)
+                if offset < stop:
+                    days.append(start + timedelta(days=offset))
+        return days
+    checked = False
+    for offset in range(stop):
+        # Streaks keep going at the habit's adherence; after a lapse it takes a while to restart.
+        checked = rng.random() < (adherence if checked else adherence * 0.5)
+        if checked:
+            days.append(start + timedelta(days=offset))
+    return days
+
+
+def seed_database(db, users: int, habits: int, years: int, password: str, seed: int = 7) -> dict:
+    """
+    Inserts the dataset through `db` (a Session on an empty schema), including
+    the stats and bitmap tables. Returns row counts.
+    """
+    from sqlalchemy import insert, text
+
+    import auth
+    import bitmap_service
+    import models
+    import stats_service
+
+    rng = random.Random(seed)
+    today = date.today()
+    history = 365 * years
+    hashed_password = auth.get_password_hash(password)
+    # Core inserts on the session's connection: one executemany per batch, no ORM bookkeeping.
+    conn = db.connection()
+
+    conn.execute(insert(models.User.__table__), [
+        {"id": u, "username": f"user{u}", "email": f"user{u}@example.com", "hashed_password": hashed_password}
+        for u in range(1, users + 1)
+    ])
+    habit_rows = []
+    for user_id in range(1, users + 1):
+        for category in rng.choices(CATEGORIES, k=habits):
+            habit_rows.append({
+                "id": len(habit_rows) + 1,
+                "name": rng.choice(HABIT_NAMES[category]),
+                "frequency": "weekly" if rng.random() < 0.2 else "daily",
+                "category": category,
+                # Older habits are more common than brand new ones.
+                "start_date": today - timedelta(days=int(history * rng.random() ** 0.5)),
+                "user_id": user_id,
+            })
+    conn.execute(insert(models.Habit.__table__), habit_rows)
+
+    checkins, batch, bitmaps = 0, [], []
+    for habit in habit_rows:
+        days = habit_days(rng, habit["start_date"], today, habit["frequency"])
+        # The bitmaps come straight from the generated days instead of a rebuild pass.
+        bitmaps.extend(
+            {"habit_id": habit_id, "year": year, "bits": bitmap_service.to_bytes(bits)}
+            for (habit_id, year), bits in bitmap_service.pack_days((habit["id"], day) for day in days).items()
+        )
+        for day in days:
+            batch.append({
+                "habit_id": habit["id"],
+                "checkin_date": day,
+                "status": "completed",
+                "notes": "Felt good" if rng.random() < 0.05 else None,
+            })
+        if len(batch) >= INSERT_BATCH:
+            conn.execute(insert(models.HabitCheckin.__table__), batch)
+            checkins += len(batch)
+            batch = []
+    if batch:
+        conn.execute(insert(models.HabitCheckin.__table__), batch)
+        checkins += len(batch)
+    conn.execute(insert(models.HabitCheckinBitmap.__table__), bitmaps)
+    if db.get_bind().dialect.name == "postgresql":
+        # Explicit ids leave the sequences behind; later inserts would collide.
+        for table in ("users", "habits"):
+            conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"))
+    db.commit()
+
+    stats_service.backfill_habit_stats(db)
+    return {"users": users, "habits": len(habit_rows), "checkins": checkins}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", required=True, help="Target database; its schema is created if missing.")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--habits", type=int, default=5, help="Habits per user.")
+    parser.add_argument("--years", type=int, default=3, help="Years of check-in history.")
+    parser.add_argument("--password", default="password", help="Password of every seeded user.")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed, for reproducible datasets.")
+    args = parser.parse_args()
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from sqlalchemy import func, select
+
+    import models
+    from database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if db.scalar(select(func.count()).select_from(models.User)):
+            sys.exit("The database already has users; seed an empty one.")
+        started = time.perf_counter()
+        counts = seed_database(db, args.users, args.habits, args.years, args.password, args.seed)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - started
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            conn.exec_driver_sql("ANALYZE")
+            conn.commit()
+    print(
+        f"Seeded {counts['users']} users, {counts['habits']} habits and {counts['checkins']} check-ins "
+        f"in {elapsed:.1f}s ({counts['checkins'] / elapsed:.0f} check-ins/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
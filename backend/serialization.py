@@ -0,0 +1,47 @@
+# backend/serialization.py
+
+from typing import Iterable, Sequence
+
+import orjson
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+import models
+
+# The fields of schemas.checkin.CheckIn, selected as plain columns so large
+# lists skip building ORM entities.
+CHECKIN_COLUMNS = (
+    models.HabitCheckin.id,
+    models.HabitCheckin.habit_id,
+    models.HabitCheckin.checkin_date,
+    models.HabitCheckin.notes,
+    models.HabitCheckin.status,
+)
+
+
+def rows_to_dicts(rows: Sequence) -> list:
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def rows_response(rows: Sequence, response: Response) -> ORJSONResponse:
+    """
+    Encodes DB rows straight to JSON with orjson. The rows come from our own
+    columns, so the per-item Pydantic validation of response_model is skipped;
+    routes keep response_model for the OpenAPI schema only. Headers already set
+    on the injected `response` (cursor, validators) are carried over, since a
+    returned Response replaces it.
+    """
+    return json_response(rows_to_dicts(rows), response)
+
+
+def json_response(content, response: Response) -> ORJSONResponse:
+    """Encodes an already shaped payload with orjson, keeping `response`'s headers."""
+    return ORJSONResponse(content, headers=response.headers)
+
+
+def ndjson_chunk(rows: Iterable) -> bytes:
+    """One newline-terminated JSON object per row, as a single chunk."""
+    return b"".join(orjson.dumps(row._asdict()) + b"\n" for row in rows)
@@ -0,0 +1,424 @@
+# backend/stats_service.py
+
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import Integer
+
+import bitmap_service
+from config import CHECKIN_BITMAP_READS
+from database import dialect_insert
+import models
+
+
+class day_number(FunctionElement):
+    """
+    Days since 1970-01-01 for a DATE expression. Consecutive calendar days map to
+    consecutive integers, which is all the gaps-and-islands queries below need.
+    """
+    type = Integer()
+    inherit_cache = True
+
+
+@compiles(day_number)
+def _day_number_default(element, compiler, **kw):
+    # PostgreSQL: date - date yields an integer number of days.
+    return "(%s - DATE '1970-01-01')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(day_number, "sqlite")
+def _day_number_sqlite(element, compiler, **kw):
+    # julianday() of a plain date is always N.5, so truncation is exact;
+    # 2440587 makes 1970-01-01 day 0, as on PostgreSQL.
+    return "(CAST(julianday(%s) AS INTEGER) - 2440587)" % compiler.process(element.clauses, **kw)
+
+
+class month_number(FunctionElement):
+    """Whole number of months for a DATE expression (year * 12 + month)."""
+    type = Integer()
+    inherit_cache = True
+
+
+@compiles(month_number)
+def _month_number_default(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    return "(CAST(EXTRACT(YEAR FROM %s) AS INTEGER) * 12 + CAST(EXTRACT(MONTH FROM %s) AS INTEGER))" % (column, column)
+
+
+@compiles(month_number, "sqlite")
+def _month_number_sqlite(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    return "(CAST(strftime('%%Y', %s) AS INTEGER) * 12 + CAST(strftime('%%m', %s) AS INTEGER))" % (column, column)
+
+
+COMPLETED = "completed"
+
+# 1970-01-01 was a Thursday; shifting by 3 days makes weeks start on Monday,
+# as in analytics_engine.
+_WEEK_SHIFT = 3
+
+
+def period_number(day, frequency):
+    """SQL expression numbering the periods of `frequency` that `day` falls in consecutively."""
+    days = day_number(day)
+    return case(
+        (frequency == "weekly", (days + _WEEK_SHIFT) // 7),
+        (frequency == "monthly", month_number(day)),
+        else_=days,
+    )
+
+
+def period_of(day: date, frequency: str | None) -> int:
+    """Python counterpart of period_number, for comparing two days."""
+    if frequency == "weekly":
+        return (day.toordinal() - 1) // 7  # Day 1 (0001-01-01) was a Monday.
+    if frequency == "monthly":
+        return day.year * 12 + day.month
+    return day.toordinal()
+
+
+def is_simple(habit: models.Habit) -> bool:
+    """Daily habits needing one check-in a day, whose stats are updated incrementally."""
+    return habit.frequency in (None, "daily") and (habit.target or 1) <= 1
+
+
+def checkin_runs(*criteria):
+    """
+    Gaps-and-islands over the periods each habit hit: periods of its frequency
+    (days, Monday-based weeks or months) holding at least `target` (default 1)
+    completed check-ins. Returns a subquery with one row per run of consecutive
+    hit periods: habit_id, run_end (the run's latest check-in day), run_length
+    in periods, and latest (the habit's most recent run_end, repeated on every
+    run of that habit).
+    """
+    required = case((models.Habit.target > 1, models.Habit.target), else_=1)
+    days = (
+        select(
+            models.HabitCheckin.habit_id,
+            models.HabitCheckin.checkin_date,
+            period_number(models.HabitCheckin.checkin_date, models.Habit.frequency).label("period"),
+            required.label("required"),
+        )
+        .join(models.Habit, models.Habit.id == models.HabitCheckin.habit_id)
+        .where(models.HabitCheckin.status == COMPLETED, *criteria)
+        .subquery()
+    )
+    # Grouping on the subquery's columns, so PostgreSQL sees one expression.
+    hits = (
+        select(days.c.habit_id, days.c.period, func.max(days.c.checkin_date).label("last_day"))
+        .group_by(days.c.habit_id, days.c.period)
+        .having(func.count() >= func.max(days.c.required))
+        .subquery()
+    )
+    ranked = select(
+        hits.c.habit_id,
+        hits.c.last_day,
+        (
+            hits.c.period
+            - func.row_number().over(partition_by=hits.c.habit_id, order_by=hits.c.period)
+        ).label("island"),
+    ).subquery()
+    return (
+        select(
+            ranked.c.habit_id,
+            func.max(ranked.c.last_day).label("run_end"),
+            func.count().label("run_length"),
+            func.max(func.max(ranked.c.last_day))
+            .over(partition_by=ranked.c.habit_id)
+            .label("latest"),
+        )
+        .group_by(ranked.c.habit_id, ranked.c.island)
+        .subquery()
+    )
+
+
+def compute_habit_stats(db: Session, *criteria) -> dict[int, dict]:
+    """
+    Full recomputation of the HabitStats columns for habits matching `criteria`,
+    done inside the database. Used for backfills and batch writes, for writes to
+    weekly, monthly or multi-check-in habits, and by remove_checkin when the
+    longest run is broken up. Only completed check-ins count.
+    """
+    runs = checkin_runs(*criteria)
+    rows = db.execute(
+        select(
+            runs.c.habit_id,
+            func.max(runs.c.run_length),
+            func.max(runs.c.latest),
+            func.max(case((runs.c.run_end == runs.c.latest, runs.c.run_length), else_=0)),
+        ).group_by(runs.c.habit_id)
+    )
+    stats = {
+        habit_id: {
+            "longest_streak": longest,
+            "last_checkin_date": latest,
+            "current_streak": current,
+            "total_checkins": 0,
+        }
+        for habit_id, longest, latest, current in rows
+    }
+    totals = db.execute(
+        select(models.HabitCheckin.habit_id, func.count())
+        .join(models.Habit, models.Habit.id == models.HabitCheckin.habit_id)
+        .where(models.HabitCheckin.status == COMPLETED, *criteria)
+        .group_by(models.HabitCheckin.habit_id)
+    )
+    for habit_id, total in totals:
+        stats.setdefault(
+            habit_id, {"longest_streak": 0, "last_checkin_date": None, "current_streak": 0}
+        )["total_checkins"] = total
+    return stats
+
+
+def _locked_stats_rows(db: Session, habit_ids: list[int]) -> dict[int, models.HabitStats]:
+    """
+    The habits' HabitStats rows, locked FOR UPDATE. FOR UPDATE locks nothing
+    that does not exist yet, so missing rows are inserted first with ON CONFLICT
+    DO NOTHING: of two concurrent first check-ins, the second waits for the
+    first's row instead of adding its own and breaking the unique habit_id.
+    """
+    def locked(ids: list[int]) -> dict[int, models.HabitStats]:
+        query = select(models.HabitStats).where(models.HabitStats.habit_id.in_(ids)).with_for_update()
+        return {habit_stats.habit_id: habit_stats for habit_stats in db.scalars(query)}
+
+    rows = locked(habit_ids)
+    missing = [habit_id for habit_id in habit_ids if habit_id not in rows]
+    if missing:
+        _insert_stats(db, missing)
+        rows.update(locked(missing))
+    return rows
+
+
+def _insert_stats(db: Session, habit_ids: list[int]) -> None:
+    """Inserts zeroed HabitStats rows, skipping habits that already have one."""
+    db.execute(
+        dialect_insert(db)(models.HabitStats.__table__)
+        .values([
+            {"habit_id": habit_id, "current_streak": 0, "longest_streak": 0, "total_checkins": 0}
+            for habit_id in habit_ids
+        ])
+        .on_conflict_do_nothing(index_elements=["habit_id"])
+    )
+
+
+def _locked_stats(db: Session, habit_id: int) -> models.HabitStats:
+    return _locked_stats_rows(db, [habit_id])[habit_id]
+
+
+def _day_count(db: Session, habit_id: int, day: date) -> int:
+    return (
+        db.query(func.count(models.HabitCheckin.id))
+        .filter(
+            models.HabitCheckin.habit_id == habit_id,
+            models.HabitCheckin.checkin_date == day,
+            models.HabitCheckin.status == COMPLETED,
+        )
+        .scalar()
+    )
+
+
+def _run_length(db: Session, habit_id: int, start: date, step: int) -> int:
+    """
+    Number of consecutive check-in days beginning at `start` and walking one day
+    at a time in the direction of `step` (+1 or -1). Only the run itself is read.
+    """
+    column = models.HabitCheckin.checkin_date
+    query = (
+        select(column)
+        .where(models.HabitCheckin.habit_id == habit_id, models.HabitCheckin.status == COMPLETED)
+        .where(column >= start if step > 0 else column <= start)
+        .distinct()
+        .order_by(column if step > 0 else column.desc())
+        .execution_options(yield_per=256)
+    )
+    length = 0
+    expected = start
+    result = db.scalars(query)
+    for day in result:
+        if day != expected:
+            break
+        length += 1
+        expected += timedelta(days=step)
+    result.close()
+    return length
+
+
+def _history(db: Session, habit_id: int, day: date) -> Optional[bitmap_service.History]:
+    """
+    The habit's completed days from its bitmaps when CHECKIN_BITMAP_READS is set,
+    else None and the runs are read from the check-in rows. Needs the bitmaps
+    already updated for the write, i.e. bitmap_service called first.
+    """
+    if not CHECKIN_BITMAP_READS:
+        return None
+    histories = bitmap_service.load_histories(db, models.Habit.id == habit_id)
+    return histories.get(habit_id, bitmap_service.History(origin=day, bits=0))
+
+
+def _runs_around(db: Session, habit_id: int, day: date, history: Optional[bitmap_service.History]) -> tuple[int, int]:
+    """Lengths of the runs ending the day before `day` and starting the day after."""
+    before, after = day - timedelta(days=1), day + timedelta(days=1)
+    if history is not None:
+        return history.run_ending(before), history.run_starting(after)
+    return _run_length(db, habit_id, before, -1), _run_length(db, habit_id, after, 1)
+
+
+def record_checkin(db: Session, habit_id: int, day: date, status: str = COMPLETED) -> None:
+    """
+    Updates HabitStats for a check-in on `day`. Call after the new row has been
+    flushed and before commit so both land in the same transaction. Daily habits
+    are updated from the run around `day`; other habits are recomputed.
+    """
+    if status != COMPLETED:
+        return
+    if not is_simple(db.get(models.Habit, habit_id)):
+        refresh_habit_stats(db, [habit_id])
+        return
+    habit_stats = _locked_stats(db, habit_id)
+    habit_stats.total_checkins += 1
+    if _day_count(db, habit_id, day) > 1:
+        return  # The day was already checked in; runs are unchanged.
+
+    history = _history(db, habit_id, day)
+    before, after = _runs_around(db, habit_id, day, history)
+    run = before + 1 + after
+    habit_stats.longest_streak = max(habit_stats.longest_streak, run)
+
+    last = habit_stats.last_checkin_date
+    if last is None or day > last:
+        habit_stats.last_checkin_date = day
+        habit_stats.current_streak = run
+    elif day + timedelta(days=after) == last:
+        habit_stats.current_streak = run
+
+
+def remove_checkin(db: Session, habit_id: int, day: date, status: str = COMPLETED) -> None:
+    """
+    Updates HabitStats after a check-in on `day` was deleted. Call after the
+    delete has been flushed and before commit. For daily habits only the run
+    that contained `day` is re-read, except when that run was the habit's
+    longest; other habits are recomputed.
+    """
+    if status != COMPLETED:
+        return
+    if not is_simple(db.get(models.Habit, habit_id)):
+        refresh_habit_stats(db, [habit_id])
+        return
+    habit_stats = _locked_stats(db, habit_id)
+    habit_stats.total_checkins = max(habit_stats.total_checkins - 1, 0)
+    if _day_count(db, habit_id, day) > 0:
+        return  # Another check-in still covers the day.
+
+    history = _history(db, habit_id, day)
+    before, after = _runs_around(db, habit_id, day, history)
+
+    last = habit_stats.last_checkin_date
+    if last is not None and day + timedelta(days=after) == last:
+        if after:
+            habit_stats.current_streak = after
+        elif before:
+            habit_stats.last_checkin_date = day - timedelta(days=1)
+            habit_stats.current_streak = before
+        elif history is not None:
+            previous = history.last_day()
+            habit_stats.last_checkin_date = previous
+            habit_stats.current_streak = history.run_ending(previous) if previous else 0
+        else:
+            previous = (
+                db.query(func.max(models.HabitCheckin.checkin_date))
+                .filter(models.HabitCheckin.habit_id == habit_id, models.HabitCheckin.status == COMPLETED)
+                .scalar()
+            )
+            habit_stats.last_checkin_date = previous
+            habit_stats.current_streak = _run_length(db, habit_id, previous, -1) if previous else 0
+
+    if before + 1 + after >= habit_stats.longest_streak:
+        # The split run may have been the only one of that length.
+        if history is not None:
+            habit_stats.longest_streak = history.longest_run()
+        else:
+            recomputed = compute_habit_stats(db, models.Habit.id == habit_id)
+            habit_stats.longest_streak = recomputed.get(habit_id, {}).get("longest_streak", 0)
+
+
+def refresh_habit_stats(db: Session, habit_ids: list[int]) -> None:
+    """
+    Recomputes HabitStats for the given habits with set-based queries. Used where
+    many check-ins change at once; the caller commits.
+    """
+    computed = compute_habit_stats(db, models.Habit.id.in_(habit_ids))
+    existing = _locked_stats_rows(db, habit_ids)
+    for habit_id in habit_ids:
+        values = computed.get(
+            habit_id,
+            {"current_streak": 0, "longest_streak": 0, "total_checkins": 0, "last_checkin_date": None},
+        )
+        for field, value in values.items():
+            setattr(existing[habit_id], field, value)
+
+
+def backfill_habit_stats(db: Session, chunk_size: int = 500) -> int:
+    """
+    Rebuilds HabitStats for every habit, a chunk of habits at a time. Returns the
+    number of habits processed.
+    """
+    processed = 0
+    last_id = 0
+    while True:
+        habit_ids = [
+            habit_id
+            for (habit_id,) in db.query(models.Habit.id)
+            .filter(models.Habit.id > last_id)
+            .order_by(models.Habit.id)
+            .limit(chunk_size)
+        ]
+        if not habit_ids:
+            return processed
+        refresh_habit_stats(db, habit_ids)
+        db.commit()
+        processed += len(habit_ids)
+        last_id = habit_ids[-1]
+
+
+def live_streak(
+    habit_stats: models.HabitStats | None, frequency: str | None = "daily", today: date | None = None
+) -> int:
+    """
+    The stored run only counts as a streak while its last period is the current
+    or the previous one of the habit's frequency: today or yesterday for daily
+    habits, this or last week for weekly ones.
+    """
+    if habit_stats is None or habit_stats.last_checkin_date is None:
+        return 0
+    today = today or date.today()
+    last = habit_stats.last_checkin_date
+    if last <= today and period_of(last, frequency) >= period_of(today, frequency) - 1:
+        return habit_stats.current_streak
+    return 0
+
+
+def get_user_stats(db: Session, user_id: int) -> dict:
+    """
+    Builds the AnalyticsStats payload for a user from the maintained HabitStats
+    rows, in a single query whose cost depends only on the number of habits.
+    """
+    rows = (
+        db.query(models.Habit.id, models.Habit.frequency, models.HabitStats)
+        .outerjoin(models.HabitStats, models.HabitStats.habit_id == models.Habit.id)
+        .filter(models.Habit.user_id == user_id)
+        .all()
+    )
+    today = date.today()
+    streaks = {
+        str(habit_id): live_streak(habit_stats, frequency, today) for habit_id, frequency, habit_stats in rows
+    }
+    return {
+        "total_habits": len(rows),
+        "total_checkins": sum(s.total_checkins for _, _, s in rows if s is not None),
+        "longest_streak": max(streaks.values(), default=0),
+        "streaks": streaks,
+    }
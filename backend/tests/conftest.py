@@ -0,0 +1,94 @@
+# backend/tests/conftest.py
+"""
+Shared fixtures. The suite runs against a throwaway SQLite file, set up before
+any application module reads DATABASE_URL:
+
+    cd backend && python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+_database_dir = tempfile.mkdtemp(prefix="habithero-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_database_dir, 'test.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.pop("DATABASE_REPLICA_URL", None)
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def engine():
+    import models  # noqa: F401  (registers the tables)
+    from database import Base, engine
+
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    """
+    A session on the test database; every table is emptied afterwards, and the
+    per-process caches with it, since user ids and versions start over.
+    """
+    import auth
+    import cache
+    from database import Base, SessionLocal
+
+    session = SessionLocal()
+    yield session
+    session.rollback()
+    for table in reversed(Base.metadata.sorted_tables):
+        session.execute(table.delete())
+    session.commit()
+    session.close()
+    auth.principal_cache.clear()
+    cache.backend = cache.create_backend("memory")
+
+
+@pytest.fixture(scope="session")
+def client(engine):
+    """The app behind an in-process client, with its startup and shutdown hooks run once."""
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def user(db):
+    import models
+
+    user = models.User(username="tester", email="tester@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def headers(user):
+    """Bearer token of `user`."""
+    import auth
+
+    return {"Authorization": f"Bearer {auth.create_user_token(user)}"}
+
+
+@pytest.fixture
+def max_queries():
+    """
+    query_profiler.assert_max_queries: fails the test when the block runs more
+    statements than allowed, on any engine, listing the most frequent ones.
+
+        with max_queries(3, "GET /dashboard/"):
+            client.get("/dashboard/", headers=headers)
+    """
+    from query_profiler import assert_max_queries
+
+    return assert_max_queries
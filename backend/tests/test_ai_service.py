@@ -0,0 +1,174 @@
+# backend/tests/test_ai_service.py
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import ai_service
+from ai_service import CircuitBreaker, SuggestionCache, UpstreamUnavailable, summary_key
+
+
+class FakeGroq:
+    """Stands in for the Groq client; calls wait for `gate` and raise while `failing`."""
+
+    def __init__(self):
+        self.calls = 0
+        self.failing = False
+        self.gate = threading.Event()
+        self.gate.set()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        self.gate.wait(5)
+        if self.failing:
+            raise ConnectionError("upstream down")
+        content = json.dumps({"suggestions": [
+            {"name": f"Suggestion {i}", "description": "Small steps.", "category": "health", "frequency": "daily"}
+            for i in range(4)
+        ]})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def groq():
+    saved = ai_service.client, ai_service._client_ready
+    fake = FakeGroq()
+    ai_service.shutdown()  # A fresh pool, sized by the test's AI_MAX_CONCURRENCY.
+    ai_service.set_client(fake)
+    yield fake
+    fake.gate.set()
+    ai_service.shutdown()
+    ai_service.set_client(saved[0])
+    ai_service._client_ready = saved[1]
+
+
+HABITS = [
+    {"name": "Morning run", "category": "health", "frequency": "daily"},
+    {"name": "Read", "category": "learning", "frequency": "daily"},
+]
+
+
+def test_summary_key_ignores_order_case_whitespace_and_duplicates():
+    shuffled = [
+        {"name": "read ", "category": "Learning", "frequency": "daily"},
+        {"name": "Morning   run", "category": "health", "frequency": "daily"},
+        {"name": "Read", "category": "learning", "frequency": "daily"},
+    ]
+    assert summary_key(shuffled) == summary_key(HABITS)
+    assert summary_key(HABITS[:1]) != summary_key(HABITS)
+
+
+def test_concurrent_misses_share_one_upstream_call_and_then_hit(groq):
+    groq.gate.clear()
+    before = dict(ai_service.suggestion_cache.stats)
+
+    async def run():
+        waiting = [asyncio.ensure_future(ai_service.get_suggestion_pool(HABITS)) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        groq.gate.set()
+        pools = await asyncio.gather(*waiting)
+        return pools, await ai_service.get_suggestion_pool(list(reversed(HABITS)))
+
+    pools, cached = asyncio.run(run())
+    stats = ai_service.suggestion_cache.stats
+    assert groq.calls == 1
+    assert stats["coalesced"] - before["coalesced"] == 4
+    assert stats["hits"] - before["hits"] == 1
+    assert all(pool is pools[0] for pool in pools) and cached is pools[0]
+    assert ai_service.metrics()["inflight"] == 0
+
+
+def test_failed_fetch_is_not_cached(groq):
+    groq.failing = True
+    with pytest.raises(ConnectionError):
+        asyncio.run(ai_service.get_suggestion_pool(HABITS))
+    groq.failing = False
+    assert len(asyncio.run(ai_service.get_suggestion_pool(HABITS))) == 4
+    assert groq.calls == 2
+
+
+def test_suggestions_the_user_already_has_are_dropped(groq):
+    pool = asyncio.run(ai_service.get_suggestion_pool([
+        {"name": "suggestion  0", "category": "health", "frequency": "daily"},
+    ]))
+    assert [s.name for s in pool] == ["Suggestion 1", "Suggestion 2", "Suggestion 3"]
+
+
+def test_cache_evicts_least_recently_used_and_expired_pools(monkeypatch):
+    cache = SuggestionCache(maxsize=2, ttl=60)
+    cache.put("a", ["A"])
+    cache.put("b", ["B"])
+    assert cache.get("a") == ["A"]
+    cache.put("c", ["C"])
+    assert cache.get("b") is None
+    assert cache.get("a") == ["A"] and cache.get("c") == ["C"]
+
+    now = ai_service.time.monotonic()
+    monkeypatch.setattr(ai_service.time, "monotonic", lambda: now + 61)
+    assert cache.get("a") is None
+
+
+def test_breaker_opens_probes_once_half_open_and_closes_on_success():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    breaker.opened_at -= 31
+    assert breaker.allow()  # The probe.
+    assert breaker.state == "half_open"
+    assert not breaker.allow()  # Everyone else waits for the probe.
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    assert breaker.times_opened == 2
+
+    breaker.opened_at -= 31
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+    assert breaker.allow() and breaker.allow()
+
+
+def test_open_breaker_short_circuits_upstream_calls(groq, monkeypatch):
+    monkeypatch.setattr(ai_service.breaker, "failure_threshold", 1)
+    groq.failing = True
+    with pytest.raises(ConnectionError):
+        asyncio.run(ai_service.get_suggestion_pool(HABITS))
+    assert ai_service.breaker.state == "open"
+
+    skipped = ai_service.metrics()["upstream"]["short_circuited"]
+    with pytest.raises(UpstreamUnavailable):
+        asyncio.run(ai_service.get_suggestion_pool(HABITS))
+    assert groq.calls == 1
+    assert ai_service.metrics()["upstream"]["short_circuited"] == skipped + 1
+
+    # After the reset timeout one probe goes through and closes the breaker.
+    groq.failing = False
+    ai_service.breaker.opened_at -= ai_service.breaker.reset_timeout
+    assert len(asyncio.run(ai_service.get_suggestion_pool(HABITS))) == 4
+    assert ai_service.breaker.state == "closed"
+
+
+def test_calls_beyond_the_concurrency_cap_are_rejected(groq, monkeypatch):
+    monkeypatch.setattr(ai_service, "AI_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(ai_service, "AI_TIMEOUT_SECONDS", 0.05)
+    groq.gate.clear()
+    rejected = ai_service.metrics()["upstream"]["rejected"]
+
+    # The first call times out, but its thread keeps the only slot until Groq returns.
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(ai_service.get_suggestion_pool(HABITS))
+    assert ai_service._busy == 1
+    with pytest.raises(UpstreamUnavailable):
+        asyncio.run(ai_service.get_suggestion_pool(HABITS[:1]))
+    assert ai_service.metrics()["upstream"]["rejected"] == rejected + 1
+    assert groq.calls == 1
+
+    groq.gate.set()
+    ai_service._executor.submit(lambda: None).result(5)  # The slot is freed as the thread returns.
+    assert ai_service._busy == 0
+    assert len(asyncio.run(ai_service.get_suggestion_pool(HABITS[:1]))) == 4
@@ -0,0 +1,107 @@
+# backend/tests/test_analytics_service.py
+import random
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+import analytics_service
+import bitmap_service
+import models
+from analytics_service import bucket_start, month_start, week_start
+
+# Spans two year ends, the 2024 leap day and weeks split across months and years.
+FIRST, LAST = date(2023, 12, 18), date(2025, 1, 19)
+
+
+def add_habit(db, user, name, category, start_date, checkins):
+    habit = models.Habit(name=name, frequency="daily", category=category, start_date=start_date, user_id=user.id)
+    db.add(habit)
+    db.flush()
+    db.add_all(models.HabitCheckin(habit_id=habit.id, checkin_date=day, status=status) for day, status in checkins)
+    return habit
+
+
+def every_day(first: date, last: date):
+    return [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+
+
+def test_sqlite_buckets_start_where_postgresql_date_trunc_does(db, user):
+    add_habit(db, user, "Run", "health", FIRST, [(day, "completed") for day in every_day(FIRST, LAST)])
+    db.commit()
+
+    column = models.HabitCheckin.checkin_date
+    rows = db.execute(select(column, week_start(column), month_start(column)).order_by(column)).all()
+    assert len(rows) == (LAST - FIRST).days + 1
+    # date_trunc('week') starts ISO weeks on Monday; bucket_start mirrors it in Python.
+    assert [(day, week, month) for day, week, month in rows] == [
+        (day, bucket_start(day, "week"), bucket_start(day, "month")) for day, _, _ in rows
+    ]
+
+    compiled = str(select(week_start(column), month_start(column)).compile(dialect=postgresql.dialect()))
+    assert "CAST(date_trunc('week', habit_checkins.checkin_date) AS DATE)" in compiled
+    assert "CAST(date_trunc('month', habit_checkins.checkin_date) AS DATE)" in compiled
+
+
+@pytest.fixture
+def seeded(db, user):
+    """Habits in two categories with a year of random check-ins, a fifth of them skipped."""
+    rng = random.Random(5)
+    habits = []
+    for name, category, start in (
+        ("Run", "health", FIRST),
+        ("Read", "learning", FIRST + timedelta(days=40)),
+        ("Write", "learning", date(2024, 12, 30)),
+    ):
+        checkins = [
+            (day, "completed" if rng.random() < 0.8 else "skipped")
+            for day in every_day(start, LAST)
+            if rng.random() < 0.6
+        ]
+        habits.append(add_habit(db, user, name, category, start, checkins))
+    db.flush()
+    bitmap_service.refresh_bitmaps(db, [habit.id for habit in habits])
+    db.commit()
+    return habits
+
+
+@pytest.mark.parametrize("bucket", ["day", "week", "month"])
+@pytest.mark.parametrize("since, until", [(FIRST, LAST), (date(2024, 2, 27), date(2024, 3, 4)), (date(2024, 12, 31), LAST)])
+def test_bitmap_reads_match_row_reads(db, user, seeded, monkeypatch, bucket, since, until):
+    for filters in ({}, {"habit_ids": [seeded[1].id]}, {"categories": ["learning"]}):
+        results = {}
+        for bitmap_reads in (False, True):
+            monkeypatch.setattr(analytics_service, "CHECKIN_BITMAP_READS", bitmap_reads)
+            results[bitmap_reads] = (
+                analytics_service.get_heatmap(db, user.id, since, until, bucket, **filters),
+                analytics_service.get_series(db, user.id, since, until, bucket, **filters),
+            )
+        assert results[True] == results[False]
+        heatmap, series = results[False]
+        assert sum(heatmap["counts"]) == sum(series["totals"]) > 0
+
+
+def test_series_counts_and_ratios(client, headers):
+    monday = date(2026, 3, 2)
+    body = {"name": "Run", "frequency": "daily", "category": "health", "start_date": monday.isoformat()}
+    habit_id = client.post("/habits/", json=body, headers=headers).json()["id"]
+    for offset, status in ((0, "completed"), (1, "completed"), (2, "skipped"), (7, "completed")):
+        day = (monday + timedelta(days=offset)).isoformat()
+        client.post(f"/habits/{habit_id}/checkins/", json={"checkin_date": day, "status": status}, headers=headers)
+
+    params = {"since": monday.isoformat(), "until": (monday + timedelta(days=10)).isoformat(), "bucket": "week"}
+    series = client.get("/analytics/series", params=params, headers=headers).json()
+    assert series["starts"] == [monday.isoformat(), (monday + timedelta(days=7)).isoformat()]
+    assert series["habit_ids"] == [habit_id]
+    assert series["counts"] == [[2, 1]]
+    assert series["ratios"] == [round(2 / 7, 4), round(1 / 4, 4)]
+
+    heatmap = client.get("/analytics/heatmap", params={**params, "bucket": "day"}, headers=headers).json()
+    assert heatmap["starts"] == [(monday + timedelta(days=d)).isoformat() for d in (0, 1, 7)]
+    assert heatmap["counts"] == [1, 1, 1]
+
+
+def test_reversed_or_oversized_range_is_rejected(client, headers):
+    assert client.get("/analytics/series", params={"since": "2026-02-01", "until": "2026-01-01"}, headers=headers).status_code == 400
+    assert client.get("/analytics/heatmap", params={"since": "2010-01-01", "until": "2026-01-01"}, headers=headers).status_code == 400
@@ -0,0 +1,40 @@
+# backend/tests/test_auth.py
+import asyncio
+
+from sqlalchemy import delete, update
+
+import auth
+import cache
+import models
+
+
+def test_logout_revokes_issued_tokens(client, user, headers):
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    assert client.post("/auth/logout", headers=headers).status_code == 204
+    assert client.get("/auth/me", headers=headers).status_code == 401
+    assert asyncio.run(cache.backend.get_marks(user.id, ("token_version",))) == [1]
+
+
+def test_logout_of_deleted_user_is_unauthorized(db, client, user, headers):
+    assert client.get("/auth/me", headers=headers).status_code == 200  # Caches the principal.
+    # A Core delete, as another worker's would be: no mapper event evicts the principal here.
+    db.execute(delete(models.User).where(models.User.id == user.id))
+    db.commit()
+    assert client.post("/auth/logout", headers=headers).status_code == 401
+
+
+def test_logout_on_another_worker_revokes_cached_principal(db, client, user, headers, monkeypatch, tmp_path):
+    url = str(tmp_path / "cache.db")
+    monkeypatch.setattr(cache, "backend", cache.create_backend("sqlite", url))
+    assert client.get("/auth/me", headers=headers).status_code == 200  # Caches the principal.
+
+    # Another worker's logout: it bumps the version and publishes it through the
+    # shared backend; this worker's principal cache is never told directly.
+    db.execute(update(models.User).where(models.User.id == user.id).values(token_version=1))
+    db.commit()
+    other = cache.create_backend("sqlite", url)
+    asyncio.run(other.set_mark(user.id, "token_version", 1, 60))
+    asyncio.run(other.close())
+
+    assert client.get("/auth/me", headers=headers).status_code == 401
+    assert auth.principal_cache.get(user.id).token_version == 1
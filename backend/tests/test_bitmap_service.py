@@ -0,0 +1,59 @@
+# backend/tests/test_bitmap_service.py
+from datetime import date, timedelta
+
+import bitmap_service
+import models
+
+DAY = date(2026, 3, 10)
+
+
+def add_habit(db, user):
+    habit = models.Habit(
+        name="Read", frequency="daily", category="learning", start_date=date(2025, 1, 1), user_id=user.id
+    )
+    db.add(habit)
+    db.commit()
+    return habit
+
+
+def test_set_days_merges_a_year_inserted_concurrently(db, user, monkeypatch):
+    habit_id = add_habit(db, user).id
+    bitmap_service.set_day(db, habit_id, DAY)
+    db.commit()
+    db.expunge_all()
+
+    # The first read misses the row, as if another transaction inserted it just after.
+    read = bitmap_service._bitmap_rows
+    reads = []
+
+    def stale_first(db, habit_ids, lock=False):
+        reads.append(habit_ids)
+        return {} if len(reads) == 1 else read(db, habit_ids, lock)
+
+    monkeypatch.setattr(bitmap_service, "_bitmap_rows", stale_first)
+    bitmap_service.set_day(db, habit_id, DAY + timedelta(days=1))
+    db.commit()
+
+    assert len(reads) == 2
+    history = bitmap_service.load_histories(db, models.Habit.id == habit_id)[habit_id]
+    assert history.has(DAY) and history.has(DAY + timedelta(days=1))
+
+
+def test_only_completed_checkins_set_bits(db, user):
+    habit = add_habit(db, user)
+    bitmap_service.set_day(db, habit.id, DAY, "skipped")
+    db.commit()
+    assert bitmap_service.load_histories(db, models.Habit.id == habit.id) == {}
+
+
+def test_history_runs():
+    days = [DAY + timedelta(days=offset) for offset in (0, 1, 2, 5, 6, 7, 8)]
+    history = bitmap_service.History(
+        origin=DAY, bits=sum(1 << (day - DAY).days for day in days)
+    )
+    assert history.run_ending(DAY + timedelta(days=2)) == 3
+    assert history.run_starting(DAY + timedelta(days=1)) == 2
+    assert history.run_starting(DAY + timedelta(days=3)) == 0
+    assert history.run_starting(DAY - timedelta(days=1)) == 0
+    assert history.longest_run() == 4
+    assert history.last_day() == DAY + timedelta(days=8)
@@ -0,0 +1,47 @@
+# backend/tests/test_cache.py
+import asyncio
+
+import pytest
+
+import auth
+import cache
+from benchmarks.redis_stub_server import start_stub_server
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def shared_backends(request, tmp_path):
+    """Two instances of a shared backend, as two workers would open it."""
+    stub = start_stub_server() if request.param == "redis" else None
+    url = stub.url if stub else str(tmp_path / "cache.db")
+    yield cache.create_backend(request.param, url), cache.create_backend(request.param, url)
+    if stub:
+        stub.shutdown()
+
+
+def test_marks_are_shared_and_expire(shared_backends):
+    worker, other = shared_backends
+
+    async def run():
+        await other.set_mark(7, "read_primary", 1, 0.2)
+        assert await worker.get_marks(7, ("read_primary", "unset")) == [1, None]
+        assert await worker.get_marks(8, ("read_primary",)) == [None]
+        await asyncio.sleep(0.3)
+        assert await worker.get_marks(7, ("read_primary",)) == [None]
+        await worker.close()
+        await other.close()
+
+    asyncio.run(run())
+
+
+def test_write_pins_reads_on_every_worker(client, user, headers, monkeypatch, tmp_path):
+    monkeypatch.setattr(auth, "DATABASE_REPLICA_URL", "postgresql://replica/habit_hero")
+    url = str(tmp_path / "cache.db")
+    monkeypatch.setattr(cache, "backend", cache.create_backend("sqlite", url))
+    # Another worker's view of the same backend.
+    other = cache.create_backend("sqlite", url)
+
+    assert client.get("/habits/", headers=headers).status_code == 200
+    assert asyncio.run(other.get_marks(user.id, ("read_primary",))) == [None]
+    assert client.post("/habits/", json={"name": "Read", "frequency": "daily", "category": "Learning", "start_date": "2026-01-01"}, headers=headers).status_code == 200
+    assert asyncio.run(other.get_marks(user.id, ("read_primary",))) == [1]
+    asyncio.run(other.close())
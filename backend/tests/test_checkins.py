@@ -0,0 +1,80 @@
+# backend/tests/test_checkins.py
+from datetime import date, timedelta
+
+import pytest
+
+import models
+from routers import habits as habits_router
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def habit_id(client, headers):
+    body = {"name": "Read", "frequency": "daily", "category": "learning", "start_date": "2026-01-01"}
+    response = client.post("/habits/", json=body, headers=headers)
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def stats_of(db, habit_id):
+    db.expire_all()
+    return db.query(models.HabitStats).filter_by(habit_id=habit_id).one()
+
+
+def test_replayed_checkin_returns_the_recorded_row(db, client, headers, habit_id):
+    body = {"checkin_date": TODAY.isoformat(), "status": "completed"}
+    first = client.post(f"/habits/{habit_id}/checkins/", json=body, headers=headers)
+    replay = client.post(f"/habits/{habit_id}/checkins/", json=body, headers=headers)
+    assert first.status_code == replay.status_code == 200
+    assert replay.json() == first.json()
+    assert stats_of(db, habit_id).total_checkins == 1
+
+
+def test_checkin_with_different_fields_for_a_recorded_day_conflicts(db, client, headers, habit_id):
+    url = f"/habits/{habit_id}/checkins/"
+    skipped = client.post(url, json={"checkin_date": TODAY.isoformat(), "status": "skipped"}, headers=headers)
+    assert skipped.status_code == 200
+
+    response = client.post(url, json={"checkin_date": TODAY.isoformat(), "status": "completed"}, headers=headers)
+    assert response.status_code == 409
+    assert client.get(url, headers=headers).json() == [skipped.json()]
+    assert stats_of(db, habit_id).total_checkins == 0
+
+
+def test_batch_reports_each_outcome_in_request_order(db, client, headers, habit_id):
+    day = lambda offset: (TODAY - timedelta(days=offset)).isoformat()
+    client.post(f"/habits/{habit_id}/checkins/", json={"checkin_date": day(0)}, headers=headers)
+
+    response = client.post("/habits/checkins/batch", headers=headers, json={"checkins": [
+        {"habit_id": habit_id, "checkin_date": day(1)},
+        {"habit_id": habit_id, "checkin_date": day(0)},  # Recorded above.
+        {"habit_id": habit_id + 1000, "checkin_date": day(1)},  # Not the user's.
+        {"habit_id": habit_id, "checkin_date": day(1)},  # Repeated within the batch.
+    ]})
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["result"] for r in results] == ["created", "duplicate", "not_found", "duplicate"]
+    assert results[0]["id"] == results[3]["id"] is not None
+    assert results[1]["id"] is not None and results[2]["id"] is None
+
+    stats = stats_of(db, habit_id)
+    assert (stats.total_checkins, stats.current_streak) == (2, 2)
+
+
+def test_batch_inserts_in_chunks(db, client, headers, habit_id, monkeypatch):
+    monkeypatch.setattr(habits_router, "BATCH_INSERT_CHUNK", 2)
+    days = [(TODAY - timedelta(days=offset)).isoformat() for offset in range(5)]
+
+    response = client.post("/habits/checkins/batch", headers=headers, json={
+        "checkins": [{"habit_id": habit_id, "checkin_date": day} for day in days]
+    })
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["result"] for r in results] == ["created"] * 5
+    assert len({r["id"] for r in results}) == 5
+
+    listed = client.get(f"/habits/{habit_id}/checkins/", headers=headers).json()
+    assert sorted(c["checkin_date"] for c in listed) == sorted(days)
+    stats = stats_of(db, habit_id)
+    assert (stats.total_checkins, stats.current_streak, stats.longest_streak) == (5, 5, 5)
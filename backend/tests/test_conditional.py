@@ -0,0 +1,15 @@
+# backend/tests/test_conditional.py
+from metrics import CONDITIONAL_REQUESTS
+
+
+def test_not_modified_answers_are_counted(client, headers):
+    series = CONDITIONAL_REQUESTS.series
+    before = {result: series.get(("/habits/", result), 0) for result in ("modified", "not_modified")}
+
+    first = client.get("/habits/", headers=headers)
+    assert first.status_code == 200
+    again = client.get("/habits/", headers={**headers, "If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+
+    assert series[("/habits/", "modified")] - before["modified"] == 1
+    assert series[("/habits/", "not_modified")] - before["not_modified"] == 1
@@ -0,0 +1,71 @@
+# backend/tests/test_dashboard.py
+from datetime import date, timedelta
+
+import pytest
+
+TODAY = date.today()
+
+
+def add_habit(client, headers, name, frequency):
+    body = {"name": name, "frequency": frequency, "category": "health", "start_date": "2026-01-01"}
+    response = client.post("/habits/", json=body, headers=headers)
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def check_in(client, headers, habit_id, *offsets):
+    for offset in offsets:
+        day = (TODAY - timedelta(days=offset)).isoformat()
+        assert client.post(f"/habits/{habit_id}/checkins/", json={"checkin_date": day}, headers=headers).status_code == 200
+
+
+@pytest.fixture
+def habits(client, headers):
+    daily = add_habit(client, headers, "Run", "daily")
+    weekly = add_habit(client, headers, "Swim", "weekly")
+    idle = add_habit(client, headers, "Read", "daily")
+    check_in(client, headers, daily, 0, 1, 2, 5, 6, 7, 8)
+    check_in(client, headers, weekly, 7, 0)
+    return daily, weekly, idle
+
+
+def test_dashboard_lists_habits_with_streaks_and_the_checkin_window(client, headers, habits):
+    daily, weekly, idle = habits
+    response = client.get("/dashboard/", params={"days": 3}, headers=headers)
+    assert response.status_code == 200
+    dashboard = response.json()
+
+    assert dashboard["today"] == TODAY.isoformat()
+    assert dashboard["since"] == (TODAY - timedelta(days=2)).isoformat()
+    by_id = {habit["id"]: habit for habit in dashboard["habits"]}
+    assert list(by_id) == [daily, weekly, idle]
+    summary = {
+        habit_id: (h["streak"], h["longest_streak"], h["total_checkins"], h["completed_today"])
+        for habit_id, h in by_id.items()
+    }
+    assert summary == {daily: (3, 4, 7, True), weekly: (2, 2, 2, True), idle: (0, 0, 0, False)}
+    assert by_id[daily]["last_checkin_date"] == TODAY.isoformat()
+
+    window = [(c["habit_id"], c["checkin_date"]) for c in dashboard["checkins"]]
+    assert sorted(window) == sorted(
+        [(daily, (TODAY - timedelta(days=d)).isoformat()) for d in (0, 1, 2)] + [(weekly, TODAY.isoformat())]
+    )
+    assert [c["checkin_date"] for c in dashboard["checkins"]] == sorted(c["checkin_date"] for c in dashboard["checkins"])
+
+
+def test_dashboard_totals_match_analytics_stats(client, headers, habits):
+    dashboard = client.get("/dashboard/", headers=headers).json()
+    stats = client.get("/analytics/stats", headers=headers).json()
+    assert dashboard["stats"] == stats
+    assert stats["total_habits"] == 3 and stats["total_checkins"] == 9
+
+
+def test_unchanged_dashboard_answers_304_until_a_write(client, headers, habits):
+    daily, _, idle = habits
+    etag = client.get("/dashboard/", headers=headers).headers["etag"]
+    assert client.get("/dashboard/", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    check_in(client, headers, idle, 0)
+    response = client.get("/dashboard/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert next(h for h in response.json()["habits"] if h["id"] == idle)["completed_today"]
@@ -0,0 +1,95 @@
+# backend/tests/test_pagination.py
+"""Keyset paging of habits and check-ins, and NDJSON streaming of check-ins."""
+import json
+from datetime import date, timedelta
+
+import pytest
+
+import models
+from pagination import NEXT_CURSOR_HEADER, encode_cursor
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def habits(db, user):
+    """Three habits with check-ins on shared days, so pages split ties on date."""
+    habits = [
+        models.Habit(name=f"Habit {i}", frequency="daily", category="health", start_date=TODAY, user_id=user.id)
+        for i in range(3)
+    ]
+    db.add_all(habits)
+    db.flush()
+    db.add_all(
+        models.HabitCheckin(habit_id=habit.id, checkin_date=TODAY - timedelta(days=offset), status="completed")
+        for habit in habits
+        for offset in range(7)
+    )
+    db.commit()
+    return habits
+
+
+def pages(client, headers, url, limit, **params):
+    """Every page of `url`, following the cursor header."""
+    pages, after = [], None
+    while True:
+        query = {**params, "limit": limit, **({"after": after} if after else {})}
+        response = client.get(url, params=query, headers=headers)
+        assert response.status_code == 200
+        pages.append(response.json())
+        after = response.headers.get(NEXT_CURSOR_HEADER)
+        if after is None:
+            return pages
+
+
+def test_habit_pages_are_complete_and_disjoint(client, headers, habits):
+    found = pages(client, headers, "/habits/", limit=2)
+    assert [len(page) for page in found] == [2, 1]
+    assert [h["id"] for page in found for h in page] == [habit.id for habit in habits]
+
+
+@pytest.mark.parametrize("limit", [1, 4, 21, 50])
+def test_checkin_pages_are_complete_and_disjoint(client, headers, habits, limit):
+    found = pages(client, headers, "/habits/checkins/all", limit=limit)
+    rows = [row for page in found for row in page]
+    assert all(len(page) <= limit for page in found)
+    assert len(rows) == len({row["id"] for row in rows}) == 21
+    assert rows == sorted(rows, key=lambda row: (row["checkin_date"], row["id"]))
+
+
+def test_last_page_has_no_cursor(client, headers, habits):
+    response = client.get("/habits/checkins/all", params={"limit": 21}, headers=headers)
+    assert len(response.json()) == 21
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_checkin_pages_respect_the_date_range(client, headers, habits):
+    since = (TODAY - timedelta(days=2)).isoformat()
+    rows = [row for page in pages(client, headers, "/habits/checkins/all", limit=4, since=since) for row in page]
+    assert len(rows) == 9
+    assert all(row["checkin_date"] >= since for row in rows)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor("yesterday", 1), encode_cursor(1, 2)])
+def test_bad_cursor_is_rejected(client, headers, habits, cursor):
+    response = client.get("/habits/checkins/all", params={"after": cursor}, headers=headers)
+    assert response.status_code == 400
+    assert client.get("/habits/", params={"after": cursor}, headers=headers).status_code == 400
+
+
+def test_checkins_stream_as_ndjson_after_the_cursor(client, headers, habits):
+    first = client.get("/habits/checkins/all", params={"limit": 5}, headers=headers)
+    rest = [row for page in pages(client, headers, "/habits/checkins/all", limit=50,
+                                  after=first.headers[NEXT_CURSOR_HEADER]) for row in page]
+
+    response = client.get(
+        "/habits/checkins/all",
+        params={"after": first.headers[NEXT_CURSOR_HEADER], "limit": 1},
+        headers={**headers, "Accept": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert "etag" in response.headers
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    assert streamed == rest
+    assert len(first.json()) + len(streamed) == 21
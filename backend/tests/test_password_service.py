@@ -0,0 +1,29 @@
+# backend/tests/test_password_service.py
+import asyncio
+
+import pytest
+
+import password_service
+from metrics import PASSWORD_HASH_PENDING, PASSWORD_HASH_SECONDS
+
+
+def test_failed_hashes_are_not_counted_as_completed():
+    before = dict(password_service._stats)
+
+    async def run():
+        hashed = await password_service.hash_password("correct horse")
+        assert await password_service.verify_password("correct horse", hashed)
+        with pytest.raises(ValueError):
+            await password_service.verify_password("correct horse", "not a hash")
+
+    try:
+        asyncio.run(run())
+    finally:
+        password_service.shutdown()
+
+    stats = password_service.metrics()
+    assert stats["completed"] - before["completed"] == 2
+    assert stats["failed"] - before["failed"] == 1
+    assert stats["pending"] == 0
+    assert PASSWORD_HASH_PENDING.series[()] == 0
+    assert sum(PASSWORD_HASH_SECONDS.series[("failed",)][:-1]) >= 1
@@ -0,0 +1,9 @@
+# backend/tests/test_pdf_service.py
+import pytest
+
+from pdf_service import streak_label
+
+
+@pytest.mark.parametrize("frequency, label", [("daily", "3 days"), ("weekly", "3 weeks"), ("monthly", "3 months")])
+def test_streak_is_labelled_in_periods_of_the_habit_frequency(frequency, label):
+    assert streak_label({"frequency": frequency, "streak": 3}) == label
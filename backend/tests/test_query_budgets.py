@@ -0,0 +1,83 @@
+# backend/tests/test_query_budgets.py
+"""
+Each endpoint stays within its QUERY_BUDGETS entry, the same budgets that
+scripts/check_query_plans.py checks against a larger dataset.
+"""
+from datetime import date, timedelta
+
+import pytest
+
+import models
+import stats_service
+from scripts.check_query_plans import QUERY_BUDGETS
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def habits(db, user):
+    """Two daily habits with a month of check-ins each."""
+    habits = [
+        models.Habit(name=name, frequency="daily", category=category, start_date=TODAY - timedelta(days=60), user_id=user.id)
+        for name, category in (("Run", "health"), ("Read", "learning"))
+    ]
+    db.add_all(habits)
+    db.flush()
+    db.add_all(
+        models.HabitCheckin(habit_id=habit.id, checkin_date=TODAY - timedelta(days=offset), status="completed")
+        for habit in habits
+        for offset in range(1, 31)
+    )
+    stats_service.refresh_habit_stats(db, [habit.id for habit in habits])
+    db.commit()
+    return habits
+
+
+def habit_body(habit, **changes):
+    return {
+        "name": habit.name, "frequency": habit.frequency, "category": habit.category,
+        "start_date": habit.start_date.isoformat(), **changes,
+    }
+
+
+# The request each endpoint is measured with, given the habits fixture.
+REQUESTS = {
+    ("GET", "/habits/"): lambda habits: ("/habits/", {"params": {"limit": 1}}),
+    ("POST", "/habits/"): lambda habits: ("/habits/", {"json": habit_body(habits[0], name="Stretch")}),
+    ("PUT", "/habits/{habit_id}"): lambda habits: (
+        f"/habits/{habits[0].id}", {"json": habit_body(habits[0], name="Renamed")}
+    ),
+    ("DELETE", "/habits/{habit_id}"): lambda habits: (f"/habits/{habits[1].id}", {}),
+    ("GET", "/habits/checkins/all"): lambda habits: ("/habits/checkins/all", {"params": {"limit": 10}}),
+    ("POST", "/habits/checkins/batch"): lambda habits: ("/habits/checkins/batch", {"json": {"checkins": [
+        {"habit_id": habits[0].id, "checkin_date": TODAY.isoformat()},
+        {"habit_id": habits[1].id, "checkin_date": (TODAY - timedelta(days=1)).isoformat()},
+    ]}}),
+    ("GET", "/habits/{habit_id}/checkins/"): lambda habits: (f"/habits/{habits[0].id}/checkins/", {}),
+    ("POST", "/habits/{habit_id}/checkins/"): lambda habits: (
+        f"/habits/{habits[0].id}/checkins/", {"json": {"checkin_date": TODAY.isoformat()}}
+    ),
+    ("DELETE", "/habits/{habit_id}/checkins/{checkin_id}"): lambda habits: (
+        f"/habits/{habits[0].id}/checkins/{habits[0].checkins[10].id}", {}
+    ),
+    ("GET", "/analytics/stats"): lambda habits: ("/analytics/stats", {}),
+    ("GET", "/analytics/heatmap"): lambda habits: ("/analytics/heatmap", {}),
+    ("GET", "/analytics/series"): lambda habits: ("/analytics/series", {"params": {"bucket": "week"}}),
+    ("GET", "/dashboard/"): lambda habits: ("/dashboard/", {"params": {"days": 30}}),
+    ("GET", "/report/pdf"): lambda habits: ("/report/pdf", {}),
+    ("GET", "/ai/suggest_habits"): lambda habits: ("/ai/suggest_habits", {}),
+    ("GET", "/auth/me"): lambda habits: ("/auth/me", {}),
+}
+
+
+def test_every_budget_is_measured():
+    assert REQUESTS.keys() == QUERY_BUDGETS.keys()
+
+
+@pytest.mark.parametrize("method,route", sorted(QUERY_BUDGETS))
+def test_endpoint_stays_within_query_budget(client, headers, habits, max_queries, method, route):
+    url, kwargs = REQUESTS[method, route](habits)
+    client.get("/auth/me", headers=headers)  # Warms the principal cache, as on a busy worker.
+    with max_queries(QUERY_BUDGETS[method, route], f"{method} {route}"):
+        response = client.request(method, url, headers=headers, **kwargs)
+    assert response.status_code < 400, response.text
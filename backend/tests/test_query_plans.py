@@ -0,0 +1,41 @@
+# backend/tests/test_query_plans.py
+"""
+Every statement the routers emit must reach `habits` and `habit_checkins`
+through an index. SQLite only; run scripts/check_query_plans.py with
+--database-url for PostgreSQL.
+"""
+from sqlalchemy import event, text
+
+from database import async_engine, engine
+from scripts.check_query_plans import HOT_TABLES, exercise_routes, seed, sqlite_full_scans
+
+
+def test_router_queries_do_not_scan_hot_tables(db, client):
+    seed(db, users=20, habits=5, days=200)
+    db.execute(text("ANALYZE"))
+    db.commit()
+
+    captured = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE", "WITH"):
+            captured.setdefault(statement, parameters)
+
+    engines = (engine, async_engine.sync_engine)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", capture)
+    try:
+        exercise_routes(client, user_id=10)
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", capture)
+
+    assert captured
+    with engine.connect() as conn:
+        scans = {
+            " ".join(statement.split()): found
+            for statement, parameters in captured.items()
+            for found in [sqlite_full_scans(conn, statement, parameters)[1]]
+            if found
+        }
+    assert not scans, f"Full scans of {', '.join(HOT_TABLES)}: {scans}"
@@ -0,0 +1,47 @@
+# backend/tests/test_query_profiler.py
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+import metrics
+import query_profiler
+
+
+@pytest.fixture
+def profiled(engine):
+    query_profiler.install()
+    yield engine
+    for name, listener in (
+        ("before_cursor_execute", query_profiler._before_cursor_execute),
+        ("after_cursor_execute", query_profiler._after_cursor_execute),
+        ("handle_error", query_profiler._handle_error),
+    ):
+        event.remove(Engine, name, listener)
+
+
+def test_failed_statements_do_not_leave_start_times(profiled):
+    with profiled.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM no_such_table"))
+        conn.execute(text("SELECT 1"))
+        assert conn.info["profiler_started"] == []
+
+
+def test_failed_statements_do_not_leave_metrics_start_times(engine):
+    metrics.instrument_engines()
+    token = metrics._request_db.set([0, 0.0])
+    try:
+        with engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM no_such_table"))
+            assert conn.info["metrics_started"] == []
+    finally:
+        metrics._request_db.reset(token)
+
+
+def test_max_queries_counts_statements(db, max_queries):
+    with pytest.raises(query_profiler.TooManyQueriesError, match="ran 2 statements, expected at most 1"):
+        with max_queries(1, "two selects"):
+            db.execute(text("SELECT 1"))
+            db.execute(text("SELECT 2"))
@@ -0,0 +1,117 @@
+# backend/tests/test_recommender.py
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import models
+import recommender
+from recommender import Recommender
+
+NAMES = [f"Habit {i}" for i in range(40)]
+EPOCH = datetime(2026, 1, 1)
+
+
+def random_users(rng: random.Random, user_ids) -> dict:
+    """{user_id: [row, ...]} with a handful of habits each, drawn from a skewed vocabulary."""
+    return {
+        user_id: [
+            (user_id, name, "health", "daily", EPOCH + timedelta(minutes=user_id))
+            for name in sorted({NAMES[min(int(rng.expovariate(0.15)), len(NAMES) - 1)] for _ in range(rng.randint(1, 6))})
+        ]
+        for user_id in user_ids
+    }
+
+
+def rows_of(users: dict) -> list:
+    return [row for user_id in sorted(users) for row in users[user_id]]
+
+
+def by_key(model: Recommender) -> dict:
+    """The model's counts and neighbour lists keyed by habit name, independent of item order."""
+    keys = [item["key"] for item in model.items]
+    pairs = {
+        (keys[key >> 32], keys[key & 0xFFFFFFFF]): int(count)
+        for key, count in zip(model.pair_keys, model.pair_counts)
+    }
+    return {
+        "items": {keys[i]: int(count) for i, count in enumerate(model.item_counts) if count},
+        "pairs": {tuple(sorted(pair)): count for pair, count in pairs.items()},
+        "neighbors": {
+            keys[i]: {
+                keys[j]: round(float(score), 5)
+                for j, score in zip(model.neighbors[model.indptr[i]:model.indptr[i + 1]],
+                                    model.scores[model.indptr[i]:model.indptr[i + 1]])
+            }
+            for i in range(len(keys)) if model.item_counts[i]
+        },
+        "users": {
+            int(user_id): sorted(keys[i] for i in model.user_items[start:end])
+            for user_id, start, end in zip(model.user_ids, model.user_indptr[:-1], model.user_indptr[1:])
+        },
+    }
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_refresh_matches_a_full_rebuild(seed):
+    rng = random.Random(seed)
+    users = random_users(rng, range(1, 201))
+    model = Recommender.build(rows_of(users))
+
+    changed = rng.sample(sorted(users), 30)
+    replaced = random_users(rng, changed[:20])  # Edited habit sets.
+    for user_id in changed[20:]:
+        del users[user_id]  # Users without habits any more.
+    users.update(replaced)
+    added = random_users(rng, range(300, 310))  # New users, one with a habit new to the model.
+    added[310] = [(310, "Brand new habit", "other", "weekly", EPOCH)]
+    users.update(added)
+
+    model.refresh(rows_of({**replaced, **added}), changed + sorted(added))
+    rebuilt = Recommender.build(rows_of(users))
+    assert by_key(model) == by_key(rebuilt)
+    for owned in (["Habit 0"], ["Habit 1", "habit 2"], ["Brand new habit"]):
+        assert [r["key"] for r in model.recommend(owned, 5)] == [r["key"] for r in rebuilt.recommend(owned, 5)]
+
+
+def test_refresh_without_changes_keeps_the_model():
+    model = Recommender.build(rows_of(random_users(random.Random(1), range(1, 50))))
+    before = by_key(model)
+    model.refresh([], [])
+    assert by_key(model) == before
+
+
+def test_recommend_skips_owned_habits_and_pads_with_popular_ones():
+    rows = [
+        (1, "Run", "health", "daily", EPOCH), (1, "Stretch", "health", "daily", EPOCH),
+        (2, "Run", "health", "daily", EPOCH), (2, "Stretch", "health", "daily", EPOCH),
+        (3, "Read", "learning", "daily", EPOCH), (4, "Read", "learning", "daily", EPOCH),
+        (5, "Read", "learning", "daily", EPOCH),
+    ]
+    model = Recommender.build(rows)
+    picks = model.recommend([" run "], 2)
+    assert [(p["name"], p["score"] > 0) for p in picks] == [("Stretch", True), ("Read", False)]
+
+
+def test_refresh_from_db_applies_changed_users(db, user, tmp_path):
+    other = models.User(username="other", email="other@example.com", hashed_password="x")
+    db.add(other)
+    db.flush()
+    start = EPOCH.date()
+    for owner, names in ((user, ["Run", "Read"]), (other, ["Run", "Stretch"])):
+        db.add_all(models.Habit(name=name, frequency="daily", category="health", start_date=start, user_id=owner.id)
+                   for name in names)
+    db.commit()
+
+    model = recommender.build_from_db(db)
+    model.save(str(tmp_path))
+    model = Recommender.load(str(tmp_path), with_state=True)
+    assert recommender.refresh_from_db(db, model) == 0
+
+    db.add(models.Habit(name="Stretch", frequency="daily", category="health", start_date=start, user_id=user.id))
+    db.query(models.Habit).filter_by(user_id=other.id, name="Run").delete()
+    db.commit()
+    assert recommender.refresh_from_db(db, model) == 2
+    assert by_key(model) == by_key(recommender.build_from_db(db))
+    assert np.array_equal(model.user_ids, [user.id, other.id])
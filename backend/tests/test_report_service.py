@@ -0,0 +1,98 @@
+# backend/tests/test_report_service.py
+import time
+
+import pytest
+
+import report_service
+from report_service import ReportCache
+
+
+@pytest.fixture
+def reports(user):
+    """Renders in a fresh pool, with no PDFs or jobs left over from other tests."""
+    report_service.report_cache.clear()
+    report_service._jobs.clear()
+    yield
+    report_service.shutdown()
+    report_service.report_cache.clear()
+    report_service._jobs.clear()
+
+
+def add_habit(client, headers, name="Read"):
+    body = {"name": name, "frequency": "weekly", "category": "Learning", "start_date": "2026-01-01"}
+    response = client.post("/habits/", json=body, headers=headers)
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def test_pool_spawns_its_workers(reports):
+    assert report_service._get_executor()._mp_context.get_start_method() == "spawn"
+
+
+def test_unchanged_report_is_revalidated_with_304(reports, client, headers):
+    add_habit(client, headers)
+    response = client.get("/report/pdf", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.content.startswith(b"%PDF")
+    etag = response.headers["etag"]
+
+    response = client.get("/report/pdf", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    add_habit(client, headers, name="Run")
+    response = client.get("/report/pdf", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert report_service.metrics()["renders"] >= 2
+
+
+def test_job_is_submitted_polled_and_downloaded(reports, client, headers):
+    add_habit(client, headers)
+    response = client.post("/report/pdf/jobs", headers=headers)
+    assert response.status_code == 202
+    job = response.json()
+    assert response.headers["location"] == f"/report/pdf/jobs/{job['job_id']}"
+
+    deadline = time.monotonic() + 30
+    while job["status"] == "pending" and time.monotonic() < deadline:
+        time.sleep(0.05)
+        job = client.get(f"/report/pdf/jobs/{job['job_id']}", headers=headers).json()
+    assert job["status"] == "done"
+
+    download = f"/report/pdf/jobs/{job['job_id']}/download"
+    response = client.get(download, headers=headers)
+    assert response.status_code == 200
+    assert response.content.startswith(b"%PDF")
+    assert response.headers["etag"] == job["etag"]
+    assert client.get(download, headers={**headers, "If-None-Match": job["etag"]}).status_code == 304
+
+
+def test_job_of_unknown_id_is_not_found(reports, client, headers):
+    assert client.get("/report/pdf/jobs/missing", headers=headers).status_code == 404
+    assert client.get("/report/pdf/jobs/missing/download", headers=headers).status_code == 404
+
+
+def test_cache_evicts_least_recently_used_beyond_max_bytes():
+    cache = ReportCache(max_bytes=10)
+    cache.put(1, "a", b"1234")
+    cache.put(2, "a", b"1234")
+    assert cache.get(1, "a") == b"1234"  # User 2 is now the least recently used.
+    cache.put(3, "a", b"1234")
+    assert cache.size == 8
+    assert cache.get(2, "a") is None
+    assert cache.get(1, "a") == b"1234"
+    assert cache.get(3, "a") == b"1234"
+
+
+def test_cache_keeps_one_version_per_user_and_skips_oversized_pdfs():
+    cache = ReportCache(max_bytes=10)
+    cache.put(1, "a", b"1234")
+    cache.put(1, "b", b"123456")
+    assert cache.size == 6
+    assert cache.get(1, "a") is None
+    assert cache.get(1, "b") == b"123456"
+    cache.put(1, "c", b"x" * 11)
+    assert cache.size == 0
+    assert cache.get(1, "c") is None
@@ -0,0 +1,37 @@
+# backend/tests/test_startup.py
+"""
+Worker cold start stays within the budgets of benchmarks/bench_startup.py, and
+Groq, ReportLab and NumPy stay deferred until first use.
+"""
+import os
+
+import pytest
+
+from benchmarks.bench_startup import (
+    LAZY_MODULES,
+    MAX_FIRST_REQUEST_MS,
+    MAX_IMPORT_MS,
+    budget_failures,
+    first_requests,
+    stamped_database,
+)
+
+
+@pytest.fixture(scope="module")
+def runs():
+    env = dict(os.environ)
+    path = stamped_database(env)
+    try:
+        yield first_requests(env, runs=3)
+    finally:
+        os.remove(path)
+
+
+def test_deferred_modules_are_not_imported_at_startup(runs):
+    assert all(run["status"] == 200 for run in runs)
+    for run in runs:
+        assert not set(run["lazy_loaded"]) & set(LAZY_MODULES), run["lazy_loaded"]
+
+
+def test_cold_start_within_budget(runs):
+    assert budget_failures(runs, MAX_IMPORT_MS, MAX_FIRST_REQUEST_MS) == []
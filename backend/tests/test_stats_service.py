@@ -0,0 +1,133 @@
+# backend/tests/test_stats_service.py
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+import analytics_engine
+import bitmap_service
+import models
+import stats_service
+from database import SessionLocal
+
+TODAY = date(2026, 10, 14)  # A Wednesday.
+
+
+def history(seed: int, days: int = 400):
+    """Check-ins on random days of the last `days`, a fifth of them skipped."""
+    rng = random.Random(seed)
+    return [
+        (TODAY - timedelta(days=offset), "completed" if rng.random() < 0.8 else "skipped")
+        for offset in range(days)
+        if rng.random() < 0.55
+    ]
+
+
+def add_habit(db, user, frequency, target, checkins):
+    habit = models.Habit(
+        name=f"{frequency} x{target}", frequency=frequency, category="health",
+        start_date=TODAY - timedelta(days=500), target=target, user_id=user.id,
+    )
+    db.add(habit)
+    db.flush()
+    db.add_all(
+        models.HabitCheckin(habit_id=habit.id, checkin_date=day, status=status) for day, status in checkins
+    )
+    db.commit()
+    return habit
+
+
+def engine_metrics(habit, checkins):
+    days = analytics_engine.day_ordinals(day for day, _ in checkins)
+    return analytics_engine.habit_metrics(
+        [habit.id], [habit.frequency], [habit.target], [habit.start_date],
+        np.full(len(days), habit.id), days, [status for _, status in checkins], today=TODAY,
+    )[habit.id]
+
+
+def stored(db, habit):
+    return db.query(models.HabitStats).filter(models.HabitStats.habit_id == habit.id).one()
+
+
+@pytest.mark.parametrize("frequency", ["daily", "weekly", "monthly"])
+@pytest.mark.parametrize("target", [None, 1, 3])
+@pytest.mark.parametrize("seed", range(3))
+def test_backfill_matches_engine(db, user, frequency, target, seed):
+    checkins = history(seed)
+    habit = add_habit(db, user, frequency, target, checkins)
+    stats_service.backfill_habit_stats(db)
+
+    habit_stats = stored(db, habit)
+    expected = engine_metrics(habit, checkins)
+    assert habit_stats.longest_streak == expected["longest_streak"]
+    assert stats_service.live_streak(habit_stats, frequency, TODAY) == expected["current_streak"]
+    assert habit_stats.total_checkins == sum(status == "completed" for _, status in checkins)
+
+
+@pytest.mark.parametrize("frequency,target", [("daily", None), ("weekly", 2), ("monthly", 1)])
+@pytest.mark.parametrize("bitmap_reads", [False, True])
+def test_incremental_writes_match_backfill(db, user, monkeypatch, frequency, target, bitmap_reads):
+    monkeypatch.setattr(stats_service, "CHECKIN_BITMAP_READS", bitmap_reads)
+    checkins = history(7, days=120)
+    habit = add_habit(db, user, frequency, target, [])
+    rows = []
+    for day, status in random.Random(1).sample(checkins, len(checkins)):
+        row = models.HabitCheckin(habit_id=habit.id, checkin_date=day, status=status)
+        db.add(row)
+        db.flush()
+        bitmap_service.set_day(db, habit.id, day, status)
+        stats_service.record_checkin(db, habit.id, day, status)
+        rows.append(row)
+    for row in rows[::3]:
+        db.delete(row)
+        db.flush()
+        bitmap_service.clear_day(db, habit.id, row.checkin_date, row.status)
+        stats_service.remove_checkin(db, habit.id, row.checkin_date, row.status)
+    db.commit()
+
+    incremental = stored(db, habit)
+    incremental = (incremental.current_streak, incremental.longest_streak,
+                   incremental.total_checkins, incremental.last_checkin_date)
+    stats_service.backfill_habit_stats(db)
+    db.expire_all()
+    recomputed = stored(db, habit)
+    assert incremental == (recomputed.current_streak, recomputed.longest_streak,
+                           recomputed.total_checkins, recomputed.last_checkin_date)
+
+
+def test_weekly_streak_survives_the_open_week(db, user):
+    monday = TODAY - timedelta(days=TODAY.weekday())
+    checkins = [(monday - timedelta(weeks=weeks, days=-1), "completed") for weeks in (1, 2, 3)]
+    habit = add_habit(db, user, "weekly", None, checkins)
+    stats_service.backfill_habit_stats(db)
+
+    habit_stats = stored(db, habit)
+    assert stats_service.live_streak(habit_stats, "weekly", TODAY) == 3
+    assert stats_service.live_streak(habit_stats, "weekly", TODAY + timedelta(weeks=1)) == 0
+    assert stats_service.get_user_stats(db, user.id)["streaks"] == {
+        str(habit.id): stats_service.live_streak(habit_stats, "weekly")
+    }
+
+
+def test_first_checkin_waits_for_a_concurrently_inserted_stats_row(db, user, monkeypatch):
+    habit_id = add_habit(db, user, "daily", None, []).id
+
+    # Another transaction inserts the row after this one found none to lock.
+    inserted = []
+
+    def insert_concurrently(db, habit_ids):
+        if not inserted:
+            with SessionLocal() as other:
+                other.add(models.HabitStats(habit_id=habit_id, current_streak=0, longest_streak=4, total_checkins=9))
+                other.commit()
+            inserted.append(True)
+        return real_insert(db, habit_ids)
+
+    real_insert = stats_service._insert_stats
+    monkeypatch.setattr(stats_service, "_insert_stats", insert_concurrently)
+    habit_stats = stats_service._locked_stats(db, habit_id)
+
+    assert inserted
+    assert (habit_stats.longest_streak, habit_stats.total_checkins) == (4, 9)
+    assert db.query(models.HabitStats).filter_by(habit_id=habit_id).count() == 1
@@ -7,7 +7,6 @@ import { format, subDays } from 'date-fns';
 import api from '@/lib/api'; 
 import { useToast } from '@/hooks/use-toast';
 import { Button } from '@/components/ui/button';
-import { useHabits } from '@/hooks/useHabits';
 
 interface AnalyticsProps {
   habits: HabitWithCheckins[];
@@ -47,16 +46,14 @@ const calculateWeeklyProgress = (checkins: HabitCheckin[]) => {
 };
 
 
-const AnalyticsComponent = ({ habits: habitsWithCheckins, checkins: _propCheckins }: AnalyticsProps) => {
+const AnalyticsComponent = ({ habits: habitsWithCheckins, checkins }: AnalyticsProps) => {
   const { toast } = useToast();
   const [exporting, setExporting] = React.useState(false);
-  
-  // Use global checkins state for instant updates
-  const { checkins } = useHabits(); 
 
   // --- STATS Calculation ---
+  // Totals over the whole history, from the server; `checkins` only covers the loaded window.
   const totalHabits = habitsWithCheckins.length;
-  const totalCheckins = habitsWithCheckins.reduce((sum, habit) => sum + habit.checkins.length, 0);
+  const totalCheckins = habitsWithCheckins.reduce((sum, habit) => sum + habit.total_checkins, 0);
   
   const averageStreak = totalHabits > 0
     ? Math.round(habitsWithCheckins.reduce((sum, habit) => sum + (habit.streak || 0), 0) / totalHabits)
@@ -70,7 +67,7 @@ const AnalyticsComponent = ({ habits: habitsWithCheckins, checkins: _propCheckin
   // --- CHARTS Data ---
   const completionData = habitsWithCheckins.map(habit => ({
     name: habit.name.length > 15 ? `${habit.name.substring(0, 15)}...` : habit.name,
-    completed: habit.checkins.length,
+    completed: habit.total_checkins,
     streak: habit.streak,
     category: habit.category
   }));
@@ -1,56 +1,36 @@
 import { useState, useEffect, useCallback } from 'react';
-import type { Habit, HabitCheckin, HabitWithCheckins } from '@/types/habit';
+import type { DashboardHabit, Habit, HabitCheckin, HabitWithCheckins } from '@/types/habit';
 import { useAuth } from '@/contexts/AuthContext';
 // FIX: Import the correct API structures
 import api from '@/lib/api'; 
-import { format, isSameDay, parseISO } from 'date-fns';
+import { format } from 'date-fns';
 
-// A client-side streak calculation for immediate UI feedback.
-const calculateStreak = (checkins: HabitCheckin[]): number => {
-  if (!checkins || checkins.length === 0) {
-    return 0;
-  }
-
-  // Sort dates descending - handle both date strings and full datetime strings
-  const sortedDates = checkins.map(c => {
-    // If it's already a date string (YYYY-MM-DD), parse it directly
-    if (c.checkin_date.match(/^\d{4}-\d{2}-\d{2}$/)) {
-      return new Date(c.checkin_date + 'T00:00:00.000Z');
-    }
-    return parseISO(c.checkin_date);
-  }).sort((a, b) => b.getTime() - a.getTime());
-
-  let streak = 0;
-  let today = new Date();
-
-  // Check if today or yesterday is the last check-in to start the streak
-  if (!isSameDay(sortedDates[0], today) && !isSameDay(sortedDates[0], new Date().setDate(today.getDate() - 1))) {
-    return 0;
-  }
-
-  let expectedDate = today;
-  for (const date of sortedDates) {
-    if (isSameDay(date, expectedDate)) {
-      streak++;
-      expectedDate.setDate(expectedDate.getDate() - 1);
-    } else if (isSameDay(date, new Date(expectedDate.getTime() - 1))) {
-      // handles the case where there are multiple check-ins on the same day
-      continue;
-    }
-    else {
-      break;
-    }
-  }
-
-  return streak;
-};
+// Check-ins loaded for the calendar and charts. Streaks and totals cover the
+// whole history: they come with each habit, computed on the server.
+const DASHBOARD_WINDOW_DAYS = 366;
 
 export const useHabits = () => {
   const { user } = useAuth();
-  const [habits, setHabits] = useState<Habit[]>([]);
+  const [habits, setHabits] = useState<DashboardHabit[]>([]);
   const [checkins, setCheckins] = useState<HabitCheckin[]>([]);
   const [loading, setLoading] = useState(true);
 
+  // One round trip: habits with their streaks and totals, and a year of check-ins.
+  const fetchDashboard = useCallback(async () => {
+    const dashboard = await api.dashboard.get(DASHBOARD_WINDOW_DAYS);
+    setHabits(dashboard.habits);
+    setCheckins(dashboard.checkins);
+  }, []);
+
+  // Picks up the streaks and totals the server recomputed after a check-in changed.
+  const refreshStreaks = async () => {
+    try {
+      await fetchDashboard();
+    } catch (error) {
+      console.error('Failed to refresh streaks:', error);
+    }
+  };
+
   // FIX: Converted to useCallback for dependency stability
   const loadHabitsAndCheckins = useCallback(async () => {
     if (!user) {
@@ -59,21 +39,14 @@ export const useHabits = () => {
     };
     try {
       setLoading(true);
-      // FIX: Use the correct API calls from the integrated 'api' object
-      const [habitsResponse, checkinsResponse] = await Promise.all([
-        api.habits.getAll(),
-        api.checkins.getAllForUser(),
-      ]);
-      // FIX: The backend returns a straight array, no need for .habits/checkins
-      setHabits(habitsResponse);
-      setCheckins(checkinsResponse);
+      await fetchDashboard();
     } catch (error) {
       console.error('Failed to load habits and check-ins:', error);
       // You might want to show a toast message to the user here
     } finally {
       setLoading(false);
     }
-  }, [user]);
+  }, [user, fetchDashboard]);
 
   useEffect(() => {
     loadHabitsAndCheckins();
@@ -85,7 +58,15 @@ export const useHabits = () => {
     // FIX: API returns the new habit object directly (type is `Habit`)
     const newHabit = await api.habits.create(habitData);
     // FIX: Safely cast the returned object to the Habit type
-    setHabits(prev => [...prev, newHabit as Habit]); 
+    const dashboardHabit: DashboardHabit = {
+      ...(newHabit as Habit),
+      streak: 0,
+      longest_streak: 0,
+      total_checkins: 0,
+      last_checkin_date: null,
+      completed_today: false,
+    };
+    setHabits(prev => [...prev, dashboardHabit]);
     return newHabit as Habit;
   };
 
@@ -114,6 +95,7 @@ export const useHabits = () => {
       setCheckins(prev => prev.filter(c => c.id !== existingCheckin.id)); // Optimistic update
       try {
         await api.checkins.removeCheckin(habitId, existingCheckin.id);
+        await refreshStreaks();
       } catch (error) {
         // Handle rollback if API fails, though usually not strictly necessary for this task level
         console.error("Failed to remove check-in:", error);
@@ -137,6 +119,7 @@ export const useHabits = () => {
         const newCheckin = await api.checkins.addCheckin(habitId, { checkin_date: todayStr });
         // Replace temporary check-in with real one from API response
         setCheckins(prev => prev.filter(c => c.id !== -1).concat(newCheckin as HabitCheckin));
+        await refreshStreaks();
       } catch (error) {
         // Handle rollback: remove the temporary check-in on failure
         setCheckins(prev => prev.filter(c => c.id !== -1));
@@ -161,12 +144,9 @@ export const useHabits = () => {
         return checkinDate === todayStr;
       });
 
-      const streak = calculateStreak(habitCheckins);
-
       return {
         ...habit,
         checkins: habitCheckins,
-        streak,
         completedToday,
       };
     });
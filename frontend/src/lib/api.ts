@@ -1,3 +1,5 @@
+import type { AnalyticsQuery, Dashboard, Heatmap, Series } from '@/types/habit';
+
 // API configuration
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
@@ -42,6 +44,31 @@ async function apiRequest<T>(
   }
 }
 
+// Follows the X-Next-Cursor header of a keyset-paginated list until the last page.
+async function apiRequestAllPages<T>(endpoint: string, pageSize = 1000): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | null = null;
+  const token = localStorage.getItem('authToken');
+
+  do {
+    const params = new URLSearchParams({ limit: String(pageSize) });
+    if (cursor) {
+      params.append('after', cursor);
+    }
+    const response = await fetch(`${API_BASE_URL}${endpoint}?${params}`, {
+      headers: token ? { Authorization: `Bearer ${token}` } : {},
+    });
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({ detail: 'An unknown error occurred' }));
+      throw new Error(errorData.detail || `HTTP ${response.status}`);
+    }
+    items.push(...(await response.json()));
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+
+  return items;
+}
+
 // --- Authentication API ---
 export const authAPI = {
   login: async (email: string, password: string) => {
@@ -72,7 +99,7 @@ export const authAPI = {
 export const habitsAPI = {
   // FIX: Added back the crucial getAll endpoint
   getAll: async () => {
-    return apiRequest<any[]>('/habits/');
+    return apiRequestAllPages<any>('/habits/');
   },
 
   create: async (habitData: {
@@ -99,7 +126,7 @@ export const habitsAPI = {
 // --- Check-ins API ---
 export const checkinsAPI = {
   getAllForUser: async () => {
-    return apiRequest<any[]>('/habits/checkins/all');
+    return apiRequestAllPages<any>('/habits/checkins/all');
   },
   
   addCheckin: async (habitId: number, checkinData: { checkin_date: string }) => {
@@ -117,10 +144,34 @@ export const checkinsAPI = {
   },
 };
 
+// Repeats habit_id/category once per value, as the backend expects for list filters.
+function analyticsParams(query: AnalyticsQuery): string {
+  const params = new URLSearchParams();
+  if (query.since) params.append('since', query.since);
+  if (query.until) params.append('until', query.until);
+  if (query.bucket) params.append('bucket', query.bucket);
+  query.habitIds?.forEach(id => params.append('habit_id', String(id)));
+  query.categories?.forEach(category => params.append('category', category));
+  return params.toString();
+}
+
 // --- Analytics API ---
 export const analyticsAPI = {
-  getStats: async () => {
-    return apiRequest<any>('/analytics/stats');
+  // Counts and completion ratios per day/week/month, bucketed on the server.
+  getHeatmap: async (query: AnalyticsQuery = {}) => {
+    return apiRequest<Heatmap>(`/analytics/heatmap?${analyticsParams(query)}`);
+  },
+
+  getSeries: async (query: AnalyticsQuery = {}) => {
+    return apiRequest<Series>(`/analytics/series?${analyticsParams(query)}`);
+  },
+};
+
+// --- Dashboard API ---
+export const dashboardAPI = {
+  // Habits with their streaks, the last `days` days of check-ins and the stats, in one request.
+  get: async (days = 30) => {
+    return apiRequest<Dashboard>(`/dashboard/?days=${days}`);
   },
 };
 
@@ -172,6 +223,7 @@ const api = {
   habits: habitsAPI,
   checkins: checkinsAPI, // FIX: Ensure checkinsAPI is included
   analytics: analyticsAPI,
+  dashboard: dashboardAPI,
   ai: aiAPI,
   report: reportAPI,
 };
@@ -16,12 +16,65 @@ export interface HabitCheckin {
   status: string;
 }
 
-export interface HabitWithCheckins extends Habit {
-  checkins: HabitCheckin[];
+// Streaks and total_checkins come from the server and cover the whole history;
+// checkins only holds the window the dashboard loaded.
+export interface DashboardHabit extends Habit {
   streak: number;
+  longest_streak: number;
+  total_checkins: number;
+  last_checkin_date: string | null;
+  completed_today: boolean;
+}
+
+export interface HabitWithCheckins extends DashboardHabit {
+  checkins: HabitCheckin[];
   completedToday: boolean;
 }
 
+export interface Dashboard {
+  today: string;
+  since: string;
+  habits: DashboardHabit[];
+  checkins: HabitCheckin[];
+  stats: {
+    total_habits: number;
+    total_checkins: number;
+    longest_streak: number;
+    streaks: Record<string, number>;
+  };
+}
+
+export type AnalyticsBucket = 'day' | 'week' | 'month';
+
+export interface AnalyticsQuery {
+  since?: string;
+  until?: string;
+  bucket?: AnalyticsBucket;
+  habitIds?: number[];
+  categories?: string[];
+}
+
+// Columnar payloads: entries at the same index across arrays belong together.
+export interface Heatmap {
+  bucket: AnalyticsBucket;
+  since: string;
+  until: string;
+  starts: string[];
+  counts: number[];
+  ratios: number[];
+}
+
+export interface Series {
+  bucket: AnalyticsBucket;
+  since: string;
+  until: string;
+  starts: string[];
+  habit_ids: number[];
+  counts: number[][];
+  totals: number[];
+  ratios: number[];
+}
+
 export type HabitCategory = 'health' | 'work' | 'learning' | 'other';
 export type HabitFrequency = 'daily' | 'weekly';
 